@@ -19,7 +19,11 @@ source ${BASE_DIR}/internals/paths/bin_paths.sh
 
 if [ -z $(which shapemapper_read_trimmer) ] || \
    [ -z $(which shapemapper_mutation_parser) ] || \
-   [ -z $(which shapemapper_mutation_counter) ]; then
+   [ -z $(which shapemapper_mutation_counter) ] || \
+   [ -z $(which shapemapper_parse_and_count) ] || \
+   [ -z $(which shapemapper_splice_cat) ] || \
+   [ -z $(which shapemapper_sam_mixer) ] || \
+   [ -z $(which shapemapper_line_splitter) ]; then
     msg="Error building ShapeMapper executables."
     echo "$msg"
     exit 1
@@ -6,6 +6,10 @@
 
 
 import sys, os
+import string
+
+# translation table deleting ASCII letters and spaces
+_VALID_SEQ_CHARS = str.maketrans('', '', string.ascii_letters + ' ')
 
 
 def check_fasta(fasta_path,
@@ -59,23 +63,23 @@ def check_fasta(fasta_path,
                 seq_count += 1
             elif header_count == 0:
                 missing_header = True
-        for j in range(len(fixed_lines[i])):
-            c = fixed_lines[i][j]
-            if c == "\n":
-                continue
-            elif c.upper() == "U":
-                found_U = True
-            elif c == ' ':
-                found_whitespace = True
-            elif not c.isalpha():
-                if header_count == 0:
-                    missing_header = True
-                    break_flag = True
-                    break
-                else:
-                    found_nonalpha = True
-                    break_flag = True
-                    break
+        seq = fixed_lines[i].rstrip("\n")
+        # delete all valid sequence characters in one pass, so the
+        # per-character check below only runs on lines with errors
+        if len(seq.translate(_VALID_SEQ_CHARS)) > 0 and not seq.replace(' ', '').isalpha():
+            j = 0
+            while seq[j].isalpha() or seq[j] == ' ':
+                j += 1
+            seq = seq[:j]
+            if header_count == 0:
+                missing_header = True
+            else:
+                found_nonalpha = True
+            break_flag = True
+        if 'U' in seq or 'u' in seq:
+            found_U = True
+        if ' ' in seq:
+            found_whitespace = True
         if found_whitespace or found_U:
             fixed_lines[i] = fixed_lines[i].replace('u', 't').replace('U','T').replace(' ','')
         if break_flag:
@@ -11,17 +11,25 @@ ap.add_argument('--output', type=str)
 # FIXME: rewrite in c++
 
 def iterate_fastq(filename):
-    f = open(filename, "rU")
+    # read in large blocks of lines, and keep everything as bytes to
+    # avoid decoding/encoding each line. Blocks always end on a '\n', so
+    # splitlines() gives universal newline support.
+    f = open(filename, "rb")
     lines = []
-    for line in f:
-        # suppress jdb socket message
-        if line.startswith("Listening"):
-            continue
-        lines.append(line)
-        if len(lines) == 4:
-            l = [lines[0][1:].split()[0], lines[1].strip(), lines[3].strip()]
-            yield l
-            lines = []
+    while True:
+        block = f.readlines(1 << 20)
+        if not block:
+            break
+        for line in b"".join(block).splitlines():
+            # suppress jdb socket message
+            if line.startswith(b"Listening"):
+                continue
+            lines.append(line)
+            if len(lines) == 4:
+                l = [lines[0][1:].split()[0], lines[1].strip(), lines[3].strip()]
+                yield l
+                lines = []
+    f.close()
 
 pa = ap.parse_args()
 
@@ -29,7 +37,7 @@ single_input = False
 if pa.input:
     single_input = True
 
-o = open(pa.output, "w", 1)
+o = open(pa.output, "wb", 1 << 20)
 
 def gen():
     if single_input:
@@ -67,6 +75,6 @@ for reads in gen():
         #if len(seq) > 1:
         #    fields += r
     if len(fields) > 0:
-        o.write('\t'.join(fields) + '\n')
+        o.write(b'\t'.join(fields) + b'\n')
 
 o.close()
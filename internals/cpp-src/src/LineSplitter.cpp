@@ -0,0 +1,97 @@
+/** @file
+ * @brief Distribute records from one text stream across several outputs. Primary interface functions.
+ */
+
+/*-----------------------------------------------------------------------
+ * This file is a part of ShapeMapper, and is licensed under the terms  *
+ * of the MIT license. Copyright 2018 Steven Busan.                     *
+ *----------------------------------------------------------------------*/
+
+#include "LineSplitter.h"
+
+namespace line_splitter {
+
+    /**
+     * @brief Distribute records round-robin across multiple output files or
+     *        named pipes, for example to feed parallel aligner instances.
+     *
+     * @param filename          Input file path
+     * @param outnames          Output file paths
+     * @param lines_per_record  Number of lines in each record (e.g. 1 for
+     *                          tab6, 4 for FASTQ). Records are never split
+     *                          across outputs.
+     */
+    void
+    splitLines(const std::string &filename,
+               const std::vector<std::string> &outnames,
+               const int lines_per_record = 1) {
+        if (outnames.size() < 1) {
+            throw std::invalid_argument("ERROR: at least one output required.");
+        }
+        if (lines_per_record < 1) {
+            throw std::invalid_argument("ERROR: lines_per_record must be positive.");
+        }
+        int in_fd = open(filename.c_str(), O_RDONLY);
+        if (in_fd < 0) {
+            throw std::runtime_error("ERROR: Could not open input file " + filename + ".");
+        }
+        std::vector<int> out_fds;
+        for (auto &outname : outnames) {
+            int fd = open(outname.c_str(), O_WRONLY | O_CREAT | O_TRUNC, 0644);
+            if (fd < 0) {
+                close(in_fd);
+                for (int f : out_fds) { close(f); }
+                throw std::runtime_error(
+                        "ERROR: Could not open output file " + outname + "\nCheck file and folder permissions.");
+            }
+            out_fds.push_back(fd);
+        }
+
+        std::vector<char> buf(LINE_SPLITTER_READ_SIZE);
+        std::vector<std::string> out_bufs(out_fds.size());
+        for (auto &b : out_bufs) {
+            b.reserve(LINE_SPLITTER_WRITE_SIZE * 2);
+        }
+        size_t current = 0;
+        int line_count = 0;
+        try {
+            while (true) {
+                size_t n = detail::readSome(in_fd, &buf[0], buf.size());
+                if (n == 0) { break; }
+                const char *p = &buf[0];
+                const char *end = p + n;
+                while (p < end) {
+                    const char *nl = static_cast<const char *>(memchr(p, '\n', end - p));
+                    if (nl == NULL) {
+                        // partial line, remainder comes with next read
+                        out_bufs[current].append(p, end - p);
+                        break;
+                    }
+                    out_bufs[current].append(p, nl + 1 - p);
+                    p = nl + 1;
+                    ++line_count;
+                    if (line_count == lines_per_record) {
+                        line_count = 0;
+                        if (out_bufs[current].length() >= LINE_SPLITTER_WRITE_SIZE) {
+                            util::writeAll(out_fds[current],
+                                           out_bufs[current].data(),
+                                           out_bufs[current].length());
+                            out_bufs[current].clear();
+                        }
+                        current = (current + 1) % out_fds.size();
+                    }
+                }
+            }
+            for (size_t i = 0; i < out_fds.size(); ++i) {
+                util::writeAll(out_fds[i], out_bufs[i].data(), out_bufs[i].length());
+            }
+        } catch (...) {
+            close(in_fd);
+            for (int f : out_fds) { close(f); }
+            throw;
+        }
+        close(in_fd);
+        for (int f : out_fds) { close(f); }
+    }
+
+}
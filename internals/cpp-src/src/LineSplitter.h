@@ -0,0 +1,50 @@
+/** @file
+ * @brief Distribute records from one text stream across several outputs. Utility functions.
+ */
+
+/*-----------------------------------------------------------------------
+ * This file is a part of ShapeMapper, and is licensed under the terms  *
+ * of the MIT license. Copyright 2018 Steven Busan.                     *
+ *----------------------------------------------------------------------*/
+
+#ifndef SHAPEMAPPER_LINESPLITTER_H
+#define SHAPEMAPPER_LINESPLITTER_H
+
+#include <string>
+#include <vector>
+#include <stdexcept>
+#include <cerrno>
+#include <cstring>
+
+#include <fcntl.h>
+#include <unistd.h>
+
+#include "util.h"
+
+// bytes per read() call
+#define LINE_SPLITTER_READ_SIZE (1 << 20)
+// per-output buffer flush threshold. Kept fairly small so each downstream
+// process starts receiving data quickly.
+#define LINE_SPLITTER_WRITE_SIZE (1 << 16)
+
+namespace line_splitter { namespace detail {
+
+    /**
+     * Read into buffer, retrying if interrupted. Returns bytes read (0 at end of input).
+     */
+    size_t readSome(int fd,
+                    char *buf,
+                    size_t len) {
+        while (true) {
+            ssize_t n = read(fd, buf, len);
+            if (n < 0) {
+                if (errno == EINTR) { continue; }
+                throw std::runtime_error("ERROR: read failed: " + std::string(strerror(errno)));
+            }
+            return n;
+        }
+    }
+
+}}
+
+#endif //SHAPEMAPPER_LINESPLITTER_H
@@ -0,0 +1,68 @@
+/** @file
+ * @brief Distribute records from one text stream across several outputs. Commandline executable.
+ */
+
+/*-----------------------------------------------------------------------
+ * This file is a part of ShapeMapper, and is licensed under the terms  *
+ * of the MIT license. Copyright 2018 Steven Busan.                     *
+ *----------------------------------------------------------------------*/
+
+#include <iostream>
+
+#include <boost/program_options.hpp>
+
+#include "LineSplitter.cpp"
+
+
+namespace po = boost::program_options;
+
+int main(int argc, char *argv[]) {
+    try {
+        std::string in;
+        std::vector<std::string> out;
+        int lines_per_record;
+
+        po::options_description desc("Usage");
+        desc.add_options()
+                ("help,h", "print usage message")
+
+                ("in,i", po::value<std::string>(&in)->required(), "input file path")
+
+                ("out,o", po::value<std::vector<std::string> >(&out)->multitoken()->required(),
+                 "output file paths")
+
+                ("lines_per_record,n", po::value<int>(&lines_per_record)->default_value(1),
+                 "number of lines in each record (e.g. 1 for tab6, 4 for FASTQ)");
+
+        po::positional_options_description pos;
+        pos.add("out", -1);
+
+        po::variables_map vm;
+
+        try {
+            po::store(po::command_line_parser(argc, argv).options(desc).positional(pos).run(), vm);
+
+            if (vm.count("help") or argc == 1) {
+                std::cout << desc << std::endl;
+                return 0; //SUCCESS
+            }
+            po::notify(vm);
+        }
+        catch (const po::error &e) {
+            std::cerr << "ERROR: " << e.what() << "\n" << std::endl;
+            std::cerr << desc << std::endl;
+            return 1; //FAILURE
+        }
+
+        line_splitter::splitLines(in, out, lines_per_record);
+    }
+    catch (const std::exception &e) {
+        std::cerr << e.what() << std::endl;
+        return 1; //FAILURE
+    }
+    catch (...) {
+        std::cerr << "Unknown error." << std::endl;
+        return 1;
+    }
+    return 0; //SUCCESS
+}
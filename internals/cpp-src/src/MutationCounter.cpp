@@ -22,6 +22,157 @@
 
 namespace mutation_counter {
 
+    /**
+     * @brief Accumulate sequencing depth, variant, and/or mutation counts
+     *        from processed reads, and write them to output files.
+     */
+    class CountWriter {
+    public:
+        CountWriter(const int primer_pairs,
+                    const std::string &variant_out,
+                    const std::string &count_out,
+                    const bool input_is_sorted,
+                    const bool separate_ambig_counts,
+                    const bool debug)
+                : input_is_sorted(input_is_sorted),
+                  separate_ambig_counts(separate_ambig_counts),
+                  debug(debug) {
+            // set selected output columns (this is a global from MutationCounter.h)
+            std::vector<std::string> new_column_names;
+            for (std::vector<std::string>::const_iterator it = mutation_classes.begin();
+                 it != mutation_classes.end();
+                 ++it) {
+                new_column_names.push_back((*it));
+                if (separate_ambig_counts){
+                    new_column_names.push_back((*it)+"_ambig");
+                }
+            }
+            new_column_names.push_back("read_depth");
+            new_column_names.push_back("effective_depth");
+            new_column_names.push_back("off_target_mapped_depth");
+            new_column_names.push_back("low_mapq_mapped_depth");
+            if (primer_pairs > 0) {
+                for (int i=1; i<=primer_pairs; i++){
+                    new_column_names.push_back("primer_pair_"+std::to_string(i)+"_mapped_depth");
+                }
+            } else {
+                new_column_names.push_back("mapped_depth");
+            }
+            column_names = new_column_names;
+
+            // ------------------------------------------------------------------------------
+            // open output files, set up streams
+
+            std::vector <std::string> out_names = {variant_out,
+                                                   count_out};
+            for (int i = 0; i < out_names.size(); ++i) {
+                if (out_names[i].length() == 0) {
+                    out_files.emplace_back(new std::ofstream());
+                    so.push_back(false);
+                    continue;
+                }
+                //std::ofstream *file_out = new std::ofstream(out_names[i], std::ios_base::out | std::ios_base::binary);
+                std::shared_ptr <std::ofstream> file_out(
+                        new std::ofstream(out_names[i], std::ios_base::out | std::ios_base::binary));
+
+                if (!(*file_out)) {
+                    throw std::runtime_error(
+                            "ERROR: Could not open output file " + out_names[i] + "\nCheck file and folder permissions.");
+                }
+                std::unique_ptr <BI::filtering_ostream> out(new BI::filtering_ostream);
+                if (BF::extension(BF::path(out_names[i])) == ".gz") {
+                    // compress using gzip if requested
+                    out->push(BI::gzip_compressor());
+                }
+                out->push((*file_out));
+                out_files.push_back(file_out);
+                so.push_back(true);
+            }
+
+            if (so[1]) { *out_files[1] << mc.printHeader(); }
+        }
+
+        /**
+         * @brief Add a single processed read to counts.
+         */
+        void add(const int mapping_category,
+                 const int primer_pair,
+                 const int left_target_pos,
+                 const int right_target_pos,
+                 const std::vector<bool> &mapping_depth,
+                 const std::vector<bool> &local_effective_depth,
+                 const std::vector<bool> &local_effective_count,
+                 const std::vector<Mutation> &processed_mutations) {
+            if (so[0]) { vc.updateRightBound(right_target_pos); }
+            if (so[1]) { mc.updateRightBound(right_target_pos); }
+
+            if (input_is_sorted) {
+                // use less memory if the input file is sorted. Print and remove counts to
+                // the left of the current read
+                if (so[0]) { *out_files[0] << vc.updateLeftBound(left_target_pos); }
+                if (so[1]) { *out_files[1] << mc.updateLeftBound(left_target_pos); }
+            }
+
+            if (so[0]) {
+                vc.updateCounts(processed_mutations,
+                                local_effective_depth,
+                                local_effective_count,
+                                left_target_pos);
+            }
+            if (so[1]) {
+                mc.updateCounts(processed_mutations,
+                                mapping_category,
+                                primer_pair,
+                                mapping_depth,
+                                local_effective_depth,
+                                local_effective_count,
+                                left_target_pos,
+                                separate_ambig_counts,
+                                debug);
+            }
+        }
+
+        /**
+         * @brief Write all remaining counts.
+         *
+         * @param seq_len  Length of reference sequence. Ignored if 0.
+         * @param hist     Print read length and mutations per read histograms
+         *                 to stdout.
+         */
+        void finish(const int seq_len,
+                    const bool hist) {
+            // update right end to last nucleotide in sequence
+            // (ensures that output files will have the correct
+            //  number of lines even if there are no reads that cover
+            //  the 3-prime end of the sequence).
+            if (seq_len>0) {
+                // (bounds are given in 0-based coordinates)
+                if (so[0]) { vc.updateRightBound(seq_len-1); }
+                if (so[1]) { mc.updateRightBound(seq_len-1); }
+            }
+
+            // print any remaining values in each deque
+            if (so[0]) { *out_files[0] << vc.printAllValues(); }
+            if (so[1]) { *out_files[1] << mc.printAllValues(); }
+
+            // write read length and mutations per read histograms
+            // TODO: make separate output files for these tables
+            if (hist) {
+                std::cout << mc.printHistograms();
+            }
+        }
+
+    private:
+        VariantCounter vc;
+        MutationCounter mc;
+        std::vector<bool> so;
+        std::vector <std::shared_ptr<std::ofstream>> out_files;
+        bool input_is_sorted;
+        bool separate_ambig_counts;
+        bool debug;
+    };
+
+
     /**
      * @brief Count sequencing depth, variants, and/or mutations from parsed mutations.
      *
@@ -56,29 +207,6 @@ namespace mutation_counter {
                        const bool separate_ambig_counts,
                        bool debug,
                        bool warn_on_no_mapped = false) {
-        // set selected output columns (this is a global from MutationCounter.h)
-        std::vector<std::string> new_column_names;
-        for (std::vector<std::string>::iterator it = column_names.begin();
-             it != column_names.end();
-             ++it) {
-            new_column_names.push_back((*it));
-            if (separate_ambig_counts){
-                new_column_names.push_back((*it)+"_ambig");
-            }
-        }
-        new_column_names.push_back("read_depth");
-        new_column_names.push_back("effective_depth");
-        new_column_names.push_back("off_target_mapped_depth");
-        new_column_names.push_back("low_mapq_mapped_depth");
-        if (primer_pairs > 0) {
-            for (int i=1; i<=primer_pairs; i++){
-                new_column_names.push_back("primer_pair_"+std::to_string(i)+"_mapped_depth");
-            }
-        } else {
-            new_column_names.push_back("mapped_depth");
-        }
-        column_names = new_column_names;
-
         // ------------------------------------------------------------------------------
         // open input files, do some checks, set up streams
 
@@ -120,43 +248,12 @@ namespace mutation_counter {
 
         }
 
-        // ------------------------------------------------------------------------------
-        // open output files, set up streams
-
-        std::vector<bool> so;
-        std::vector <std::string> out_names = {variant_out,
-                                               count_out};
-        std::vector <std::shared_ptr<std::ofstream>> out_files;
-        for (int i = 0; i < out_names.size(); ++i) {
-            if (out_names[i].length() == 0) {
-                out_files.emplace_back(new std::ofstream());
-                so.push_back(false);
-                continue;
-            }
-            //std::ofstream *file_out = new std::ofstream(out_names[i], std::ios_base::out | std::ios_base::binary);
-            std::shared_ptr <std::ofstream> file_out(
-                    new std::ofstream(out_names[i], std::ios_base::out | std::ios_base::binary));
-
-            if (!(*file_out)) {
-                throw std::runtime_error(
-                        "ERROR: Could not open output file " + out_names[i] + "\nCheck file and folder permissions.");
-            }
-            std::unique_ptr <BI::filtering_ostream> out(new BI::filtering_ostream);
-            if (BF::extension(BF::path(out_names[i])) == ".gz") {
-                // compress using gzip if requested
-                out->push(BI::gzip_compressor());
-            }
-            out->push((*file_out));
-            out_files.push_back(file_out);
-            so.push_back(true);
-        }
-        
-        // ---------------------------------------------------------------------------
-    
-        VariantCounter vc;
-        MutationCounter mc;
-
-        if (so[1]) { *out_files[1] << mc.printHeader(); }
+        CountWriter counts(primer_pairs,
+                           variant_out,
+                           count_out,
+                           input_is_sorted,
+                           separate_ambig_counts,
+                           debug);
 
         std::string line;
 
@@ -215,33 +312,14 @@ namespace mutation_counter {
                 if(debug) { std::cout << "local_effective_count: " << util::toString(local_effective_count) << std::endl << std::flush; }
                 if(debug) { std::cout << "mutations: " << toString(processed_mutations) << std::endl << std::flush; }
 
-                if (so[0]) { vc.updateRightBound(right_target_pos); }
-                if (so[1]) { mc.updateRightBound(right_target_pos); }
-
-                if (input_is_sorted) {
-                    // use less memory if the input file is sorted. Print and remove counts to
-                    // the left of the current read
-                    if (so[0]) { *out_files[0] << vc.updateLeftBound(left_target_pos); }
-                    if (so[1]) { *out_files[1] << mc.updateLeftBound(left_target_pos); }
-                }
-
-                if (so[0]) {
-                    vc.updateCounts(processed_mutations,
-                                    local_effective_depth,
-                                    local_effective_count,
-                                    left_target_pos);
-                }
-                if (so[1]) {
-                    mc.updateCounts(processed_mutations,
-                                    mapping_category,
-                                    primer_pair,
-                                    mapping_depth,
-                                    local_effective_depth,
-                                    local_effective_count,
-                                    left_target_pos,
-                                    separate_ambig_counts,
-                                    debug);
-                }
+                counts.add(mapping_category,
+                           primer_pair,
+                           left_target_pos,
+                           right_target_pos,
+                           mapping_depth,
+                           local_effective_depth,
+                           local_effective_count,
+                           processed_mutations);
 
                 /*if (count%100000==0){
                     std::cout << "Counted "<<count<<" reads" <<std::endl;
@@ -258,25 +336,7 @@ namespace mutation_counter {
             }
         }
 
-        // update right end to last nucleotide in sequence
-        // (ensures that output files will have the correct
-        //  number of lines even if there are no reads that cover
-        //  the 3-prime end of the sequence).
-        if (seq_len>0) {
-            // (bounds are given in 0-based coordinates)
-            if (so[0]) { vc.updateRightBound(seq_len-1); }
-            if (so[1]) { mc.updateRightBound(seq_len-1); }
-        }
-
-        // print any remaining values in each deque
-        if (so[0]) { *out_files[0] << vc.printAllValues(); }
-        if (so[1]) { *out_files[1] << mc.printAllValues(); }
-
-        // write read length and mutations per read histograms
-        // TODO: make separate output files for these tables
-        if (hist) {
-            std::cout << mc.printHistograms();
-        }
+        counts.finish(seq_len, hist);
     }
 
 
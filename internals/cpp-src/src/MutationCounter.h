@@ -242,7 +242,13 @@ public:
 
         // update mutation counts
         for (auto mut : mutations) {
+            // mutations read back from parsed text carry "_ambig" in the
+            // tag, while mutations passed directly from the parser
+            // (see mutation_parser_counter::parseAndCount()) only set ambig
             std::string s = mut.tag;
+            if (mut.ambig) {
+                s += "_ambig";
+            }
 
             // strip _ambig from mutation tag if we don't want to separate these
             if (not separate_ambig_counts) {
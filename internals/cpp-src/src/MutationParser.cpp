@@ -20,6 +20,9 @@ namespace mutation_parser {
      *        and merge ambiguously aligned indels with alternate placements.
      *
      * @param fields Single SAM alignment, already split by tab character into vector
+     * @param reference_seqs
+     *               Target sequences by name (see detail::loadReferenceSeqs()). Only
+     *               needed if the alignment has no MD tag.
      * @return Returns the information needed to count RT mutations and depths or
      * count variants: Left-most position in alignment target sequence (0-based),
      * right-most position (0-based), reconstructed target sequence over this range,
@@ -29,7 +32,8 @@ namespace mutation_parser {
     Read
     parseSamFields(const std::vector <std::string> &fields,
                    const int min_mapq,
-                   const bool input_is_unpaired) {
+                   const bool input_is_unpaired,
+                   const std::map<std::string, std::string> &reference_seqs = std::map<std::string, std::string>()) {
         // TODO: add tests for reads mapped in the reverse sense
 
         if (fields.size() < 11) {
@@ -71,7 +75,20 @@ namespace mutation_parser {
         const std::string tag = "MD";
         std::string md_tag_contents;
         if (!detail::getSamTag(fields, tag, md_tag_contents)) {
-            throw std::runtime_error("Error: no MD tag in alignment.");
+            // aligner was run without MD output (e.g. STAR), so rebuild
+            // the tag from the CIGAR string and target sequence
+            if (reference_seqs.empty()) {
+                throw std::runtime_error("Error: no MD tag in alignment.");
+            }
+            auto it = reference_seqs.find(fields[2]);
+            if (it == reference_seqs.end()) {
+                throw std::runtime_error("Error: no MD tag in alignment, and target "
+                                         + fields[2] + " not found in reference sequences.");
+            }
+            md_tag_contents = detail::calcMDtag(left_target_pos,
+                                                query_bases,
+                                                cigar_data,
+                                                it->second);
         }
 
         if (debug_out) {
@@ -129,14 +146,15 @@ namespace mutation_parser {
     Read
     parseSamLine(const std::string &line,
                  const int min_mapq,
-                 const bool input_is_unpaired) {
+                 const bool input_is_unpaired,
+                 const std::map<std::string, std::string> &reference_seqs = std::map<std::string, std::string>()) {
 
         // split into fields
         std::vector <std::string> fields;
         std::string trimmed = boost::trim_copy(line);
         boost::split(fields, trimmed, boost::is_any_of("\t"), boost::token_compress_off);
 
-        return parseSamFields(fields, min_mapq, input_is_unpaired);
+        return parseSamFields(fields, min_mapq, input_is_unpaired, reference_seqs);
     }
 
     boost::tuple<int, int>
@@ -327,7 +345,11 @@ namespace mutation_parser {
         return off_target;
     }
 
-    std::string
+    /**
+     * @brief Parse a single read (merged, unpaired, or paired but missing mate)
+     *        and append processed reads (if any) to processed.
+     */
+    void
     parseUnpairedRead(const std::string &line,
                       const int min_mapq,
                       const bool right_align_ambig_dels,
@@ -342,7 +364,9 @@ namespace mutation_parser {
                       const bool require_forward_primer_mapped,
                       const bool require_reverse_primer_mapped,
                       const int max_primer_offset,
-                      const bool debug) {
+                      const bool debug,
+                      const std::map<std::string, std::string> &reference_seqs,
+                      std::vector <Read> &processed) {
         // parse single read (merged, unpaired, or paired but missing mate)
 
         if (debug_out) {
@@ -356,16 +380,17 @@ namespace mutation_parser {
         }
 
 
-        Read read = parseSamLine(line, min_mapq, false);
+        Read read = parseSamLine(line, min_mapq, false, reference_seqs);
 
         // skip unmapped reads
         if (read.mapping_category == UNMAPPED) {
-            return "";
+            return;
         }
 
         // skip reads below mapping quality threshold
         if (read.mapping_category == LOW_MAPQ) {
-            return read.serializeMutations();
+            processed.push_back(read);
+            return;
         }
 
         int fw_primer_index, rv_primer_index;
@@ -405,7 +430,8 @@ namespace mutation_parser {
         }*/
         if (off_target) {
             read.setMappingCategory(OFF_TARGET);
-            return read.serializeMutations();
+            processed.push_back(read);
+            return;
         }
 
         int primer_index = std::max(fw_primer_index,
@@ -455,14 +481,67 @@ namespace mutation_parser {
                 .setPrimerPair(read.primer_pair);
         // Note: using primer pair matched within +/- max_primer_offset,
         //       not relaxed overlap search only used for trimming in rare cases
-        std::string s = processed_read.serializeMutations();
         if (debug) {
-            std::cout << "processed_read.serializeMutations(): " << s << "\n" << std::flush;
+            std::cout << "processed_read.serializeMutations(): " << processed_read.serializeMutations() << "\n" << std::flush;
+        }
+        processed.push_back(processed_read);
+    }
+
+    std::string
+    serializeReads(const std::vector <Read> &reads) {
+        std::string s = "";
+        for (auto &r : reads) {
+            s += r.serializeMutations();
         }
         return s;
     }
 
+    /**
+     * @brief Parse a single read into a serialized string of processed reads.
+     */
     std::string
+    parseUnpairedRead(const std::string &line,
+                      const int min_mapq,
+                      const bool right_align_ambig_dels,
+                      const bool right_align_ambig_ins,
+                      const int max_internal_match,
+                      const int min_qual,
+                      const int exclude_3prime,
+                      const std::string &mutation_type,
+                      const bool variant_mode,
+                      const std::vector <PrimerPair> &primer_pairs,
+                      const bool trim_primers,
+                      const bool require_forward_primer_mapped,
+                      const bool require_reverse_primer_mapped,
+                      const int max_primer_offset,
+                      const bool debug,
+                      const std::map<std::string, std::string> &reference_seqs = std::map<std::string, std::string>()) {
+        std::vector <Read> processed;
+        parseUnpairedRead(line,
+                          min_mapq,
+                          right_align_ambig_dels,
+                          right_align_ambig_ins,
+                          max_internal_match,
+                          min_qual,
+                          exclude_3prime,
+                          mutation_type,
+                          variant_mode,
+                          primer_pairs,
+                          trim_primers,
+                          require_forward_primer_mapped,
+                          require_reverse_primer_mapped,
+                          max_primer_offset,
+                          debug,
+                          reference_seqs,
+                          processed);
+        return serializeReads(processed);
+    }
+
+    /**
+     * @brief Parse a pair of reads R1 and R2 and append processed reads
+     *        (if any) to processed.
+     */
+    void
     parsePairedReads(const std::vector <std::string> &lines,
                      const int max_paired_fragment_length,
                      const int min_mapq,
@@ -478,7 +557,9 @@ namespace mutation_parser {
                      const bool require_forward_primer_mapped,
                      const bool require_reverse_primer_mapped,
                      const int max_primer_offset,
-                     const bool debug) {
+                     const bool debug,
+                     const std::map<std::string, std::string> &reference_seqs,
+                     std::vector <Read> &processed) {
         if (debug_out) {
             debug_out << "[separator] ##############################################################################\n"
             << std::flush;
@@ -489,14 +570,14 @@ namespace mutation_parser {
         }
 
         // parse group of two reads R1 and R2
-        std::string s = "";
         bool concordant = true;
         std::vector <Read> reads;
 
         for (int i = 0; i < 2; i++) {
             Read read = parseSamLine(lines[i],
                                      min_mapq,
-                                     true);
+                                     true,
+                                     reference_seqs);
             reads.push_back(read);
         }
 
@@ -508,7 +589,7 @@ namespace mutation_parser {
 
         if (reads[R1].mapping_category == UNMAPPED and
             reads[R2].mapping_category == UNMAPPED) {
-            return "";
+            return;
         }
 
         int fw_read_index = R1;
@@ -543,7 +624,8 @@ namespace mutation_parser {
             if (debug) {
                 std::cout << "returned from margeMatePairsSimple()\n" << std::flush;
             }
-            return simple_merged.serializeMutations();
+            processed.push_back(simple_merged);
+            return;
         } else {
             int included_count = 0;
             for (int i = 0; i < 2; i++) {
@@ -594,7 +676,8 @@ namespace mutation_parser {
             if (off_target) {
                 Read simple_merged = mergeMatePairsSimple(reads);
                 simple_merged.setMappingCategory(OFF_TARGET);
-                return simple_merged.serializeMutations();
+                processed.push_back(simple_merged);
+                return;
             }
 
             int primer_index = std::max(fw_primer_index,
@@ -699,7 +782,7 @@ namespace mutation_parser {
 
             //if (debug_out) { debug_out << "[separator]\n"; }
             processed_read.setReadType(PAIRED);
-            s += processed_read.serializeMutations();
+            processed.push_back(processed_read);
 
         } else {
             // paired reads mapped separately
@@ -716,7 +799,7 @@ namespace mutation_parser {
                 }
 
                 if (reads[i].mapping_category != INCLUDED) {
-                    s += reads[i].serializeMutations();
+                    processed.push_back(reads[i]);
                     continue;
                 }
 
@@ -736,10 +819,52 @@ namespace mutation_parser {
                                          matching_primer_pairs[i],
                                          debug);
 
-                s += processed_read.serializeMutations();
+                processed.push_back(processed_read);
             }
         }
-        return s;
+    }
+
+    /**
+     * @brief Parse a pair of reads into a serialized string of processed reads.
+     */
+    std::string
+    parsePairedReads(const std::vector <std::string> &lines,
+                     const int max_paired_fragment_length,
+                     const int min_mapq,
+                     const bool right_align_ambig_dels,
+                     const bool right_align_ambig_ins,
+                     const int max_internal_match,
+                     const int min_qual,
+                     const int exclude_3prime,
+                     const std::string &mutation_type,
+                     const bool variant_mode,
+                     const std::vector <PrimerPair> &primer_pairs,
+                     const bool trim_primers,
+                     const bool require_forward_primer_mapped,
+                     const bool require_reverse_primer_mapped,
+                     const int max_primer_offset,
+                     const bool debug,
+                     const std::map<std::string, std::string> &reference_seqs = std::map<std::string, std::string>()) {
+        std::vector <Read> processed;
+        parsePairedReads(lines,
+                         max_paired_fragment_length,
+                         min_mapq,
+                         right_align_ambig_dels,
+                         right_align_ambig_ins,
+                         max_internal_match,
+                         min_qual,
+                         exclude_3prime,
+                         mutation_type,
+                         variant_mode,
+                         primer_pairs,
+                         trim_primers,
+                         require_forward_primer_mapped,
+                         require_reverse_primer_mapped,
+                         max_primer_offset,
+                         debug,
+                         reference_seqs,
+                         processed);
+        return serializeReads(processed);
     }
 
     // FIXME: just make a class to pass these names around
@@ -790,53 +915,43 @@ namespace mutation_parser {
 
     /**
      * @brief Parse mutations and reconstruct target sequences for mapped reads in
-     *        a given SAM file. Process mutations to ... FIXME: complete description
-     *
-     * @param paired          Parse SAM file as pairs of R1,R2 reads
-     * @param min_mapq
-     *                        Minimum mapping quality to include read
-
-     * @param right_align_ambig_dels
-     *                        Realign ambiguously placed deletions to their rightmost
-     *                        valid position if true, leftmost if false.
-     * @param right_align_ambig_ins
-     *                        Realign ambiguously placed insertions to their rightmost
-     *                        valid position if true, leftmost if false.
-     * @param max_internal_match
-     *                        Combine nearby mutations separated by up to this many
-     *                        unchanged reference nucleotides.
-     * @param min_qual        Minimum basecall quality Phred score to allow in a mutation
-     *                        before excluding from counting.
-     * @param exclude_3prime  Exclude any mutations overlapping the region within this
-     *                        many nucleotides of the right end of a read.
-     *
+     *        a given SAM file, passing the processed reads from each alignment
+     *        (or pair of alignments) to handle_reads(). Parameters are as for
+     *        parseSAM().
      */
-    void parseSAM(const std::string &filename,
-                  const std::string &outname,
-                  const std::string &debug_outname,
-                  const std::string &primers_filename,
-                  const int max_paired_fragment_length,
-                  const unsigned int min_mapq,
-                  const bool right_align_ambig_dels,
-                  const bool right_align_ambig_ins,
-                  const int max_internal_match,
-                  const int min_qual,
-                  const int exclude_3prime,
-                  const std::string mutation_type,
-                  const bool variant_mode,
-                  const bool trim_primers,
-                  const bool require_forward_primer_mapped,
-                  const bool require_reverse_primer_mapped,
-                  const int max_primer_offset,
-                  const bool input_is_unpaired,
-                  const bool debug,
-                  const bool warn_on_no_mapped = false) {
+    template<typename ReadHandler>
+    void parseSAMReads(const std::string &filename,
+                       const std::string &debug_outname,
+                       const std::string &primers_filename,
+                       const int max_paired_fragment_length,
+                       const unsigned int min_mapq,
+                       const bool right_align_ambig_dels,
+                       const bool right_align_ambig_ins,
+                       const int max_internal_match,
+                       const int min_qual,
+                       const int exclude_3prime,
+                       const std::string mutation_type,
+                       const bool variant_mode,
+                       const bool trim_primers,
+                       const bool require_forward_primer_mapped,
+                       const bool require_reverse_primer_mapped,
+                       const int max_primer_offset,
+                       const bool input_is_unpaired,
+                       const bool debug,
+                       const bool warn_on_no_mapped,
+                       const std::string &reference_filename,
+                       ReadHandler handle_reads) {
 
         std::vector <PrimerPair> primer_pairs;
         if (primers_filename != "") {
             primer_pairs = loadPrimerPairs(primers_filename);
         }
 
+        std::map<std::string, std::string> reference_seqs;
+        if (reference_filename != "") {
+            reference_seqs = detail::loadReferenceSeqs(reference_filename);
+        }
+
         try {
             int file_size = BF::file_size(filename);
             if (file_size == 0) {
@@ -865,19 +980,6 @@ namespace mutation_parser {
         }
         in.push(file_in);
 
-        std::ofstream file_out(outname, std::ios_base::out | std::ios_base::binary);
-        if (!file_out) {
-            throw std::runtime_error(
-                    "ERROR: Could not open output file " + outname + "\nCheck file and folder permissions.");
-        }
-
-        BI::filtering_ostream out;
-        if (BF::extension(BF::path(outname)) == ".gz") {
-            // compress using gzip if requested
-            out.push(BI::gzip_compressor());
-        }
-        out.push(file_out);
-
         // init debug_out if filename provided
         if (debug_outname.size() > 0) {
             mutation::debug_out.open(debug_outname, std::ios_base::out | std::ios_base::binary);
@@ -892,6 +994,7 @@ namespace mutation_parser {
         size_t c = 0;
 
         std::vector <std::string> lines; // store R1 as first element and R2 as second element if present
+        std::vector <Read> processed;
         while (std::getline(in, line)) {
             // skip headers
             if (line.length() < 1 or line[0] == '@') {
@@ -945,25 +1048,27 @@ namespace mutation_parser {
                       const bool require_reverse_primer_mapped,
                       const int max_primer_offset,
                      const bool debug*/
-                std::string s = parsePairedReads(lines,
-                                                 max_paired_fragment_length,
-                                                 min_mapq,
-                                                 right_align_ambig_dels,
-                                                 right_align_ambig_ins,
-                                                 max_internal_match,
-                                                 min_qual,
-                                                 exclude_3prime,
-                                                 mutation_type,
-                                                 variant_mode,
-                                                 primer_pairs,
-                                                 trim_primers,
-                                                 require_forward_primer_mapped,
-                                                 require_reverse_primer_mapped,
-                                                 max_primer_offset,
-                                                 debug);
-
-                out << s;
-                out << std::flush; // FIXME: remove if possible?
+                processed.clear();
+                parsePairedReads(lines,
+                                 max_paired_fragment_length,
+                                 min_mapq,
+                                 right_align_ambig_dels,
+                                 right_align_ambig_ins,
+                                 max_internal_match,
+                                 min_qual,
+                                 exclude_3prime,
+                                 mutation_type,
+                                 variant_mode,
+                                 primer_pairs,
+                                 trim_primers,
+                                 require_forward_primer_mapped,
+                                 require_reverse_primer_mapped,
+                                 max_primer_offset,
+                                 debug,
+                                 reference_seqs,
+                                 processed);
+
+                handle_reads(processed);
                 c++; // FIXME: don't increment for unmapped reads
                 lines.clear();
             } else {
@@ -987,31 +1092,31 @@ namespace mutation_parser {
                       const bool require_reverse_primer_mapped,
                       const int max_primer_offset,
                       const bool debug*/
-                std::string s = parseUnpairedRead(lines[0],
-                                                  min_mapq,
-                                                  right_align_ambig_dels,
-                                                  right_align_ambig_ins,
-                                                  max_internal_match,
-                                                  min_qual,
-                                                  exclude_3prime,
-                                                  mutation_type,
-                                                  variant_mode,
-                                                  primer_pairs,
-                                                  trim_primers,
-                                                  require_forward_primer_mapped,
-                                                  require_reverse_primer_mapped,
-                                                  max_primer_offset,
-                                                  debug);
-
-                out << s;
-                out << std::flush; // FIXME: remove if possible
+                processed.clear();
+                parseUnpairedRead(lines[0],
+                                  min_mapq,
+                                  right_align_ambig_dels,
+                                  right_align_ambig_ins,
+                                  max_internal_match,
+                                  min_qual,
+                                  exclude_3prime,
+                                  mutation_type,
+                                  variant_mode,
+                                  primer_pairs,
+                                  trim_primers,
+                                  require_forward_primer_mapped,
+                                  require_reverse_primer_mapped,
+                                  max_primer_offset,
+                                  debug,
+                                  reference_seqs,
+                                  processed);
+
+                handle_reads(processed);
                 c++;
                 lines.clear();
             }
         }
 
-        out << std::flush;
-
         if (c < 1) {
             if (warn_on_no_mapped) {
                 std::cout << "WARNING: Input file " + filename + " contains no mapped reads." << std::endl;
@@ -1019,7 +1124,97 @@ namespace mutation_parser {
                 throw std::runtime_error("ERROR: Input file " + filename + " contains no mapped reads.");
             }
         }
+    }
+
+
+    /**
+     * @brief Parse mutations and reconstruct target sequences for mapped reads in
+     *        a given SAM file. Process mutations to ... FIXME: complete description
+     *
+     * @param paired          Parse SAM file as pairs of R1,R2 reads
+     * @param min_mapq
+     *                        Minimum mapping quality to include read
 
+     * @param right_align_ambig_dels
+     *                        Realign ambiguously placed deletions to their rightmost
+     *                        valid position if true, leftmost if false.
+     * @param right_align_ambig_ins
+     *                        Realign ambiguously placed insertions to their rightmost
+     *                        valid position if true, leftmost if false.
+     * @param max_internal_match
+     *                        Combine nearby mutations separated by up to this many
+     *                        unchanged reference nucleotides.
+     * @param min_qual        Minimum basecall quality Phred score to allow in a mutation
+     *                        before excluding from counting.
+     * @param exclude_3prime  Exclude any mutations overlapping the region within this
+     *                        many nucleotides of the right end of a read.
+     * @param reference_filename
+     *                        Optional FASTA file of alignment targets. If provided,
+     *                        MD tags missing from alignments are reconstructed
+     *                        from the CIGAR string and target sequence.
+     *
+     */
+    void parseSAM(const std::string &filename,
+                  const std::string &outname,
+                  const std::string &debug_outname,
+                  const std::string &primers_filename,
+                  const int max_paired_fragment_length,
+                  const unsigned int min_mapq,
+                  const bool right_align_ambig_dels,
+                  const bool right_align_ambig_ins,
+                  const int max_internal_match,
+                  const int min_qual,
+                  const int exclude_3prime,
+                  const std::string mutation_type,
+                  const bool variant_mode,
+                  const bool trim_primers,
+                  const bool require_forward_primer_mapped,
+                  const bool require_reverse_primer_mapped,
+                  const int max_primer_offset,
+                  const bool input_is_unpaired,
+                  const bool debug,
+                  const bool warn_on_no_mapped = false,
+                  const std::string &reference_filename = "") {
+
+        std::ofstream file_out(outname, std::ios_base::out | std::ios_base::binary);
+        if (!file_out) {
+            throw std::runtime_error(
+                    "ERROR: Could not open output file " + outname + "\nCheck file and folder permissions.");
+        }
+
+        BI::filtering_ostream out;
+        if (BF::extension(BF::path(outname)) == ".gz") {
+            // compress using gzip if requested
+            out.push(BI::gzip_compressor());
+        }
+        out.push(file_out);
+
+        parseSAMReads(filename,
+                      debug_outname,
+                      primers_filename,
+                      max_paired_fragment_length,
+                      min_mapq,
+                      right_align_ambig_dels,
+                      right_align_ambig_ins,
+                      max_internal_match,
+                      min_qual,
+                      exclude_3prime,
+                      mutation_type,
+                      variant_mode,
+                      trim_primers,
+                      require_forward_primer_mapped,
+                      require_reverse_primer_mapped,
+                      max_primer_offset,
+                      input_is_unpaired,
+                      debug,
+                      warn_on_no_mapped,
+                      reference_filename,
+                      [&out](const std::vector <Read> &reads) {
+                          out << serializeReads(reads);
+                          out << std::flush; // FIXME: remove if possible?
+                      });
+
+        out << std::flush;
     }
 
 
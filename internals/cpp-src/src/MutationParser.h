@@ -16,6 +16,7 @@
 #include <fstream>
 #include <stdexcept>
 #include <algorithm>
+#include <map>
 
 #include <boost/tuple/tuple.hpp>
 #include <boost/filesystem.hpp>
@@ -174,6 +175,100 @@ namespace mutation_parser { namespace detail {
         return ops;
     };
 
+    /**
+     * @brief Load target sequences from a FASTA file, used to reconstruct
+     *        MD tags for aligners run without MD output. Sequence names are
+     *        truncated at the first whitespace, matching the RNAME field
+     *        reported by the aligner.
+     *
+     * @return Map of target sequences by name
+     */
+    std::map<std::string, std::string>
+    loadReferenceSeqs(const std::string &filename) {
+        std::ifstream file_in(filename, std::ios_base::in | std::ios_base::binary);
+        if (!file_in) {
+            throw std::runtime_error("ERROR: Could not open reference file " + filename + ".");
+        }
+        std::map<std::string, std::string> reference_seqs;
+        std::string line;
+        std::string *seq = nullptr;
+        while (std::getline(file_in, line)) {
+            if (line.length() > 0 and line.back() == '\r') {
+                line.pop_back();
+            }
+            if (line.length() < 1) {
+                continue;
+            }
+            if (line[0] == '>') {
+                std::string name = line.substr(1, line.find_first_of(" \t") - 1);
+                seq = &reference_seqs[name];
+                seq->clear();
+            } else if (seq != nullptr) {
+                seq->append(line);
+            }
+        }
+        return reference_seqs;
+    }
+
+    /**
+      * @brief Reconstruct an MD tag by walking CIGAR operations against the
+      *        alignment target sequence.
+      *
+      * @param pos         Left-most alignment position in target coordinates (0-based)
+      * @param query_bases Sequence read
+      * @param cigar_data  Parsed CIGAR string
+      * @param target_seq  Full target sequence
+      * @return MD tag contents, in the same format emitted by bowtie2 and STAR
+      *
+      * As in bowtie2 and STAR, an N in the read or target never counts as
+      * a match (not even against another N), and spliced regions ('N' CIGAR
+      * operations) are skipped without breaking a run of matches.
+      */
+    std::string
+    calcMDtag(const int pos,
+              const std::string &query_bases,
+              const std::vector<CigarOp> &cigar_data,
+              const std::string &target_seq) {
+        std::string md;
+        int match_len = 0;
+        size_t q = 0;
+        size_t r = pos;
+        for (auto &c : cigar_data) {
+            if (c.op == 'M' or c.op == '=' or c.op == 'X') {
+                if (q + c.length > query_bases.length() or
+                    r + c.length > target_seq.length()) {
+                    throw std::runtime_error("Error: alignment extends past end of read or reference sequence.");
+                }
+                for (int i = 0; i < c.length; ++i, ++q, ++r) {
+                    char read_base = std::toupper(query_bases[q]);
+                    char target_base = std::toupper(target_seq[r]);
+                    if (read_base == target_base and read_base != 'N') {
+                        ++match_len;
+                    } else {
+                        md += std::to_string(match_len);
+                        md += target_base;
+                        match_len = 0;
+                    }
+                }
+            } else if (c.op == 'D') {
+                if (r + c.length > target_seq.length()) {
+                    throw std::runtime_error("Error: alignment extends past end of reference sequence.");
+                }
+                md += std::to_string(match_len) + '^';
+                for (int i = 0; i < c.length; ++i, ++r) {
+                    md += std::toupper(target_seq[r]);
+                }
+                match_len = 0;
+            } else if (c.op == 'I' or c.op == 'S') {
+                q += c.length;
+            } else if (c.op == 'N') {
+                r += c.length;
+            }
+        }
+        md += std::to_string(match_len);
+        return md;
+    }
+
     /**
       * @brief  Parse a CIGAR string into operations. Only needed if parsing a SAM file.
       *
@@ -0,0 +1,121 @@
+/** @file
+ * @brief Main interface function for parsing mutations from a SAM file and
+ *        counting them in a single pass, without writing an intermediate
+ *        parsed mutations file.
+ */
+
+/*-----------------------------------------------------------------------
+ * This file is a part of ShapeMapper, and is licensed under the terms  *
+ * of the MIT license. Copyright 2018 Steven Busan.                     *
+ *----------------------------------------------------------------------*/
+
+#include "MutationParser.cpp"
+#include "MutationCounter.cpp"
+
+
+namespace mutation_parser_counter {
+    using namespace mutation;
+
+    /**
+     * @brief Parse mutations from mapped reads in a SAM file and count
+     *        sequencing depth, variants, and/or mutations. Equivalent to
+     *        mutation_parser::parseSAM() followed by
+     *        mutation_counter::countSelected(), but processed reads are
+     *        passed directly to the counters instead of being serialized
+     *        to text and parsed again.
+     *
+     * @param seq_len         Length of reference sequence. Ignored if 0.
+     * @param primer_pairs    Number of amplicon primer pairs (if any) used to
+     *                        filter mapped reads.
+     * @param variant_out     Sequence variants and counts output file. Ignored
+     *                        if zero-length.
+     * @param count_out       Mutation counts output file. Ignored if zero-length.
+     * @param hist            Print read length and mutations per read histograms
+     *                        to stdout.
+     * @param separate_ambig_counts
+     *                        Count mutations derived from ambiguously-aligned mutations
+     *                        in separate columns with the additional header "_ambig".
+     *
+     * Other parameters are as for mutation_parser::parseSAM().
+     */
+    void parseAndCount(const std::string &filename,
+                       const std::string &debug_outname,
+                       const std::string &primers_filename,
+                       const int max_paired_fragment_length,
+                       const unsigned int min_mapq,
+                       const bool right_align_ambig_dels,
+                       const bool right_align_ambig_ins,
+                       const int max_internal_match,
+                       const int min_qual,
+                       const int exclude_3prime,
+                       const std::string mutation_type,
+                       const bool variant_mode,
+                       const bool trim_primers,
+                       const bool require_forward_primer_mapped,
+                       const bool require_reverse_primer_mapped,
+                       const int max_primer_offset,
+                       const bool input_is_unpaired,
+                       const int seq_len,
+                       const int primer_pairs,
+                       const std::string &variant_out,
+                       const std::string &count_out,
+                       const bool hist,
+                       const bool separate_ambig_counts,
+                       const bool debug,
+                       const bool warn_on_no_mapped = false,
+                       const std::string &reference_filename = "") {
+
+        mutation_counter::CountWriter counts(primer_pairs,
+                                             variant_out,
+                                             count_out,
+                                             false,
+                                             separate_ambig_counts,
+                                             debug);
+
+        size_t count = 0;
+        mutation_parser::parseSAMReads(filename,
+                                       debug_outname,
+                                       primers_filename,
+                                       max_paired_fragment_length,
+                                       min_mapq,
+                                       right_align_ambig_dels,
+                                       right_align_ambig_ins,
+                                       max_internal_match,
+                                       min_qual,
+                                       exclude_3prime,
+                                       mutation_type,
+                                       variant_mode,
+                                       trim_primers,
+                                       require_forward_primer_mapped,
+                                       require_reverse_primer_mapped,
+                                       max_primer_offset,
+                                       input_is_unpaired,
+                                       debug,
+                                       warn_on_no_mapped,
+                                       reference_filename,
+                                       [&counts, &count](const std::vector <Read> &reads) {
+                                           for (auto &r : reads) {
+                                               count += 1;
+                                               counts.add(r.mapping_category,
+                                                          r.primer_pair,
+                                                          r.left,
+                                                          r.right,
+                                                          r.mapped_depth,
+                                                          r.depth,
+                                                          r.count,
+                                                          r.mutations);
+                                           }
+                                       });
+
+        if (count < 1) {
+            if (warn_on_no_mapped) {
+                std::cout << "WARNING: No reads were found in the input file." << std::endl;
+            } else {
+                throw std::runtime_error("ERROR: Input file contained no reads.");
+            }
+        }
+
+        counts.finish(seq_len, hist);
+    }
+
+}
@@ -0,0 +1,261 @@
+/** @file
+ * @brief Parse mapped SAM alignments into mutations and count sequencing
+ *        depth, sequence variants, and/or reverse transcription mutations
+ *        in a single process. Commandline executable.
+ */
+
+/*-----------------------------------------------------------------------
+ * This file is a part of ShapeMapper, and is licensed under the terms  *
+ * of the MIT license. Copyright 2018 Steven Busan.                     *
+ *----------------------------------------------------------------------*/
+
+#include <boost/program_options.hpp>
+#include <boost/algorithm/string.hpp>
+#include <boost/algorithm/string/predicate.hpp>
+
+#include "MutationParserCounter.cpp"
+
+
+namespace po = boost::program_options;
+namespace BA = boost::algorithm;
+
+int main(int argc, char *argv[]) {
+    try {
+        std::string in;
+        std::string debug_out;
+        std::string primers;
+        std::string reference;
+        bool input_is_unpaired;
+        int max_paired_fragment_length;
+        int min_mapq;
+        int exclude_3prime;
+        bool right_align_ambig_dels;
+        bool right_align_ambig_ins;
+        int max_internal_match;
+        int min_qual;
+        std::string use_only_mutation_type;
+        bool variant_mode;
+        bool trim_primers;
+        bool require_forward_primer_mapped;
+        bool require_reverse_primer_mapped;
+        int max_primer_offset;
+        int length;
+        int primer_pairs;
+        std::string variant_out;
+        std::string count_out;
+        bool hist;
+        bool separate_ambig_counts;
+        bool debug;
+        bool warn_on_no_mapped;
+
+        po::options_description desc("Usage");
+        desc.add_options()
+            ("help,h", "print usage message")
+
+            ("in,i", po::value<std::string>(&in)->required(), "SAM input file path")
+
+            ("debug_out,d", po::value<std::string>(&debug_out)->default_value(""), "intermediate debug info file path")
+
+            ("max_paired_fragment_length",
+             po::value<int>(&max_paired_fragment_length)->default_value(800),
+             "analogous to bowtie2's --maxins param. Paired reads mapping to a fragment size above this threshold will "
+             "be treated as separate reads.")
+
+            ("min_mapq,m",
+             po::value<int>(&min_mapq)->default_value(30),
+             "minimum reported mapping quality to allow")
+
+            ("exclude_3prime", po::value<int>(&exclude_3prime)->default_value(0),
+             "exclude mutations occurring within this many nucleotides of 3-prime end of read")
+
+            ("input_is_unpaired", po::bool_switch(&input_is_unpaired)->default_value(false),
+            "specify that reads are unpaired (as opposed to paired and/or unmerged paired reads)")
+
+            ("primers", po::value<std::string>(&primers)->default_value(""),
+            "")
+            ("reference", po::value<std::string>(&reference)->default_value(""),
+            "FASTA file of alignment targets, used to reconstruct MD tags if not present in alignments")
+            ("trim_primers", po::bool_switch(&trim_primers)->default_value(false),
+            "")
+            ("require_forward_primer_mapped", po::bool_switch(&require_forward_primer_mapped)->default_value(false),
+            "")
+            ("require_reverse_primer_mapped", po::bool_switch(&require_reverse_primer_mapped)->default_value(false),
+            "")
+            ("max_primer_offset", po::value<int>(&max_primer_offset)->default_value(0),
+            "")
+
+            ("right_align_ambig_dels", po::bool_switch(&right_align_ambig_dels)->default_value(false),
+             "realign ambiguously aligned deletions to right end (not recommended), otherwise realign left")
+
+            ("right_align_ambig_ins", po::bool_switch(&right_align_ambig_ins)->default_value(false),
+             "realign ambiguously aligned insertions to right end (not recommended), otherwise realign left")
+
+            ("max_internal_match", po::value<int>(&max_internal_match)->default_value(7),
+             "allow up to N unchanged reference sequence nucs between merged mutations")
+
+            ("min_qual", po::value<int>(&min_qual)->default_value(30),
+             "Exclude mutations that contain or are adjacent to any basecalls with Phred quality scores below this value. This filter is also applied to the calculation of the effective read depth.")
+
+            ("use_only_mutation_type", po::value<std::string>(&use_only_mutation_type)->default_value(""),
+             "use only mutations from a specific mutation class (not recommended). Possible values: mismatch gap insert gap_multi insert_multi complex")
+
+            ("variant_mode",  po::bool_switch(&variant_mode)->default_value(false),
+            "If true, nearby mutation merging and ambiguous mutation realignment steps will not be performed. Used by shapemapper to simplify sequence variant detection, i.e. SNP calling.")
+
+            ("length,n", po::value<int>(&length)->default_value(0),
+             "length of reference sequence. If provided, output files are guaranteed to have this many lines even if there are regions of no read coverage.")
+
+            ("n_primer_pairs,p", po::value<int>(&primer_pairs)->default_value(0),
+             "number of primer pairs (if any) used for read mapping location filtering. If provided, read mapping depth columns will be split up by amplicon.")
+
+            ("variant_out", po::value<std::string>(&variant_out)->default_value(""),
+             "sequence variant counts output file path")
+
+            ("count_out,c", po::value<std::string>(&count_out)->default_value(""), "mutation counts output file path")
+
+            ("hist", po::bool_switch(&hist)->default_value(false), "output read length and mutation frequency histogram tables")
+
+            ("separate_ambig_counts", po::bool_switch(&separate_ambig_counts)->default_value(false),
+             "output ambiguously aligned derived mutation counts in separate columns")
+
+            ("debug", po::bool_switch(&debug)->default_value(false),
+            "print debugging information")
+
+            ("warn_on_no_mapped,w",
+              po::bool_switch(&warn_on_no_mapped)->default_value(false),
+              "exit with warning instead of error if no mapped reads present in input")
+             ;
+
+        po::variables_map vm;
+
+        try {
+
+            po::store(po::parse_command_line(argc, argv, desc), vm);
+
+            if (vm.count("help") or argc == 1) {
+                std::cout << desc << std::endl;
+                return 0; //SUCCESS
+            }
+            po::notify(vm);
+        }
+        catch (const po::error &e) {
+            std::cerr << "ERROR: " << e.what() << "\n" << std::endl;
+            std::cerr << desc << std::endl;
+            return 1; //FAILURE
+        }
+        catch (const std::exception &e) {
+            std::cerr << "ERROR: " << e.what() << "\n" << std::endl;
+            return 1;
+        }
+
+        // check extension to determine if this is a SAM file
+        std::string infile = BA::to_lower_copy(in);
+        if (not (BA::ends_with(infile, ".sam") or
+                 BA::ends_with(infile, ".sam.gz"))) {
+            std::cerr << "Unable to determine file type of "
+            << in << std::endl
+            << "Recognized extensions are .sam, and .sam.gz"
+            << " (capitalization not important)."
+            << std::endl;
+            return 1;
+        }
+
+        if ((variant_out + count_out).length() == 0) {
+            std::cerr << "ERROR: must include at least one output file.\n";
+            std::cerr << desc << std::endl;
+            return 1;
+        }
+
+        // don't allow negative parameters (won't get checked by base method, since its
+        // params are unsigned
+        if (min_mapq < 0) {
+            throw std::invalid_argument("ERROR: min_mapq must be positive.");
+        }
+
+        std::cout << "Attempting to parse and count mutations from SAM file " << in << std::endl;
+        if (debug_out.size() > 0) {
+            std::cout << "\twriting debug intermediate info to " << debug_out << std::endl;
+        }
+        std::cout << "\tusing min_mapq=" << min_mapq << "." << std::endl;
+
+        std::cout << "\ttreating input reads as ";
+        if (input_is_unpaired) {std::cout << "unpaired reads\n"; }
+        else { std::cout << "merged and/or paired reads\n"; }
+
+        if (trim_primers) {
+            std::cout << "\ttrimming amplicon primers provided in " << primers << "\n";
+        }
+
+        std::cout << "\tsequence variant mode is ";
+        if (variant_mode) { std::cout << "on\n"; }
+        else { std::cout << "off\n"; }
+
+        if (exclude_3prime > 0){
+            std::cout << "\texcluding mutations within " << exclude_3prime << " nucleotides of read 3-prime end\n";
+        }
+        std::cout << "\tmerging adjacent mutations within " << max_internal_match << " nucleotides of each other\n";
+        std::cout << "\texcluding mutations with any basecall q-scores below " << min_qual << "\n";
+
+        if (use_only_mutation_type.length() != 0) {
+            std::cout << "\tusing only mutations of the type: " << use_only_mutation_type << '\n';
+        }
+
+        if (length > 0){
+            std::cout << " with reference sequence length " << length << '\n';
+        }
+        if (primer_pairs > 0) {
+            std::cout << " with " << primer_pairs << " amplicon primer pairs\n";
+        }
+        std::cout << " and write\n";
+        if (variant_out.length() != 0) {
+            std::cout << "\tsequence variants and counts to " << variant_out << '\n';
+        }
+        if (count_out.length() != 0) {
+            std::cout << "\treverse transcription mutation counts to " << count_out << '\n';
+        }
+
+        std::cout << std::flush;
+
+        mutation_parser_counter::parseAndCount(in,
+                                               debug_out,
+                                               primers,
+                                               max_paired_fragment_length,
+                                               min_mapq,
+                                               right_align_ambig_dels,
+                                               right_align_ambig_ins,
+                                               max_internal_match,
+                                               min_qual,
+                                               exclude_3prime,
+                                               use_only_mutation_type,
+                                               variant_mode,
+                                               trim_primers,
+                                               require_forward_primer_mapped,
+                                               require_reverse_primer_mapped,
+                                               max_primer_offset,
+                                               input_is_unpaired,
+                                               length,
+                                               primer_pairs,
+                                               variant_out,
+                                               count_out,
+                                               hist,
+                                               separate_ambig_counts,
+                                               debug,
+                                               warn_on_no_mapped,
+                                               reference);
+
+        std::cout << "... Successfully parsed and counted mutations from file." << std::endl;
+    }
+    catch (const BF::filesystem_error &e) {
+        std::cerr << e.what() << std::endl;
+        return 1;
+    }
+    catch (const std::exception &e) {
+        std::cerr << e.what() << std::endl;
+        return 1; //FAILURE
+    }
+    catch (...) {
+        std::cerr << "Unknown error." << std::endl;
+        return 1;
+    }
+    return 0; //SUCCESS
+}
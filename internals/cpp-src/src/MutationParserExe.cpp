@@ -24,6 +24,7 @@ int main(int argc, char *argv[]) {
         std::string out;
         std::string debug_out;
         std::string primers;
+        std::string reference;
         bool input_is_unpaired;
         int max_paired_fragment_length;
         int min_mapq;
@@ -78,6 +79,8 @@ int main(int argc, char *argv[]) {
 
             ("primers", po::value<std::string>(&primers)->default_value(""),
             "")
+            ("reference", po::value<std::string>(&reference)->default_value(""),
+            "FASTA file of alignment targets, used to reconstruct MD tags if not present in alignments")
             ("trim_primers", po::bool_switch(&trim_primers)->default_value(false),
             "")
             ("require_forward_primer_mapped", po::bool_switch(&require_forward_primer_mapped)->default_value(false),
@@ -237,7 +240,8 @@ int main(int argc, char *argv[]) {
                   const bool require_reverse_primer_mapped,
                   const int max_primer_offset,
                   const bool debug,
-                  const bool warn_on_no_mapped = false*/
+                  const bool warn_on_no_mapped = false,
+                  const std::string &reference_filename = ""*/
             mutation_parser::parseSAM(in,
                                       out,
                                       debug_out,
@@ -257,7 +261,8 @@ int main(int argc, char *argv[]) {
                                       max_primer_offset,
                                       input_is_unpaired,
                                       debug,
-                                      warn_on_no_mapped);
+                                      warn_on_no_mapped,
+                                      reference);
         }
 
         std::cout << "... Successfully parsed mutations from file." << std::endl;
@@ -48,28 +48,41 @@ namespace read_trimmer { namespace detail {
     int locateLowQualityWindow(const std::string &phred_scores,
                                unsigned int window_size,
                                unsigned int min_phred) {
-        std::vector<unsigned int> scores(phred_scores.length());
-        for (int i = 0; i < phred_scores.length(); ++i) {
-            try {
-                scores[i] = charToPhred(phred_scores[i]);
-            } catch (std::invalid_argument) {
-                throw std::invalid_argument(
-                        "ERROR: Phred score string contains whitespace or non-printable characters. Check line endings.");
-            }
+        const unsigned char *q = reinterpret_cast<const unsigned char *>(phred_scores.data());
+        const size_t n = phred_scores.length();
+
+        // check all quality chars are in the printable range for phred 0-93.
+        // No early exit, so the compiler can vectorize this loop.
+        bool out_of_range = false;
+        for (size_t i = 0; i < n; ++i) {
+            out_of_range |= (q[i] < 33) | (q[i] > 126);
         }
-        int low_qual_index = -1;
-        for (int i = 0; i < scores.size() - window_size; i++) {
-            int sum = 0;
-            for (int j = 0; j < window_size; j++) {
-                sum += scores[i + j];
-            }
-            float mean = (float) sum / (float) window_size;
-            if (mean < min_phred) {
-                low_qual_index = i;
-                break;
+        if (out_of_range) {
+            throw std::invalid_argument(
+                    "ERROR: Phred score string contains whitespace or non-printable characters. Check line endings.");
+        }
+        if (n <= window_size) {
+            return -1;
+        }
+
+        // Compare running window sums of raw ASCII values against an
+        // equivalent integer threshold, instead of converting each score
+        // and re-summing each window:
+        //   mean(score) < min_phred  <=>  sum(ascii) < (min_phred + 33) * window_size
+        const unsigned long threshold = (unsigned long) (min_phred + 33) * window_size;
+        unsigned long sum = 0;
+        for (size_t j = 0; j < window_size; ++j) {
+            sum += q[j];
+        }
+        // (the final window ending at the last basecall is not checked)
+        for (size_t i = 0; i + window_size < n; ++i) {
+            if (sum < threshold) {
+                return i;
             }
+            sum -= q[i];
+            sum += q[i + window_size];
         }
-        return low_qual_index;
+        return -1;
 
     }
 
@@ -0,0 +1,163 @@
+/** @file
+ * @brief Mix SAM alignment (or FASTQ) streams, skipping header lines. Primary interface functions.
+ */
+
+/*-----------------------------------------------------------------------
+ * This file is a part of ShapeMapper, and is licensed under the terms  *
+ * of the MIT license. Copyright 2018 Steven Busan.                     *
+ *----------------------------------------------------------------------*/
+
+#include "SamMixer.h"
+
+namespace sam_mixer {
+
+    /**
+     * @brief Alternate groups of lines from each input in turn.
+     *        Once an input is exhausted, the remaining inputs continue
+     *        to alternate.
+     */
+    template<typename Grouper>
+    void
+    mixAlternating(std::vector<detail::LineReader> &readers,
+                   int out_fd) {
+        std::vector<Grouper> groupers(readers.size());
+        std::vector<std::string> group;
+        std::vector<bool> more(readers.size(), true);
+        size_t n_active = readers.size();
+        std::string out;
+        out.reserve(SAM_MIXER_BUFFER_SIZE * 2);
+        while (n_active > 0) {
+            for (size_t i = 0; i < readers.size(); ++i) {
+                if (not more[i]) { continue; }
+                more[i] = detail::getGroup(readers[i], groupers[i], group);
+                if (more[i]) {
+                    detail::appendGroup(group, out);
+                } else {
+                    --n_active;
+                }
+            }
+            if (out.length() >= SAM_MIXER_BUFFER_SIZE) {
+                util::writeAll(out_fd, out.data(), out.length());
+                out.clear();
+            }
+        }
+        util::writeAll(out_fd, out.data(), out.length());
+    }
+
+    /**
+     * @brief Copy groups of lines from whichever input has data available,
+     *        so that no upstream process can stall waiting on another.
+     */
+    template<typename Grouper>
+    void
+    mixAnyOrder(std::vector<detail::LineReader> &readers,
+                const std::vector<int> &in_fds,
+                int out_fd) {
+        std::vector<pollfd> fds;
+        for (int fd : in_fds) {
+            fds.push_back(pollfd{fd, POLLIN, 0});
+        }
+        std::vector<Grouper> groupers(readers.size());
+        std::vector<std::string> group;
+        size_t n_active = readers.size();
+        std::string line;
+        std::string out;
+        out.reserve(SAM_MIXER_BUFFER_SIZE * 2);
+        while (n_active > 0) {
+            if (poll(&fds[0], fds.size(), -1) < 0) {
+                if (errno == EINTR) { continue; }
+                throw std::runtime_error("ERROR: poll failed: " + std::string(strerror(errno)));
+            }
+            for (size_t i = 0; i < fds.size(); ++i) {
+                if (fds[i].fd < 0 or fds[i].revents == 0) { continue; }
+                bool more = readers[i].fill();
+                if (not more) {
+                    // pick up any final line without a line ending
+                    while (readers[i].getline(line)) {
+                        if (groupers[i].add(line, group)) {
+                            detail::appendGroup(group, out);
+                        }
+                    }
+                    if (groupers[i].flush(group)) {
+                        detail::appendGroup(group, out);
+                    }
+                    // negative fds are ignored by poll()
+                    fds[i].fd = -1;
+                    --n_active;
+                    continue;
+                }
+                while (readers[i].bufferedLine(line)) {
+                    if (groupers[i].add(line, group)) {
+                        detail::appendGroup(group, out);
+                    }
+                }
+            }
+            if (out.length() >= SAM_MIXER_BUFFER_SIZE) {
+                util::writeAll(out_fd, out.data(), out.length());
+                out.clear();
+            }
+        }
+        util::writeAll(out_fd, out.data(), out.length());
+    }
+
+    /**
+     * @brief Mix alignments from multiple SAM files or named pipes into a
+     *        single output, skipping header lines and keeping mate pairs
+     *        together.
+     *
+     * @param filenames  SAM input paths
+     * @param outname    Output SAM path
+     * @param [any_order]
+     *                   If false, alternate alignment groups from each input
+     *                   in turn. If true, take alignments from whichever input
+     *                   is ready. Use this to recombine the outputs of parallel
+     *                   instances of a process, which may produce records at
+     *                   different rates.
+     * @param [fastq]    Inputs are FASTQ instead of SAM. Consecutive records
+     *                   with the same read name are kept together as a mate pair.
+     */
+    void
+    mixSam(const std::vector<std::string> &filenames,
+           const std::string &outname,
+           const bool any_order = false,
+           const bool fastq = false) {
+        std::vector<int> in_fds;
+        for (auto &filename : filenames) {
+            int fd = open(filename.c_str(), O_RDONLY);
+            if (fd < 0) {
+                for (int f : in_fds) { close(f); }
+                throw std::runtime_error("ERROR: Could not open input file " + filename + ".");
+            }
+            in_fds.push_back(fd);
+        }
+        int out_fd = open(outname.c_str(), O_WRONLY | O_CREAT | O_TRUNC, 0644);
+        if (out_fd < 0) {
+            for (int f : in_fds) { close(f); }
+            throw std::runtime_error(
+                    "ERROR: Could not open output file " + outname + "\nCheck file and folder permissions.");
+        }
+
+        std::vector<detail::LineReader> readers;
+        for (int fd : in_fds) {
+            readers.push_back(detail::LineReader(fd));
+        }
+        try {
+            if (any_order and fastq) {
+                mixAnyOrder<detail::FastqGrouper>(readers, in_fds, out_fd);
+            } else if (any_order) {
+                mixAnyOrder<detail::SamGrouper>(readers, in_fds, out_fd);
+            } else if (fastq) {
+                mixAlternating<detail::FastqGrouper>(readers, out_fd);
+            } else {
+                mixAlternating<detail::SamGrouper>(readers, out_fd);
+            }
+        } catch (...) {
+            for (int f : in_fds) { close(f); }
+            close(out_fd);
+            throw;
+        }
+        for (int f : in_fds) { close(f); }
+        close(out_fd);
+    }
+
+}
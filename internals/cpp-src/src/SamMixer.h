@@ -0,0 +1,255 @@
+/** @file
+ * @brief Mix SAM alignment (or FASTQ) streams, skipping header lines. Utility functions.
+ */
+
+/*-----------------------------------------------------------------------
+ * This file is a part of ShapeMapper, and is licensed under the terms  *
+ * of the MIT license. Copyright 2018 Steven Busan.                     *
+ *----------------------------------------------------------------------*/
+
+#ifndef SHAPEMAPPER_SAMMIXER_H
+#define SHAPEMAPPER_SAMMIXER_H
+
+#include <string>
+#include <vector>
+#include <bitset>
+#include <stdexcept>
+#include <cerrno>
+#include <cstring>
+#include <cstdlib>
+
+#include <fcntl.h>
+#include <poll.h>
+#include <unistd.h>
+
+#include "util.h"
+
+// bytes per read() call, and output buffer flush threshold
+#define SAM_MIXER_BUFFER_SIZE (1 << 20)
+
+namespace sam_mixer { namespace detail {
+
+    /**
+     * Read lines from a file descriptor using large block reads, locating
+     * line ends with memchr() instead of per-character stream reads.
+     */
+    class LineReader {
+    public:
+        LineReader(int fd) : fd(fd), buf(SAM_MIXER_BUFFER_SIZE), start(0), end(0), eof(false) { }
+
+        /**
+         * Get the next complete line already in the buffer, stripped of
+         * line ending. Returns false if no complete line is buffered.
+         */
+        bool bufferedLine(std::string &line) {
+            char *nl = static_cast<char *>(memchr(&buf[0] + start, '\n', end - start));
+            if (nl == NULL) {
+                return false;
+            }
+            size_t len = nl - (&buf[0] + start);
+            line.assign(&buf[0] + start, len);
+            start += len + 1;
+            stripCR(line);
+            return true;
+        }
+
+        /**
+         * Do a single read() into the buffer. Returns false at end of input.
+         */
+        bool fill() {
+            if (start > 0) {
+                memmove(&buf[0], &buf[0] + start, end - start);
+                end -= start;
+                start = 0;
+            }
+            if (end == buf.size()) {
+                // line longer than buffer
+                buf.resize(buf.size() * 2);
+            }
+            while (true) {
+                ssize_t n = read(fd, &buf[0] + end, buf.size() - end);
+                if (n < 0) {
+                    if (errno == EINTR) { continue; }
+                    throw std::runtime_error("ERROR: read failed: " + std::string(strerror(errno)));
+                }
+                if (n == 0) {
+                    eof = true;
+                    return false;
+                }
+                end += n;
+                return true;
+            }
+        }
+
+        /**
+         * Get the next line, stripped of line ending, reading more input
+         * as needed. Returns false at end of input.
+         */
+        bool getline(std::string &line) {
+            while (not bufferedLine(line)) {
+                if (eof or not fill()) {
+                    // last line may not have a line ending
+                    if (start == end) { return false; }
+                    line.assign(&buf[0] + start, end - start);
+                    start = end;
+                    stripCR(line);
+                    return true;
+                }
+            }
+            return true;
+        }
+
+    private:
+        int fd;
+        std::vector<char> buf;
+        size_t start;
+        size_t end;
+        bool eof;
+
+        // universal newline support
+        static void stripCR(std::string &line) {
+            if (line.length() > 0 and line.back() == '\r') {
+                line.pop_back();
+            }
+        }
+    };
+
+    /**
+     * @brief Parse 2nd field of SAM line into bit fields
+     */
+    std::bitset<12>
+    parseFlags(const std::string &line) {
+        size_t tab = line.find('\t');
+        if (tab == std::string::npos) {
+            throw std::runtime_error("Error: unable to parse incomplete line.");
+        }
+        return std::bitset<12>(std::strtoul(line.c_str() + tab + 1, NULL, 10));
+    }
+
+    /**
+     * Assemble SAM lines into groups, skipping headers and keeping mate
+     * pairs together.
+     */
+    class SamGrouper {
+    public:
+        /**
+         * Add a line. Returns true if a group is complete, and moves it
+         * into group.
+         */
+        bool add(const std::string &line,
+                 std::vector<std::string> &group) {
+            if (line.length() < 1 or line[0] == '@') {
+                return false;
+            }
+            std::bitset<12> flags = parseFlags(line);
+            bool paired = flags[0];
+            bool mate_unmapped = flags[3];
+            pending.push_back(line);
+            if ((not paired) or mate_unmapped or pending.size() == 2) {
+                group.swap(pending);
+                pending.clear();
+                return true;
+            }
+            return false;
+        }
+
+        /**
+         * Move any incomplete group into group at end of input. Returns
+         * false if nothing was pending.
+         */
+        bool flush(std::vector<std::string> &group) {
+            group.swap(pending);
+            pending.clear();
+            return group.size() > 0;
+        }
+
+    private:
+        std::vector<std::string> pending;
+    };
+
+    /**
+     * Get the read name from a FASTQ header line (up to the first whitespace).
+     */
+    std::string
+    fastqReadName(const std::string &header) {
+        return header.substr(1, header.find_first_of(" \t") - 1);
+    }
+
+    /**
+     * Assemble FASTQ lines into groups of one 4-line record, or two
+     * consecutive records with the same read name (an unmerged mate pair).
+     */
+    class FastqGrouper {
+    public:
+        bool add(const std::string &line,
+                 std::vector<std::string> &group) {
+            // suppress jdb socket message (sometimes printed to stdout by bbmerge)
+            if (record.size() == 0 and line.compare(0, 9, "Listening") == 0) {
+                return false;
+            }
+            record.push_back(line);
+            if (record.size() < 4) {
+                return false;
+            }
+            bool complete = false;
+            if (pending.size() == 0) {
+                pending.swap(record);
+            } else if (pending.size() == 4 and
+                       fastqReadName(pending[0]) == fastqReadName(record[0])) {
+                pending.insert(pending.end(), record.begin(), record.end());
+                group.swap(pending);
+                pending.clear();
+                complete = true;
+            } else {
+                group.swap(pending);
+                pending.swap(record);
+                complete = true;
+            }
+            record.clear();
+            return complete;
+        }
+
+        bool flush(std::vector<std::string> &group) {
+            // keep any truncated final record rather than dropping lines
+            pending.insert(pending.end(), record.begin(), record.end());
+            record.clear();
+            group.swap(pending);
+            pending.clear();
+            return group.size() > 0;
+        }
+
+    private:
+        std::vector<std::string> record;
+        std::vector<std::string> pending;
+    };
+
+    /**
+     * @brief Get the next group of lines from an input.
+     *
+     * @return False if no lines remain.
+     */
+    template<typename Grouper>
+    bool
+    getGroup(LineReader &reader,
+             Grouper &grouper,
+             std::vector<std::string> &group) {
+        std::string line;
+        while (reader.getline(line)) {
+            if (grouper.add(line, group)) {
+                return true;
+            }
+        }
+        return grouper.flush(group);
+    }
+
+    void
+    appendGroup(const std::vector<std::string> &lines,
+                std::string &out) {
+        for (auto &l : lines) {
+            out.append(l).push_back('\n');
+        }
+    }
+
+}}
+
+#endif //SHAPEMAPPER_SAMMIXER_H
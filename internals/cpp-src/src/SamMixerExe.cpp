@@ -0,0 +1,72 @@
+/** @file
+ * @brief Mix SAM alignment (or FASTQ) streams, skipping header lines. Commandline executable.
+ */
+
+/*-----------------------------------------------------------------------
+ * This file is a part of ShapeMapper, and is licensed under the terms  *
+ * of the MIT license. Copyright 2018 Steven Busan.                     *
+ *----------------------------------------------------------------------*/
+
+#include <iostream>
+
+#include <boost/program_options.hpp>
+
+#include "SamMixer.cpp"
+
+
+namespace po = boost::program_options;
+
+int main(int argc, char *argv[]) {
+    try {
+        std::vector<std::string> in;
+        std::string out;
+        bool any_order;
+        bool fastq;
+
+        po::options_description desc("Usage");
+        desc.add_options()
+                ("help,h", "print usage message")
+
+                ("in,i", po::value<std::vector<std::string> >(&in)->multitoken()->required(),
+                 "SAM input file paths")
+
+                ("out,o", po::value<std::string>(&out)->required(), "mixed SAM output file path")
+
+                ("any_order", po::bool_switch(&any_order)->default_value(false),
+                 "take alignments from whichever input is ready, instead of alternating between inputs")
+
+                ("fastq", po::bool_switch(&fastq)->default_value(false),
+                 "inputs are FASTQ instead of SAM (consecutive records with matching read names are kept together)");
+
+        po::positional_options_description pos;
+        pos.add("in", -1);
+
+        po::variables_map vm;
+
+        try {
+            po::store(po::command_line_parser(argc, argv).options(desc).positional(pos).run(), vm);
+
+            if (vm.count("help") or argc == 1) {
+                std::cout << desc << std::endl;
+                return 0; //SUCCESS
+            }
+            po::notify(vm);
+        }
+        catch (const po::error &e) {
+            std::cerr << "ERROR: " << e.what() << "\n" << std::endl;
+            std::cerr << desc << std::endl;
+            return 1; //FAILURE
+        }
+
+        sam_mixer::mixSam(in, out, any_order, fastq);
+    }
+    catch (const std::exception &e) {
+        std::cerr << e.what() << std::endl;
+        return 1; //FAILURE
+    }
+    catch (...) {
+        std::cerr << "Unknown error." << std::endl;
+        return 1;
+    }
+    return 0; //SUCCESS
+}
@@ -0,0 +1,53 @@
+/** @file
+ * @brief Concatenate files without copying through user space. Primary interface functions.
+ */
+
+/*-----------------------------------------------------------------------
+ * This file is a part of ShapeMapper, and is licensed under the terms  *
+ * of the MIT license. Copyright 2018 Steven Busan.                     *
+ *----------------------------------------------------------------------*/
+
+#include "SpliceCat.h"
+
+namespace splice_cat {
+
+    /**
+     * @brief Append input files end-to-end into a single output file or
+     *        named pipe.
+     *
+     * @param filenames  Input file paths (regular files or named pipes)
+     * @param outname    Output file path
+     * @param [sep]      Optional string written between consecutive inputs
+     *                   (e.g. a newline to keep FASTA headers on their own lines)
+     */
+    void
+    concatFiles(const std::vector<std::string> &filenames,
+                const std::string &outname,
+                const std::string &sep = "") {
+        int out_fd = open(outname.c_str(), O_WRONLY | O_CREAT | O_TRUNC, 0644);
+        if (out_fd < 0) {
+            throw std::runtime_error(
+                    "ERROR: Could not open output file " + outname + "\nCheck file and folder permissions.");
+        }
+        for (size_t i = 0; i < filenames.size(); ++i) {
+            int in_fd = open(filenames[i].c_str(), O_RDONLY);
+            if (in_fd < 0) {
+                close(out_fd);
+                throw std::runtime_error("ERROR: Could not open input file " + filenames[i] + ".");
+            }
+            try {
+                detail::copyFd(in_fd, out_fd);
+            } catch (...) {
+                close(in_fd);
+                close(out_fd);
+                throw;
+            }
+            close(in_fd);
+            if (sep.length() > 0 and i < filenames.size() - 1) {
+                util::writeAll(out_fd, sep.data(), sep.length());
+            }
+        }
+        close(out_fd);
+    }
+
+}
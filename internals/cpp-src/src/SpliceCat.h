@@ -0,0 +1,71 @@
+/** @file
+ * @brief Concatenate files without copying through user space. Utility functions.
+ */
+
+/*-----------------------------------------------------------------------
+ * This file is a part of ShapeMapper, and is licensed under the terms  *
+ * of the MIT license. Copyright 2018 Steven Busan.                     *
+ *----------------------------------------------------------------------*/
+
+#ifndef SHAPEMAPPER_SPLICECAT_H
+#define SHAPEMAPPER_SPLICECAT_H
+
+#include <string>
+#include <vector>
+#include <stdexcept>
+#include <cerrno>
+#include <cstring>
+
+#include <fcntl.h>
+#include <unistd.h>
+#include <sys/sendfile.h>
+
+#include "util.h"
+
+// max bytes moved per splice/sendfile/read call
+#define SPLICE_CHUNK_SIZE (1 << 20)
+
+namespace splice_cat { namespace detail {
+
+    /**
+     * Move all remaining data from in_fd to out_fd. Uses splice() when
+     * either end is a pipe, sendfile() for file-to-file copies, and falls
+     * back to a plain read()/write() loop if neither is supported.
+     */
+    void copyFd(int in_fd,
+                int out_fd) {
+        enum Method { SPLICE, SENDFILE, READ_WRITE };
+        Method method = SPLICE;
+        std::vector<char> buf;
+        while (true) {
+            ssize_t n;
+            if (method == SPLICE) {
+                n = splice(in_fd, NULL, out_fd, NULL, SPLICE_CHUNK_SIZE,
+                           SPLICE_F_MOVE | SPLICE_F_MORE);
+                if (n < 0 and errno == EINVAL) {
+                    // neither fd is a pipe
+                    method = SENDFILE;
+                    continue;
+                }
+            } else if (method == SENDFILE) {
+                n = sendfile(out_fd, in_fd, NULL, SPLICE_CHUNK_SIZE);
+                if (n < 0 and (errno == EINVAL or errno == ENOSYS)) {
+                    method = READ_WRITE;
+                    continue;
+                }
+            } else {
+                if (buf.empty()) { buf.resize(SPLICE_CHUNK_SIZE); }
+                n = read(in_fd, buf.data(), buf.size());
+                if (n > 0) { util::writeAll(out_fd, buf.data(), n); }
+            }
+            if (n < 0) {
+                if (errno == EINTR) { continue; }
+                throw std::runtime_error("ERROR: copy failed: " + std::string(strerror(errno)));
+            }
+            if (n == 0) { break; }
+        }
+    }
+
+}}
+
+#endif //SHAPEMAPPER_SPLICECAT_H
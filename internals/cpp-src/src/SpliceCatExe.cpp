@@ -0,0 +1,68 @@
+/** @file
+ * @brief Concatenate files without copying through user space. Commandline executable.
+ */
+
+/*-----------------------------------------------------------------------
+ * This file is a part of ShapeMapper, and is licensed under the terms  *
+ * of the MIT license. Copyright 2018 Steven Busan.                     *
+ *----------------------------------------------------------------------*/
+
+#include <iostream>
+
+#include <boost/program_options.hpp>
+
+#include "SpliceCat.cpp"
+
+
+namespace po = boost::program_options;
+
+int main(int argc, char *argv[]) {
+    try {
+        std::vector<std::string> in;
+        std::string out;
+        std::string sep;
+
+        po::options_description desc("Usage");
+        desc.add_options()
+                ("help,h", "print usage message")
+
+                ("in,i", po::value<std::vector<std::string> >(&in)->multitoken()->required(),
+                 "input file paths")
+
+                ("out,o", po::value<std::string>(&out)->required(), "output file path")
+
+                ("sep", po::value<std::string>(&sep)->default_value(""),
+                 "string to write between consecutive input files");
+
+        po::positional_options_description pos;
+        pos.add("in", -1);
+
+        po::variables_map vm;
+
+        try {
+            po::store(po::command_line_parser(argc, argv).options(desc).positional(pos).run(), vm);
+
+            if (vm.count("help") or argc == 1) {
+                std::cout << desc << std::endl;
+                return 0; //SUCCESS
+            }
+            po::notify(vm);
+        }
+        catch (const po::error &e) {
+            std::cerr << "ERROR: " << e.what() << "\n" << std::endl;
+            std::cerr << desc << std::endl;
+            return 1; //FAILURE
+        }
+
+        splice_cat::concatFiles(in, out, sep);
+    }
+    catch (const std::exception &e) {
+        std::cerr << e.what() << std::endl;
+        return 1; //FAILURE
+    }
+    catch (...) {
+        std::cerr << "Unknown error." << std::endl;
+        return 1;
+    }
+    return 0; //SUCCESS
+}
@@ -10,6 +10,13 @@
 
 #include <iostream>
 #include <fstream>
+#include <string>
+#include <vector>
+#include <stdexcept>
+#include <cerrno>
+#include <cstring>
+
+#include <unistd.h>
 
 
 namespace util {
@@ -53,6 +60,23 @@ namespace util {
         }
         return vect;
     }
+
+    /**
+     * Write an entire buffer to a file descriptor, retrying on short writes.
+     */
+    void writeAll(int fd,
+                  const char *buf,
+                  size_t len) {
+        while (len > 0) {
+            ssize_t n = write(fd, buf, len);
+            if (n < 0) {
+                if (errno == EINTR) { continue; }
+                throw std::runtime_error("ERROR: write failed: " + std::string(strerror(errno)));
+            }
+            buf += n;
+            len -= n;
+        }
+    }
 }
 
 #endif //SHAPEMAPPER_UTIL_H
@@ -0,0 +1,96 @@
+/*-----------------------------------------------------------------------
+ * This file is a part of ShapeMapper, and is licensed under the terms  *
+ * of the MIT license. Copyright 2018 Steven Busan.                     *
+ *----------------------------------------------------------------------*/
+
+#include <fstream>
+#include <sstream>
+
+#include <boost/filesystem.hpp>
+
+#include "gtest/gtest.h"
+#include "LineSplitter.cpp"
+
+namespace BF = boost::filesystem;
+
+
+std::string FILEPATH = __FILE__;
+std::string BASEPATH = "";
+
+
+BF::path getTestFileDir() {
+    BF::path filedir;
+    if (BASEPATH == "") {
+        filedir = BF::path(FILEPATH).parent_path() / "files";
+    } else {
+        filedir = BF::path(BASEPATH) / "internals" / "cpp-src" / "test" / "files";
+    }
+    BF::create_directory(filedir / "tmp");
+    return filedir;
+}
+
+std::string writeTempFile(const std::string &name,
+                          const std::string &contents) {
+    std::string filename = (getTestFileDir() / "tmp" / name).string();
+    std::ofstream f(filename, std::ios_base::out | std::ios_base::binary);
+    f << contents;
+    return filename;
+}
+
+std::string readFile(const std::string &filename) {
+    std::ifstream f(filename, std::ios_base::in | std::ios_base::binary);
+    std::stringstream ss;
+    ss << f.rdbuf();
+    return ss.str();
+}
+
+std::vector<std::string> tempNames(const std::string &prefix,
+                                   const int n) {
+    std::vector<std::string> names;
+    for (int i = 0; i < n; ++i) {
+        names.push_back((getTestFileDir() / "tmp" / (prefix + std::to_string(i + 1))).string());
+    }
+    return names;
+}
+
+
+TEST(LineSplitterTest, RoundRobinLines) {
+    std::string in = writeTempFile("split_in.tab6", "r1\nr2\nr3\nr4\nr5");
+    std::vector<std::string> outs = tempNames("split_out.tab6.", 2);
+    line_splitter::splitLines(in, outs);
+    EXPECT_EQ("r1\nr3\nr5", readFile(outs[0]));
+    EXPECT_EQ("r2\nr4\n", readFile(outs[1]));
+}
+
+TEST(LineSplitterTest, KeepsFastqRecordsTogether) {
+    std::string in = (getTestFileDir() / "3_R1.fastq").string();
+    std::vector<std::string> outs = tempNames("split_out.fastq.", 3);
+    line_splitter::splitLines(in, outs, 4);
+
+    // every output should contain whole records, and together all input lines
+    std::ifstream f(in);
+    std::vector<std::string> lines;
+    std::string line;
+    while (std::getline(f, line)) { lines.push_back(line); }
+    std::string expected[3];
+    for (size_t i = 0; i < lines.size(); ++i) {
+        expected[(i / 4) % 3] += lines[i] + "\n";
+    }
+    for (int i = 0; i < 3; ++i) {
+        EXPECT_EQ(expected[i], readFile(outs[i]));
+    }
+}
+
+TEST(LineSplitterTest, ErrorOnMissingInput) {
+    std::string in = (getTestFileDir() / "does_not_exist.tab6").string();
+    EXPECT_THROW(line_splitter::splitLines(in, tempNames("split_missing.", 2)), std::runtime_error);
+}
+
+
+int main(int argc, char **argv) {
+    ::testing::InitGoogleTest(&argc, argv);
+    if (argc > 1) {
+        BASEPATH = argv[1];
+    }
+    return RUN_ALL_TESTS();
+}
@@ -155,6 +155,101 @@ TEST(ParseMDtag, Complex) {
 	EXPECT_EQ(toString(expected), toString(output));
 }
 
+TEST(CalcMDtag, Match) {
+	std::string target = "GGATGCATGC";
+	std::vector<CigarOp> cigar{{'M', 8}};
+	EXPECT_EQ("8", calcMDtag(2, "ATGCATGC", cigar, target));
+}
+
+TEST(CalcMDtag, Complex) {
+	// soft-clip, mismatch, insert, deletion followed directly by mismatch
+	std::string target = "GGATGCATGCATGC";
+	std::vector<CigarOp> cigar{{'S', 2},
+							   {'M', 4},
+							   {'I', 1},
+							   {'M', 2},
+							   {'D', 2},
+							   {'M', 3}};
+	EXPECT_EQ("2G3^GC0A2", calcMDtag(2, "NNATCCGATTTG", cigar, target));
+}
+
+TEST(CalcMDtag, PastEndOfTarget) {
+	std::string target = "ATGC";
+	std::vector<CigarOp> cigar{{'M', 6}};
+	EXPECT_THROW(calcMDtag(0, "ATGCAT", cigar, target), std::runtime_error);
+}
+
+// bowtie2 alignments to TPP (example_data/TPP.fa), with the MD tags bowtie2 wrote
+TEST(CalcMDtag, MatchesBowtie2) {
+	std::string target = "ggccttcgggccaaggaCTCGGGGTGCCCTTCTGCGTGAAGGCTGAGAAATACCCGTATCACCTGATCTGGATAATGCCAGCGTAGGGAAGTTCTCGATCCGGTTCGCCGGATCCAAATcgggcttcggtccggttc";
+	// POS, CIGAR, SEQ, MD
+	std::vector<std::vector<std::string>> alignments = {
+		// mismatch directly after a deletion
+		{"16", "54M1D11M1D55M5S",
+		 "GACTCGGGGTGCCCTTCTGCGTGAAGGCTGAGAAATACCCGTATCACCTGATCTGATAATGCCAGTTAGGGAAGTTCTCGATCCGGTTCGCCGGATCCAAATCGGGCTTCGGTCCGGTTCTCACA",
+		 "54^G11^C0G54"},
+		{"1", "13S25M3D5M1D103M5S",
+		 "TTCCGATCATCGGGGCCTTCGGGCCAAGGACTCGGGGTTTTCTCGTGAAGGCTGAGAAATACCCGTATCACCTGATCTGGATAATGCCAGCGTAGGGAAGTTCTCGATCCGGTTCGCCGGATCCAAATCGGGCTTCGGTCCGGTTCATCCC",
+		 "25^GCC0C4^G103"},
+		// adjacent mismatches, and a long deletion followed by a mismatch
+		{"1", "41S79M32D26M5S",
+		 "GATGTGACTGGAGTTCAGACGTGTGCTCTTCCGATCGGGACGGCCTTCGGGCCAAGGACTCGGGGTGCCCTCTTCTGTGAAGGCCGAGAGATACCCGTATCACCTGATCTGGATAATGCCCTACACATCGGGCTTCGGTCCGGTTCATCCC",
+		 "30T0C1G0C8T4A30^AGCGTAGGGAAGTTCTCGATCCGGTTCGCCGG0A1C2A20"},
+		// insertion
+		{"1", "9S96M1I15M1D25M5S",
+		 "GATCGAAACGGCCTTCGGGCCAAGGTCTCGGGGTGCCCTTCTGCGTGAAGGCTGAGAGATACCCGTATCACCTGATCTGGATAATGCCAGCGTAGGGAAGTTCTCTAATCCGGTTCGCCGGTCCAAATCGGGCTTCGGTCCGGTTCATGGC",
+		 "16A31A47G14^A25"},
+		{"1", "9S137M5S",
+		 "CGACGGGTAGGCCTTCGGGCCAAGGACTCGGGGTGCCCTTCTGCGTGAAGGCTGAGAAATACCCGTATCACCTGATCTGGATAATGCCAGCGTAGGGATTTTCTCGATCCGGTTCGCCGGATCCAAATCGGGCTTCGGTCCGGTTCGATTC",
+		 "89A0G46"},
+	};
+	for (auto &a : alignments) {
+		EXPECT_EQ(a[3], calcMDtag(std::stoi(a[0]) - 1, a[2], parseCIGAR(a[1]), target));
+	}
+}
+
+TEST(CalcMDtag, NBases) {
+	// bowtie2 and STAR both report an N in the read or reference as a
+	// mismatch, even when both are N
+	std::string target = "ATGCATGNATGC";
+	std::vector<CigarOp> cigar{{'M', 12}};
+	EXPECT_EQ("3C3N4", calcMDtag(0, "ATGNATGAATGC", cigar, target));
+	EXPECT_EQ("7N4", calcMDtag(0, "ATGCATGNATGC", cigar, target));
+	EXPECT_EQ("0A11", calcMDtag(0, "NTGCATGCATGC", std::vector<CigarOp>{{'M', 12}},
+								"ATGCATGCATGC"));
+}
+
+TEST(CalcMDtag, Spliced) {
+	// STAR leaves introns out of the MD tag entirely, so a run of
+	// matches continues across a splice junction
+	//                    exon 1    intron     exon 2
+	std::string target = "GG" "ATGCA" "AAAAAAAAAA" "TGCAT" "GG";
+	std::vector<CigarOp> cigar{{'M', 5}, {'N', 10}, {'M', 5}};
+	EXPECT_EQ("10", calcMDtag(2, "ATGCATGCAT", cigar, target));
+	// mismatch directly after the junction
+	EXPECT_EQ("5T4", calcMDtag(2, "ATGCAAGCAT", cigar, target));
+	// soft-clipped N, mismatch before the junction, deletion after it
+	EXPECT_EQ("2G5^AT1", calcMDtag(2, "NATCCATGCG",
+								   std::vector<CigarOp>{{'S', 1}, {'M', 5}, {'N', 10},
+														{'M', 3}, {'D', 2}, {'M', 1}},
+								   target));
+}
+
+TEST(CalcMDtag, ParseWithoutMDtag) {
+	std::vector<std::string> with_md = {"read1", "0", "target1", "3", "255", "8M", "*", "0", "0",
+										"ATGCTTGC", "IIIIIIII", "MD:Z:4A3"};
+	std::vector<std::string> without_md(with_md.begin(), with_md.end() - 1);
+	std::map<std::string, std::string> reference_seqs{{"target1", "GGATGCATGC"}};
+	Read expected = mutation_parser::parseSamFields(with_md, 10, true);
+	Read read = mutation_parser::parseSamFields(without_md, 10, true, reference_seqs);
+	EXPECT_EQ(expected.serializeForTest(), read.serializeForTest());
+	// no MD tag and no reference sequences
+	EXPECT_THROW(mutation_parser::parseSamFields(without_md, 10, true), std::runtime_error);
+	// no MD tag and target missing from reference sequences
+	std::map<std::string, std::string> other_seqs{{"target2", "GGATGCATGC"}};
+	EXPECT_THROW(mutation_parser::parseSamFields(without_md, 10, true, other_seqs), std::runtime_error);
+}
+
 // CIGAR + MD parsing to locate mutations and reconstruct local alignment
 // target sequence and aligned read over region
 TEST(LocateMutations, OnlyMatch) {
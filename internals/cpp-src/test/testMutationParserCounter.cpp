@@ -0,0 +1,192 @@
+/*-----------------------------------------------------------------------
+ * This file is a part of ShapeMapper, and is licensed under the terms  *
+ * of the MIT license. Copyright 2018 Steven Busan.                     *
+ *----------------------------------------------------------------------*/
+
+#include <fstream>
+#include <sstream>
+
+#include "gtest/gtest.h"
+#include "MutationParserCounter.cpp"
+
+namespace BF = boost::filesystem;
+using namespace mutation_parser_counter;
+
+
+std::string FILEPATH = __FILE__;
+std::string BASEPATH = "";
+
+
+BF::path getTestFileDir() {
+    BF::path filedir;
+    if (BASEPATH == "") {
+        filedir = BF::path(FILEPATH).parent_path() / "files";
+    } else {
+        filedir = BF::path(BASEPATH) / "internals" / "cpp-src" / "test" / "files";
+    }
+    BF::create_directory(filedir / "tmp");
+    return filedir;
+}
+
+std::string readFile(const std::string &filename) {
+    std::ifstream f(filename, std::ios_base::in | std::ios_base::binary);
+    std::stringstream ss;
+    ss << f.rdbuf();
+    return ss.str();
+}
+
+std::string sample_reads = R"(M01228:25:000000000-A1CW0:1:1101:11549:3441	89	TPP	16	44	54M1D11M1D55M5S	=	16	0	GACTCGGGGTGCCCTTCTGCGTGAAGGCTGAGAAATACCCGTATCACCTGATCTGATAATGCCAGTTAGGGAAGTTCTCGATCCGGTTCGCCGGATCCAAATCGGGCTTCGGTCCGGTTCTCACA	:CGGGGE?CGGGECC>EGEEGGECEEEGGC=AEEC@>GEED==,EEGFFF;GFGFDFHFDFDBHDFHHHHFHHGHHFHEBHCHCEFCHHHHIIIIIIIIHHHHGGGGGGDDDDDDEDBBB?????	AS:i:224	XN:i:0	XM:i:1	XO:i:2	XG:i:2	NM:i:3	MD:Z:54^G11^C0G54	YT:Z:UP
+M01228:25:000000000-A1CW0:1:1101:10778:3437	89	TPP	8	44	109M1I21M5S	=	8	0	GGGCCAAGGACTCGGGGTGCCCTTCTGCGTGAAGGCTGAGAAATACCCGTATCACCTGATCTGGATAATGCCAGCGTAGGGAAGTTCTCGATCCGGTTCGCCGGATCCACAATCGGGCTTCGGTCCGGTTCTGTGG	GE?:EEGGGGD>>GGGGECC?C:A;GGGGGGGHGGGGGGGGGE8@BGGGGGGGEEEDGGGGGGHGGGGGGGGHHHHHHHHHHHHHHHHHHHHHEHHHHHHHHIHGHHFF@HHHHGGGGGGDDDDDDEDBBBAAAAA	AS:i:254	XN:i:0	XM:i:0	XO:i:1	XG:i:1	NM:i:1	MD:Z:130	YT:Z:UP
+M01228:25:000000000-A1CW0:1:1101:13477:3450	89	TPP	1	42	13S25M3D5M1D103M5S	=	1	0	TTCCGATCATCGGGGCCTTCGGGCCAAGGACTCGGGGTTTTCTCGTGAAGGCTGAGAAATACCCGTATCACCTGATCTGGATAATGCCAGCGTAGGGAAGTTCTCGATCCGGTTCGCCGGATCCAAATCGGGCTTCGGTCCGGTTCATCCC	CCC)GCEC>GAAGGE8'8<>GGEGEEC:*8>DGGGC?EEEG>GEGGGGGGGGGHGGGGEGEEC;GGGGGGGEBGGGGGGGGGGGGGGHHHHHHHHHHHHHHHHHHHHHHHEHHHHHHIIIIIIIIHHHHGGGGGGDDDDEEEDBB?A?AAA	AS:i:248	XN:i:0	XM:i:1	XO:i:2	XG:i:4	NM:i:5	MD:Z:25^GCC0C4^G103	YT:Z:UP
+M01228:25:000000000-A1CW0:1:1101:18624:3452	89	TPP	1	42	9S96M1I15M1D25M5S	=	1	0	GATCGAAACGGCCTTCGGGCCAAGGTCTCGGGGTGCCCTTCTGCGTGAAGGCTGAGAGATACCCGTATCACCTGATCTGGATAATGCCAGCGTAGGGAAGTTCTCTAATCCGGTTCGCCGGTCCAAATCGGGCTTCGGTCCGGTTCATGGC	*CECE?).DEC>D>A<GGEEEEEEGGGGD;ECCEC8EGGGGGGGGGGGGGGCGGGGECEEGGEEGGGGEEGGGGEGGDDEGGGGGGGHFHHHHHHHHHHHHHHHHHDHHHHHHHHHHHHIHIIIHEBHHGGGGGGDDDDDDDDBBBAA???	AS:i:248	XN:i:0	XM:i:3	XO:i:2	XG:i:2	NM:i:5	MD:Z:16A31A47G14^A25	YT:Z:UP
+M01228:25:000000000-A1CW0:1:1101:19396:3449	89	TPP	1	42	11S110M2D25M5S	=	1	0	CCGATCAGTGCGGCCTTCGGGCCAAGGACTCGGGGTGCCCTTCTGCGTGAAGGCTGAGAAATACCCGTATCACCTGATCTGGATAATGCCAGCGCAAGGAAGTTCTCAATCCGGTTCGCCGTCCAAATCGGGCTTCGGTCCGGTTCTAATA	8GECEEDDAGGCED?GDGGGECGGGC:GAGGGGGCCGGGEEGGGGGGGEGGGGGGGGEGCC@:GEECDDDEEGEDEGHGGGGGGGGGGEECHEFFHHHHHHHHHHHHHECHHHEHHHEHHHIIIIHHHHGGGGGGEEDDEEDDBBB?AAAA	AS:i:251	XN:i:0	XM:i:3	XO:i:1	XG:i:2	NM:i:5	MD:Z:83T1G10G13^GA25	YT:Z:UP
+M01228:25:000000000-A1CW0:1:1101:16885:3462	89	TPP	1	44	9S137M5S	=	1	0	GATCGACATGGCCTTCGGGCCAAGGACTCGGGGTGCCCTTCTGCGTGAAGGCTGAGAAATACCCGTATAACCTGATCTGGATAATGCCAGCGTAGGGAAGTTCTCGATCCGGTTCGCCGGATCCAAATCGGGCTTCGGTCCGGTTCTGTTC	88EEA:?C??F>>D;2CCA?EAEEEAD>DDEEAEFEFFFD?DC?EFFFFFFFFFFFEFE>BEEECEEEFFEFFFFFEFFFFFFFFEFHHHHHHHHHHHHHHHHHHHHHHHHHHHHHHIIIIIIHIHHHHFFEFFFDDDDDDDDBBB?????	AS:i:270	XN:i:0	XM:i:1	XO:i:0	XG:i:0	NM:i:1	MD:Z:59C77	YT:Z:UP
+M01228:25:000000000-A1CW0:1:1101:18360:3463	89	TPP	4	44	12S134M5S	=	4	0	CGATCACAGCGGCTTCGGGCCAAGGACTCGGGGTGCCCTTCTGCGTGAAGGCTGAGAAATACCCGTATCACCTGATCTGGATAATGCCAGCGTAGGGAAGTTCTCGATCCGGTTCGCCGGATCCAAATCGGGCTTCGGTCCGGTTCCACGA	GEC??0'DGAEDGAA>EGEGGEE?C8DGGDC8GEGGGEEGGGGGGGGGGGGGEGGGGGEBEGGECGGGCDGEDEGGGGEDEEGGGGGGHHHHHHHHHHHHHHHHHHHHHHHHHHHHHIIIIIIIIHHHHGGGGGGDDDDEDDDB?A?????	AS:i:268	XN:i:0	XM:i:0	XO:i:0	XG:i:0	NM:i:0	MD:Z:134	YT:Z:UP
+M01228:25:000000000-A1CW0:1:1101:14481:3463	89	TPP	1	42	18S93M7D5M2D30M5S	=	1	0	TGCTCTTCCGATCGTAAGGGCCTTCGGGCCAAGGACTCGGGGTGCCCTTCTGCGTGAAGGCTGAGAAATACCCGTATCACCTGATCTGGATAATGCCAGCGTAGGGAAGTTCGGTTCCAGATCCAAATCGGGCTTCGGTCCGGTTCAGCGT	*CCEECCCGGGGGGGGGGCEA?DAGEEGEGGGGGCDBGGGGGGGEAGGEBGGGGGGGGGGFGGGGGGFDHHHHHHFFFCHHHHHHHHHHIIIIIHHHHHEIIIIIIIIHFCHIIHIIIIIIIIIIHHHHGGGGGGDEEDDDEEB?AAAAAA	AS:i:232	XN:i:0	XM:i:1	XO:i:2	XG:i:9	NM:i:10	MD:Z:93^CTCGATC5^CG2G27	YT:Z:UP
+M01228:25:000000000-A1CW0:1:1101:15537:3468	89	TPP	93	22	68S45M5S	=	93	0	ATCGTGATGTGACTGGAGTTCAGACGTGTGCTCTTCCGATCAGGTGGGCCTTCGGGCCAAGGACTCTCTCTCGATCCGGTTCGCCGGATCCAAATCGGGCTTCGGTCCGGTTCCCTTC	EEEEGGGGEEGGEGEECGGEEECCACGGEEACCEECCEEGECGEEE@D8GGGGGGHHHHHHFFHFEHHHHHHHHHHHHHEHHFHHIIIIHIIHHHHGGGGGGDDDDDDDDB???????	AS:i:90	XN:i:0	XM:i:0	XO:i:0	XG:i:0	NM:i:0	MD:Z:45	YT:Z:UP
+M01228:25:000000000-A1CW0:1:1101:9129:3475	89	TPP	83	44	55M5S	=	83	0	GTAAGGAAGTTCTCGATCCGGTTCGCCGGATCCAAATCGGGCTTCGGTCCGGTTCAGCAG	HHHHHHHHHHFFEEADHHHHHHHCHHIIIIIIIIHHHHFFFFFDDDDDDDEDBBB?????	AS:i:106	XN:i:0	XM:i:1	XO:i:0	XG:i:0	NM:i:1	MD:Z:3G51	YT:Z:UP
+M01228:25:000000000-A1CW0:1:1101:18668:3479	89	TPP	1	44	7S55M2I82M5S	=	1	0	TCAGAAAGGCCTTCGGGCCAAGGACTCGGGGTGCCCTTCTGCGTGAAGGCTGAGAAATACCCAAGGATCACCTGATCTGGATAATGCCAGCGTAGGGAAGTTCTCGATCCGGTTCGCCGGATCCAAATCGGGCTTCGGTCCGGTTCTTGTC	1C?CC?C882>><<8:C:GEGEC8GD88GCEEGCCGGGGGGGGEGEGGGGGGGGGGEC?GEEGGGGGEDEEDGGGGGGGGEGGGGGGGHHEHHHHHHHHHHHHHHHHHHHHHHHHHHHIIIIIIIHBHHGGGGGGDEDDDDEEBBBAAAAA	AS:i:263	XN:i:0	XM:i:1	XO:i:1	XG:i:2	NM:i:3	MD:Z:56T80	YT:Z:UP
+M01228:25:000000000-A1CW0:1:1101:13672:3463	89	TPP	1	44	9S137M5S	=	1	0	GATCAAGAAGGCCTTCGGGCCAAGGACTCGGGGTGCCCTTCTGCGTGAAGGCTGAGAAATACCCGTATCACCTGATCTGGATAATGCCAGCGTAGGGAAGTTCTCGATCCGGTTCGCCGGATCCAAATCGGGCTTCGGTCCGGTTCGTCCT	?GGEC?EEGGE2>GD<?:::GEGEGGADDGGEGGGGECG;2DC?GGGEGGGGGGGGGGGE@GGEGGGEGGGGGGGGGGGGEEGGEGBDFEDGGHHHHHHHHHHHHHHHHDHHHHHHHIIIIIIIIHHHHGGFGGGDDDDDDEEAABAAA??	AS:i:274	XN:i:0	XM:i:0	XO:i:0	XG:i:0	NM:i:0	MD:Z:137	YT:Z:UP
+M01228:25:000000000-A1CW0:1:1101:19408:3485	89	TPP	1	44	9S137M5S	=	1	0	GATCATACTGGCCTTCGGGCCAAGGACTCGGGGTGCCCTTCTGCGTGAAGGCTGAGAAATACCCGTATCACCTGATCTGGATAATGCCAGCGTAGGGAAGTTCTCGATCCGGTTCGCCGGATCCAAATCGGGCTTCGGTCCGGTTCGAACT	:EC?C?:??EE8<>GGGGGGGGGGGGGGGGGGGGGGCGEADGGGGGGCGGECEGGGEGEEBGGCCGGEGGGGGGGGGGGGGDEGGGEGGHEFFFDHHHHHHHHHHHHHHHHHHHHHHIIIIIHIHHHHHGGGGGGDEEDDEEDBAA?????	AS:i:274	XN:i:0	XM:i:0	XO:i:0	XG:i:0	NM:i:0	MD:Z:137	YT:Z:UP
+M01228:25:000000000-A1CW0:1:1101:14136:3486	89	TPP	1	44	9S137M5S	=	1	0	CGACGGGTAGGCCTTCGGGCCAAGGACTCGGGGTGCCCTTCTGCGTGAAGGCTGAGAAATACCCGTATCACCTGATCTGGATAATGCCAGCGTAGGGATTTTCTCGATCCGGTTCGCCGGATCCAAATCGGGCTTCGGTCCGGTTCGATTC	DEC???:0:ECAGGGGGEGGGECEGEDG?GGGGECGGEGGGGGGGGGGGGGGGGGGEEAE@GEGEGGEECGGGGGGGGGGGGGGGGGGGHHHHHHHFC,HHHHHHHHHHHHHHHHHHIIIIIIIIHHHHGGGGGGDDDDDDDEBBBAAAAA	AS:i:267	XN:i:0	XM:i:2	XO:i:0	XG:i:0	NM:i:2	MD:Z:89A0G46	YT:Z:UP
+M01228:25:000000000-A1CW0:1:1101:12786:3488	89	TPP	1	44	9S137M5S	=	1	0	GATCATCACGGCCTTCGGGCCAAGGACTCGGGGTGCCCTTCTGTGTGAAGGCTGAGAAATACCCGTATCACCTGATCTGGATAATGCCAGCGTAGGGAAGTTCTCGATCCGGTTCGCCGGATCCAAATCGGGCTTCGGTCCGGTTCCTACT	0CEEGG>>DE8<><'>EECGCC?::CDGG>CE?CCCCGGGEECEEEEGGCGECGGGGCC:)GGGGEAEEDGGGGGGEGEGGGGGGGGHHCHHHHHHHHHHHHFHEHHHHEEFEHHHHIIHGHIHIHHHHGGGGGGDDDDDDDDBBBA????	AS:i:270	XN:i:0	XM:i:1	XO:i:0	XG:i:0	NM:i:1	MD:Z:34C102	YT:Z:UP
+M01228:25:000000000-A1CW0:1:1101:17814:3490	89	TPP	117	22	9S21M5S	=	117	0	GGGCCAAGGAATCGGGCTTCGGTCCGGTTCCTTAT	AAA/CA>>>HHHHFFEEEFEEEEEDEEBBB?????	AS:i:42	XN:i:0	XM:i:0	XO:i:0	XG:i:0	NM:i:0	MD:Z:21	YT:Z:UP
+M01228:25:000000000-A1CW0:1:1101:9656:3491	89	TPP	10	44	20M1I108M5S	=	10	0	GCCAAGGACTCGGGGTGCCCTTTCTGCGTGAAGGCTGAGAAATACCCGTATCACCTGATCTGGATAATGCCAGCGTAGGGAAGTTCTCGATCCGGTTCGCCGGATCCAAATCGGGCTTCGGTCCGGTTCTTTCC	GGGGGGEEGGGDGEECC??GEGGGGECGGEEEGGGGGGGGGGGGGGGGGGGGGGHGGHGGGGGGGGGGGEGHHHHHHHHHHHHGHHHHHGHHHHHHHHHHIIIIIIIIHHHHGGGGGGDEDDEEDEBBBAA???	AS:i:250	XN:i:0	XM:i:0	XO:i:1	XG:i:1	NM:i:1	MD:Z:128	YT:Z:UP
+M01228:25:000000000-A1CW0:1:1101:21374:3492	89	TPP	1	44	9S137M5S	=	1	0	GATCGATACGGCCTTCGGGCCAAGGACTCGGGGTGCCCTTCTGCGTGAAGGCTGAGAAATACCCGTATCACCTGATCTGTATAATGCCAGCGTAAGGAAGTTCTCGATCCGGTTCGCCGGATCCAAATCGGGCTTCGGTCCGGTTCTCATG	CEEEGCC??GEADGGGGC:*EECGGGGGGDGGGGGGEGEDDGECGGGGGGGGGGGGGGGGEGGGGEGGGGGGGGEEEGFGGGGGFGGHFHHHHHHHHHHHHHHHHHHHHHHHHHHHHIIIIIIIIHHHHGGGGGGDEDDDDDEBBBAAAAA	AS:i:266	XN:i:0	XM:i:2	XO:i:0	XG:i:0	NM:i:2	MD:Z:70G14G51	YT:Z:UP
+M01228:25:000000000-A1CW0:1:1101:21525:3465	89	TPP	1	44	11S35M2D100M5S	=	1	0	CCGATCGCCGGGGCCTTCGGGCCAAGGACTCGGGGTGCCCTTCTGCGAAGGCTGAGAAATACCCGCATCACCTGATCTGGATAATGCCAGCGTAGGGAAGTTCTCGATCCGGTTCGCCGGATCCAAATCGGGCTTCGGTCCGGTTCTCACG	.<8.?DGDDDEEE?8?GGGGGGGGGGEGGGGGGEEEGGCGGGEEGEGGGGGGGGGEEGC:)GGGGGGGGGGGGGGGGGGGGGHGGGGHHHHHHHHHHHHHHHHHHHHHHHHHHHHHHIIIIIIIIHHHHGGGGGGEEEEEEEEBBAA??A?	AS:i:259	XN:i:0	XM:i:1	XO:i:1	XG:i:2	NM:i:3	MD:Z:35^GT19T80	YT:Z:UP
+M01228:25:000000000-A1CW0:1:1101:21136:3498	89	TPP	1	24	41S79M32D26M5S	=	1	0	GATGTGACTGGAGTTCAGACGTGTGCTCTTCCGATCGGGACGGCCTTCGGGCCAAGGACTCGGGGTGCCCTCTTCTGTGAAGGCCGAGAGATACCCGTATCACCTGATCTGGATAATGCCCTACACATCGGGCTTCGGTCCGGTTCATCCC	0EGGEECEGGGGGGGGGEEGEGEGGECEEGGGG?GGGGGGGGGGGEBEEGGGGGGGEDGGGGHHHHHHFFHFHHHHHHHHHHIIHHIIIIIHHHHHHHIHHHIIIHIIHGHIIIHIIIIIIHFFAHHHHGGGGGGEEEDDDDDBBAAAAAA	AS:i:135	XN:i:0	XM:i:9	XO:i:1	XG:i:32	NM:i:41	MD:Z:30T0C1G0C8T4A30^AGCGTAGGGAAGTTCTCGATCCGGTTCGCCGG0A1C2A20	YT:Z:UP
+M01228:25:000000000-A1CW0:1:1101:20482:3501	89	TPP	1	44	9S137M5S	=	1	0	GATCAGGAAGGCCTTCGGGCCAAGGACTCGGGGTGCCCTTCTGCGTGAAGGCTGAGAGATACCCGTATCACCTGATCTGGATAATGCCAGCGTAGGGAAGTTCTCGATCCGGTTCGCCGGATCCAAATCGGGCTTCGGTCCGGTTCGACGT	*CEEE:CGEGE8D><8EEC???CGE?2GD;C?8GGGEEE>DDECC:GEEGGGGGGGCGEBBGGEECGGGGECGGGGGGGGEGGGGEBGGGDHHHFFHHHHHHHHHHHHHHHHHHHHHHHIIHIIIHHHHGGGGGGEDDDDDDD?BB??<??	AS:i:270	XN:i:0	XM:i:1	XO:i:0	XG:i:0	NM:i:1	MD:Z:48A88	YT:Z:UP
+M01228:25:000000000-A1CW0:1:1101:21880:3502	89	TPP	1	44	9S137M5S	=	1	0	GATCACAATGGCCTTCGGGCCAAGGACTCGGGGTGCCCTTCTCTGTGAAGGCTGAGAAAAACCCGTATCACCTGATCTGGATAATGCCAGCGTAGGGAAGTTCTCGATCCGGTTCGCCGGATCCAAATCGGGCTTCGGTCCGGTTCCACTC	:ECCCEECEC?2DD<DGGGEGGGGGGDDGGGGCEC8?EEGEEGGGGGGGGGCGGGGGGGGGGGHGGGGGGGGGGGGGGGGGGGGGGGEHHHHHHHHHHHHHHHHHHHHHHHHHHHHHHIIIIIIIHHHHGGGGGGDDDDDDDDBB??????	AS:i:262	XN:i:0	XM:i:3	XO:i:0	XG:i:0	NM:i:3	MD:Z:33G0C15T86	YT:Z:UP
+)";
+
+
+/**
+ * Run mutation_parser::parseSAM() followed by mutation_counter::countSelected()
+ * and the fused parseAndCount() on the same reads, and check that counts,
+ * variants, and (if hist) the histograms printed to stdout are identical.
+ */
+void expectMatchesSeparateParseAndCount(const std::string &prefix,
+                                        const bool separate_ambig_counts,
+                                        const bool hist) {
+    std::string tmp_dir = (getTestFileDir() / "tmp").string();
+    std::string base = tmp_dir + "/" + prefix;
+    std::ofstream dummy(base + ".sam");
+    dummy << sample_reads;
+    dummy.close();
+
+    std::stringstream expected_stdout;
+    std::stringstream fused_stdout;
+    std::streambuf *old_buf = std::cout.rdbuf();
+
+    // two-step reference: parse to file, then count from file
+    mutation_parser::parseSAM(base + ".sam",
+                              base + ".mut",
+                              "", // debug_outname
+                              "", // primers_filename
+                              800, // max_paired_fragment_length
+                              10, // min_mapq
+                              false, // right_align_ambig_dels
+                              false, // right_align_ambig_ins
+                              7, // max_internal_match
+                              30, // min_qual
+                              9, // exclude_3prime
+                              "", // mutation_type
+                              false, // variant_mode
+                              false, // trim_primers
+                              false, // require_forward_primer_mapped
+                              false, // require_reverse_primer_mapped
+                              10, // max_primer_offset
+                              false, // input_is_unpaired
+                              false); // debug
+    std::vector<std::string> filenames = {base + ".mut"};
+    std::cout.rdbuf(expected_stdout.rdbuf());
+    mutation_counter::countSelected(filenames,
+                                    137, // seq_len
+                                    0, // primer_pairs
+                                    base + ".variants.txt",
+                                    base + ".counts.txt",
+                                    hist,
+                                    false, // input_is_sorted
+                                    separate_ambig_counts,
+                                    false); // debug
+    std::cout.rdbuf(old_buf);
+
+    std::cout.rdbuf(fused_stdout.rdbuf());
+    parseAndCount(base + ".sam",
+                  "", // debug_outname
+                  "", // primers_filename
+                  800, // max_paired_fragment_length
+                  10, // min_mapq
+                  false, // right_align_ambig_dels
+                  false, // right_align_ambig_ins
+                  7, // max_internal_match
+                  30, // min_qual
+                  9, // exclude_3prime
+                  "", // mutation_type
+                  false, // variant_mode
+                  false, // trim_primers
+                  false, // require_forward_primer_mapped
+                  false, // require_reverse_primer_mapped
+                  10, // max_primer_offset
+                  false, // input_is_unpaired
+                  137, // seq_len
+                  0, // primer_pairs
+                  base + ".fused.variants.txt",
+                  base + ".fused.counts.txt",
+                  hist,
+                  separate_ambig_counts,
+                  false); // debug
+    std::cout.rdbuf(old_buf);
+
+    // reads must include ambiguously aligned indels for the
+    // separate_ambig_counts columns to be exercised
+    EXPECT_NE(std::string::npos, readFile(base + ".mut").find("_ambig"));
+
+    std::string expected_counts = readFile(base + ".counts.txt");
+    EXPECT_LT(0, expected_counts.length());
+    EXPECT_EQ(expected_counts, readFile(base + ".fused.counts.txt"));
+    EXPECT_EQ(readFile(base + ".variants.txt"),
+              readFile(base + ".fused.variants.txt"));
+    if (hist) {
+        EXPECT_NE(std::string::npos, fused_stdout.str().find("Read lengths"));
+        EXPECT_EQ(expected_stdout.str(), fused_stdout.str());
+    }
+}
+
+TEST(ParseAndCount, MatchesSeparateParseAndCount) {
+    expectMatchesSeparateParseAndCount("tmp_mpc", false, false);
+}
+
+TEST(ParseAndCount, MatchesSeparateParseAndCountSeparateAmbig) {
+    expectMatchesSeparateParseAndCount("tmp_mpc_ambig", true, false);
+}
+
+TEST(ParseAndCount, MatchesSeparateParseAndCountHistograms) {
+    expectMatchesSeparateParseAndCount("tmp_mpc_hist", false, true);
+}
+
+TEST(ParseAndCount, MatchesSeparateParseAndCountSeparateAmbigHistograms) {
+    expectMatchesSeparateParseAndCount("tmp_mpc_ambig_hist", true, true);
+}
+
+TEST(ParseAndCount, ErrorOnNoMappedReads) {
+    std::string tmp_dir = (getTestFileDir() / "tmp").string();
+    std::ofstream dummy(tmp_dir + "/tmp_mpc_header_only.sam");
+    dummy << "@HD\tVN:1.0\tSO:unsorted\n";
+    dummy.close();
+    EXPECT_THROW(parseAndCount(tmp_dir + "/tmp_mpc_header_only.sam",
+                               "", "", 800, 10, false, false, 7, 30, 0, "", false,
+                               false, false, false, 10, false,
+                               0, 0, "", tmp_dir + "/tmp_mpc_header_only.counts.txt",
+                               false, false, false),
+                 std::runtime_error);
+}
+
+
+int main(int argc, char **argv) {
+    ::testing::InitGoogleTest(&argc, argv);
+    if (argc > 1) {
+        BASEPATH = argv[1];
+    }
+    return RUN_ALL_TESTS();
+}
@@ -167,6 +167,31 @@ TEST(ReadTrimmerTest, ErrorOnMismatchedLengths) {
 }
 
 
+TEST(ReadTrimmerTest, RunningWindowMatchesFullWindowMeans) {
+    // compare against a direct mean over every window
+    std::srand(0);
+    for (int trial = 0; trial < 2000; ++trial) {
+        unsigned int window_size = 1 + std::rand() % 8;
+        unsigned int min_phred = std::rand() % 41;
+        std::string phred(std::rand() % 60, '!');
+        for (auto &c : phred) {
+            c = (char) (33 + std::rand() % 42);
+        }
+        int expected = -1;
+        for (int i = 0; i + (int) window_size < (int) phred.length(); ++i) {
+            int sum = 0;
+            for (int j = 0; j < window_size; ++j) {
+                sum += read_trimmer::detail::charToPhred(phred[i + j]);
+            }
+            if ((float) sum / (float) window_size < min_phred) {
+                expected = i;
+                break;
+            }
+        }
+        EXPECT_EQ(expected, read_trimmer::detail::locateLowQualityWindow(phred, window_size, min_phred));
+    }
+}
+
 TEST(FileHandling, FastqFileTrim) {
     std::string file_in = getTestFilePath();
     std::string file_out = (getTestFileDir() / "tmp" / "trimmed.fastq").string();
@@ -0,0 +1,146 @@
+/*-----------------------------------------------------------------------
+ * This file is a part of ShapeMapper, and is licensed under the terms  *
+ * of the MIT license. Copyright 2018 Steven Busan.                     *
+ *----------------------------------------------------------------------*/
+
+#include <algorithm>
+#include <fstream>
+#include <sstream>
+
+#include <boost/filesystem.hpp>
+
+#include "gtest/gtest.h"
+#include "SamMixer.cpp"
+
+namespace BF = boost::filesystem;
+
+
+std::string FILEPATH = __FILE__;
+std::string BASEPATH = "";
+
+
+BF::path getTestFileDir() {
+    BF::path filedir;
+    if (BASEPATH == "") {
+        filedir = BF::path(FILEPATH).parent_path() / "files";
+    } else {
+        filedir = BF::path(BASEPATH) / "internals" / "cpp-src" / "test" / "files";
+    }
+    BF::create_directory(filedir / "tmp");
+    return filedir;
+}
+
+std::string writeTempFile(const std::string &name,
+                          const std::string &contents) {
+    std::string filename = (getTestFileDir() / "tmp" / name).string();
+    std::ofstream f(filename, std::ios_base::out | std::ios_base::binary);
+    f << contents;
+    return filename;
+}
+
+std::string readFile(const std::string &filename) {
+    std::ifstream f(filename, std::ios_base::in | std::ios_base::binary);
+    std::stringstream ss;
+    ss << f.rdbuf();
+    return ss.str();
+}
+
+
+TEST(SamMixerTest, KeepsMatePairsTogether) {
+    std::string sam1 = writeTempFile("mix_paired.sam",
+                                     "@HD\tVN:1.4\n"
+                                     "p1\t99\tTPP\n"
+                                     "p1\t147\tTPP\n"
+                                     "p2\t99\tTPP\n"
+                                     "p2\t147\tTPP\n");
+    std::string sam2 = writeTempFile("mix_unpaired.sam",
+                                     "@HD\tVN:1.4\n"
+                                     "@SQ\tSN:TPP\tLN:50\n"
+                                     "u1\t0\tTPP\n"
+                                     "u2\t16\tTPP\n"
+                                     "u3\t0\tTPP\n");
+    std::string out = (getTestFileDir() / "tmp" / "mix_out.sam").string();
+    sam_mixer::mixSam({sam1, sam2}, out);
+    std::string expected = "p1\t99\tTPP\n"
+                           "p1\t147\tTPP\n"
+                           "u1\t0\tTPP\n"
+                           "p2\t99\tTPP\n"
+                           "p2\t147\tTPP\n"
+                           "u2\t16\tTPP\n"
+                           "u3\t0\tTPP\n";
+    EXPECT_EQ(expected, readFile(out));
+}
+
+TEST(SamMixerTest, MateUnmapped) {
+    std::string sam1 = writeTempFile("mix_mate_unmapped.sam",
+                                     "p1\t73\tTPP\n"
+                                     "p2\t99\tTPP\n"
+                                     "p2\t147\tTPP\n");
+    std::string sam2 = writeTempFile("mix_empty.sam", "@HD\tVN:1.4\n");
+    std::string out = (getTestFileDir() / "tmp" / "mix_out2.sam").string();
+    sam_mixer::mixSam({sam1, sam2}, out);
+    EXPECT_EQ("p1\t73\tTPP\np2\t99\tTPP\np2\t147\tTPP\n", readFile(out));
+}
+
+TEST(SamMixerTest, AlternatesMultipleInputs) {
+    std::string sam1 = writeTempFile("mix_multi1.sam", "a1\t0\tTPP\na2\t0\tTPP\n");
+    std::string sam2 = writeTempFile("mix_multi2.sam", "b1\t0\tTPP\n");
+    std::string sam3 = writeTempFile("mix_multi3.sam", "c1\t0\tTPP\nc2\t0\tTPP\n");
+    std::string out = (getTestFileDir() / "tmp" / "mix_multi_out.sam").string();
+    sam_mixer::mixSam({sam1, sam2, sam3}, out);
+    EXPECT_EQ("a1\t0\tTPP\nb1\t0\tTPP\nc1\t0\tTPP\na2\t0\tTPP\nc2\t0\tTPP\n", readFile(out));
+}
+
+TEST(SamMixerTest, AnyOrderKeepsAllRecordsAndPairs) {
+    std::string sam1 = writeTempFile("mix_any1.sam",
+                                     "@HD\tVN:1.4\n"
+                                     "p1\t99\tTPP\n"
+                                     "p1\t147\tTPP\n"
+                                     "p2\t73\tTPP");
+    std::string sam2 = writeTempFile("mix_any2.sam",
+                                     "u1\t0\tTPP\n"
+                                     "p3\t99\tTPP\n"
+                                     "p3\t147\tTPP\n");
+    std::string out = (getTestFileDir() / "tmp" / "mix_any_out.sam").string();
+    sam_mixer::mixSam({sam1, sam2}, out, true);
+    std::string s = readFile(out);
+    EXPECT_EQ(std::string::npos, s.find("@HD"));
+    EXPECT_NE(std::string::npos, s.find("p1\t99\tTPP\np1\t147\tTPP\n"));
+    EXPECT_NE(std::string::npos, s.find("p3\t99\tTPP\np3\t147\tTPP\n"));
+    EXPECT_NE(std::string::npos, s.find("p2\t73\tTPP\n"));
+    EXPECT_NE(std::string::npos, s.find("u1\t0\tTPP\n"));
+    EXPECT_EQ(size_t(6), size_t(std::count(s.begin(), s.end(), '\n')));
+}
+
+TEST(SamMixerTest, FastqKeepsMatePairsTogether) {
+    std::string fq1 = writeTempFile("mix_pairs.fastq",
+                                    "@r1 1:N\nACGT\n+\nIIII\n"
+                                    "@r1 2:N\nTTTT\n+\nIIII\n"
+                                    "@r2\nGGGG\n+\nIIII\n");
+    std::string fq2 = writeTempFile("mix_merged.fastq",
+                                    "@m1\nCCCC\n+\nIIII\n"
+                                    "@m2\nAAAA\n+\nIIII\n");
+    std::string out = (getTestFileDir() / "tmp" / "mix_out.fastq").string();
+    sam_mixer::mixSam({fq1, fq2}, out, false, true);
+    std::string expected = "@r1 1:N\nACGT\n+\nIIII\n"
+                           "@r1 2:N\nTTTT\n+\nIIII\n"
+                           "@m1\nCCCC\n+\nIIII\n"
+                           "@r2\nGGGG\n+\nIIII\n"
+                           "@m2\nAAAA\n+\nIIII\n";
+    EXPECT_EQ(expected, readFile(out));
+}
+
+TEST(SamMixerTest, ErrorOnMissingInput) {
+    std::string sam1 = (getTestFileDir() / "does_not_exist.sam").string();
+    std::string out = (getTestFileDir() / "tmp" / "mix_out3.sam").string();
+    EXPECT_THROW(sam_mixer::mixSam({sam1, sam1}, out), std::runtime_error);
+}
+
+
+int main(int argc, char **argv) {
+    ::testing::InitGoogleTest(&argc, argv);
+    if (argc > 1) {
+        BASEPATH = argv[1];
+    }
+    return RUN_ALL_TESTS();
+}
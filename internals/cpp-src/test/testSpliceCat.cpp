@@ -0,0 +1,69 @@
+/*-----------------------------------------------------------------------
+ * This file is a part of ShapeMapper, and is licensed under the terms  *
+ * of the MIT license. Copyright 2018 Steven Busan.                     *
+ *----------------------------------------------------------------------*/
+
+#include <fstream>
+#include <sstream>
+
+#include <boost/filesystem.hpp>
+
+#include "gtest/gtest.h"
+#include "SpliceCat.cpp"
+
+namespace BF = boost::filesystem;
+
+
+std::string FILEPATH = __FILE__;
+std::string BASEPATH = "";
+
+
+BF::path getTestFileDir() {
+    BF::path filedir;
+    if (BASEPATH == "") {
+        filedir = BF::path(FILEPATH).parent_path() / "files";
+    } else {
+        filedir = BF::path(BASEPATH) / "internals" / "cpp-src" / "test" / "files";
+    }
+    BF::create_directory(filedir / "tmp");
+    return filedir;
+}
+
+std::string readFile(const std::string &filename) {
+    std::ifstream f(filename, std::ios_base::in | std::ios_base::binary);
+    std::stringstream ss;
+    ss << f.rdbuf();
+    return ss.str();
+}
+
+
+TEST(SpliceCatTest, ConcatenatesFiles) {
+    std::string in = (getTestFileDir() / "3_R1.fastq").string();
+    std::string out = (getTestFileDir() / "tmp" / "splice_cat_out.fastq").string();
+    splice_cat::concatFiles({in, in}, out);
+    std::string expected = readFile(in) + readFile(in);
+    EXPECT_EQ(expected, readFile(out));
+}
+
+TEST(SpliceCatTest, WritesSeparatorBetweenFiles) {
+    std::string in = (getTestFileDir() / "3_R1.fastq").string();
+    std::string out = (getTestFileDir() / "tmp" / "splice_cat_sep_out.fastq").string();
+    splice_cat::concatFiles({in, in, in}, out, "\n");
+    std::string s = readFile(in);
+    EXPECT_EQ(s + "\n" + s + "\n" + s, readFile(out));
+}
+
+TEST(SpliceCatTest, ErrorOnMissingInput) {
+    std::string in = (getTestFileDir() / "does_not_exist.fastq").string();
+    std::string out = (getTestFileDir() / "tmp" / "splice_cat_missing_out.fastq").string();
+    EXPECT_THROW(splice_cat::concatFiles({in}, out), std::runtime_error);
+}
+
+
+int main(int argc, char **argv) {
+    ::testing::InitGoogleTest(&argc, argv);
+    if (argc > 1) {
+        BASEPATH = argv[1];
+    }
+    return RUN_ALL_TESTS();
+}
@@ -35,6 +35,10 @@ class Component():
         self.parent_component = None
         self.proc = None
         self.hung = False
+        # if True, may share a run group with other flagged entry
+        # components in the same parent component (see
+        # Pipeline.calc_run_order())
+        self.run_with_siblings = False
         self.id = rand_id()
         self.progmon = None
         self.gv_props = {"style": '',
@@ -452,17 +456,20 @@ class Component():
 
     def collect_edges(self):
         edges = []
+        seen = set()
         nodes = self.collect_component_nodes()
         for from_node in nodes:
             for to_node in from_node.output_nodes:
                 edge = Edge(from_node,
                             to_node)
-                if edge not in edges:
+                if edge not in seen:
+                    seen.add(edge)
                     edges.append(edge)
             if from_node.input_node is not None:
                 edge = Edge(from_node.input_node,
                             from_node)
-                if edge not in edges:
+                if edge not in seen:
+                    seen.add(edge)
                     edges.append(edge)
         return edges
 
@@ -653,7 +660,7 @@ class Component():
             print("About to start process for {}...".format(self.get_name()))
         kwargs = {"shell":True,
                   "executable":"/bin/bash",
-                  "preexec_fn": os.setsid}
+                  "start_new_session": True}
         try:
             kwargs["stdout"] = open(self.stdout.output_nodes[0].filename, "w")
         except AttributeError:
@@ -9,9 +9,11 @@ counting.
 #  of the MIT license. Copyright 2018 Steven Busan.                     #
 # --------------------------------------------------------------------- #
 
+import inspect
 import os
+import shutil
 import subprocess
-from math import log2
+from math import ceil
 
 from pyshapemap.component import *
 from pyshapemap.util import require_explicit_kwargs, sanitize
@@ -23,6 +25,10 @@ from pyshapemap.connect import connect
 this_dir = os.path.dirname(os.path.realpath(__file__))
 bin_dir = os.path.join(this_dir, "../../bin")
 pyexe = "python3"
+# standard-library-only helpers that just stream text between processes.
+# Use PyPy if available, since these spend nearly all their time in
+# line-at-a-time I/O
+stream_pyexe = shutil.which("pypy3") or pyexe
 
 # hacks for debugging
 DISABLE_MERGING = False
@@ -30,6 +36,51 @@ DISABLE_MERGING = False
 
 # TODO: expose more module-specific params: could just forward custom args, kwargs to each process
 
+
+def _maybe_pugz(node, nthreads):
+    """
+    Return the filename placeholder for an input node, wrapped in a
+    decompressing process substitution if the input is gzipped. Uses
+    pugz (parallel decompression) if available, otherwise gzip.
+    pugz needs a seekable file, so named pipes always go through gzip.
+    """
+    placeholder = "{" + node.get_name() + "}"
+    if not node.get_extension().endswith("gz"):
+        return placeholder
+    if ( not isinstance(node.input_node, PipeNode) and
+         shutil.which("pugz") is not None ):
+        return "<(pugz -t {} {})".format(nthreads, placeholder)
+    return "<(gzip -dc {})".format(placeholder)
+
+
+def _attach_input(node, value):
+    """
+    Set an input node's source from a constructor argument, either a
+    filename or an upstream node. Does nothing if value is None.
+    """
+    if value is None:
+        return
+    if isinstance(value, str):
+        node.set_file(value)
+    else:
+        connect(value, node)
+
+
+def _histogram_tables(stdout):
+    """
+    Return the read length and mutations per read histogram tables
+    printed by a mutation counter, or an empty string if not present.
+    """
+    separator = "--------------------"
+    start = stdout.find("Read lengths\n")
+    if start == -1:
+        return ""
+    end = stdout.rfind(separator)
+    if end < start:
+        return ""
+    return stdout[start:end + len(separator)]
+
+
 class FastaFormatChecker(Component):
     def __init__(self,
                  fasta=None,
@@ -40,16 +91,12 @@ class FastaFormatChecker(Component):
         self.add(OutputNode(name="corrected",
                             extension="passthrough",
                             parallel=False))
-        if fasta is not None:
-            if isinstance(fasta, str):
-                self.fasta.set_file(fasta)
-            elif isinstance(fasta, Node):
-                connect(fasta, self.fasta)
+        _attach_input(self.fasta, fasta)
         self.add(StdoutNode())
         self.add(StderrNode())
 
     def cmd(self):
-        cmd = [pyexe,
+        cmd = [stream_pyexe,
                os.path.join(bin_dir, "check_fasta_format.py"),
                "{fasta}",
                "{corrected}"]
@@ -62,7 +109,9 @@ class QualityTrimmer(Component):
                  min_qual=None,
                  window=None,
                  min_length=None,
+                 nproc=4,
                  **kwargs):
+        self.nproc = nproc
         super().__init__(**kwargs)
         self.min_qual = min_qual
         self.min_length = min_length
@@ -76,7 +125,7 @@ class QualityTrimmer(Component):
         self.add(StderrNode())
 
     def cmd(self):
-        cmd = "shapemapper_read_trimmer -i {fastq} -o {trimmed}"
+        cmd = "shapemapper_read_trimmer -i {} -o {{trimmed}}".format(_maybe_pugz(self.fastq, self.nproc))
         if self.min_qual is not None:
             cmd += " -p {min_qual}"
         if self.min_length is not None:
@@ -87,7 +136,10 @@ class QualityTrimmer(Component):
 
 # NOTE: this is only used so bbmerge doesn't crash with pipe inputs
 class Interleaver(Component):
-    def __init__(self, **kwargs):
+    def __init__(self,
+                 nproc=4,
+                 **kwargs):
+        self.nproc = nproc
         super().__init__(**kwargs)
         self.add(InputNode(name="R1"))
         self.add(InputNode(name="R2"))
@@ -96,17 +148,21 @@ class Interleaver(Component):
         self.add(StderrNode())
 
     def cmd(self):
-        cmd = [pyexe,
+        cmd = [stream_pyexe,
                os.path.join(bin_dir, "interleave_fastq.py"),
-               "{R1}", "{R2}", "{interleaved}"]
+               _maybe_pugz(self.R1, self.nproc),
+               _maybe_pugz(self.R2, self.nproc),
+               "{interleaved}"]
         return cmd
 
 
 class Tab6Interleaver(Component):
     def __init__(self,
                  separate_files=False,
+                 nproc=4,
                  **kwargs):
         self.separate_files = separate_files
+        self.nproc = nproc
         super().__init__(**kwargs)
 
         if self.separate_files:
@@ -119,13 +175,13 @@ class Tab6Interleaver(Component):
         self.add(StderrNode())
 
     def cmd(self):
-        cmd = [pyexe,
+        cmd = [stream_pyexe,
                os.path.join(bin_dir, "tab6_interleave.py")]
         if self.separate_files:
-            cmd += ["--R1", "{R1}",
-                    "--R2", "{R2}"]
+            cmd += ["--R1", _maybe_pugz(self.R1, self.nproc),
+                    "--R2", _maybe_pugz(self.R2, self.nproc)]
         else:
-            cmd += ["--input", "{fastq}"]
+            cmd += ["--input", _maybe_pugz(self.fastq, self.nproc)]
 
         cmd += ["--output", "{tab6}"]
 
@@ -146,7 +202,7 @@ class Deinterleaver(Component):
         #cmd = "paste - - - - - - - - < {interleaved} "
         #cmd += "| tee >(cut -f 1-4 | tr '\\t' '\\n' > {R1}) "
         #cmd += "| cut -f 5-8 | tr '\\t' '\\n' > {R2}"
-        cmd = [pyexe,
+        cmd = [stream_pyexe,
                os.path.join(bin_dir, "deinterleave_fastq.py"),
                "--input", "{interleaved}",
                "--R1-out", "{R1}",
@@ -171,42 +227,39 @@ class Appender(Component):
                             extension="passthrough"))
         self.add(StderrNode())
         self.add_extra_newline = add_extra_newline
-        if add_extra_newline:
-            # TODO: maybe hide temp output nodes or color differently in flowchart
-            self.add(OutputNode(name="linebreak",
-                                extension="txt",
-                                parallel=False))
 
         # Option to set input files using args to constructor
         if inputs is not None:
-            for i in range(len(inputs)):
-                f = inputs[i]
-                name = "f{}".format(i + 1)
+            nodes = []
+            for i, f in enumerate(inputs, 1):
+                name = "f{}".format(i)
                 if isinstance(f, str):
-                    self.add(InputNode(name=name,
-                                       filename=f))
+                    nodes.append(InputNode(name=name,
+                                           filename=f))
                 elif isinstance(f, Node):
                     node = InputNode(name=name)
-                    self.add(node)
                     connect(f, node)
+                    nodes.append(node)
+            self.add(nodes)
 
     def cmd(self):
+        # shapemapper_splice_cat moves data with splice()/sendfile()
+        # instead of copying it through a cat process and a shell redirect
+        cmd = ["shapemapper_splice_cat"]
         if self.add_extra_newline:
             # for concatenating some files (like FASTA), add an extra linebreak
             # between files to ensure headers appear on their own lines
-            cmd = "echo -e '\n' > {linebreak}; cat".split(' ')
-            for i in range(len(self.input_nodes)):
-                cmd += ["{{{}}}".format(self.input_nodes[i].get_name())]
-                if i < len(self.input_nodes) - 1:
-                    cmd += ["{linebreak}"]
-        else:
-            cmd = ["cat"]
-            for node in self.input_nodes:
-                cmd += ["{{{}}}".format(node.get_name())]
-        cmd += [">", "{appended}"]
+            cmd += ["--sep", "$'\\n\\n'"]
+        cmd += ["-o", "{appended}"]
+        cmd += ["{" + node.get_name() + "}" for node in self.input_nodes]
         return cmd
 
 
+# bbmerge thread scaling falls off past this point, so higher nproc values
+# are split across multiple merger instances (see ShardedMerger)
+BBMERGE_MAX_THREADS = 8
+
+
 class Merger(Component):
     # TODO: expose more parameters
     # Note: "merged" output stream now includes both merged and
@@ -271,22 +324,111 @@ class Merger(Component):
 
 class SamMixer(Component):
     '''
-    Mix two SAM alignment streams, skipping header lines.
+    Mix SAM alignment streams, skipping header lines.
+
+    By default, alignments are taken from each input in turn. With
+    any_order=True, alignments are taken from whichever input is ready
+    (needed when inputs are parallel aligner instances fed from a
+    single splitter, or one stalled input could block the others).
     '''
-    def __init__(self, **kwargs):
+    # input node names and extension
+    record_type = "sam"
+
+    def __init__(self,
+                 num_inputs=2,
+                 any_order=False,
+                 **kwargs):
+        self.any_order = any_order
         super().__init__(**kwargs)
-        self.add(InputNode(name="sam1", extension='sam'))
-        self.add(InputNode(name="sam2", extension='sam'))
-        self.add(OutputNode(name="mixed", extension='sam'))
+        for i in range(num_inputs):
+            self.add(InputNode(name="{}{}".format(self.record_type, i + 1),
+                               extension=self.record_type))
+        self.add(OutputNode(name="mixed", extension=self.record_type))
         self.add(StderrNode())
 
     def cmd(self):
-        cmd = [pyexe,
-               os.path.join(bin_dir, "mix_sam.py"),
-               "{sam1}", "{sam2}", "{mixed}"]
+        cmd = ["shapemapper_sam_mixer"]
+        if self.any_order:
+            cmd += ["--any_order"]
+        if self.record_type == "fastq":
+            cmd += ["--fastq"]
+        cmd += ["-o", "{mixed}"]
+        cmd += ["{" + node.get_name() + "}" for node in self.input_nodes]
+        return cmd
+
+
+class FastqMixer(SamMixer):
+    '''
+    Mix FASTQ streams. Consecutive records with the same read name
+    (mate pairs) are kept together.
+    '''
+    record_type = "fastq"
+
+
+class LineSplitter(Component):
+    '''
+    Distribute records from a text stream round-robin across multiple
+    outputs (e.g. to feed parallel aligner instances).
+    '''
+    def __init__(self,
+                 num_outputs=2,
+                 lines_per_record=1,
+                 **kwargs):
+        self.lines_per_record = lines_per_record
+        super().__init__(**kwargs)
+        self.add(InputNode(name="input"))
+        for i in range(num_outputs):
+            self.add(OutputNode(name="shard{}".format(i + 1),
+                                extension="passthrough"))
+        self.add(StderrNode())
+
+    def cmd(self):
+        cmd = ["shapemapper_line_splitter",
+               "-n", str(self.lines_per_record),
+               "-i", "{input}"]
+        cmd += ["{" + node.get_name() + "}" for node in self.output_nodes
+                if node.get_name().startswith("shard")]
         return cmd
 
 
+class ShardedMerger(Component):
+    '''
+    Run multiple bbmerge instances over interleaved chunks of the input,
+    since a single bbmerge process does not scale well past
+    BBMERGE_MAX_THREADS threads.
+
+    Output record order is not preserved.
+    '''
+    def __init__(self,
+                 nproc=None,
+                 threads_per_shard=BBMERGE_MAX_THREADS,
+                 **kwargs):
+        super().__init__(**kwargs)
+        n_shards = max(2, int(ceil(nproc / threads_per_shard)))
+        # each record is an R1/R2 pair of 4-line fastq records
+        splitter = LineSplitter(num_outputs=n_shards,
+                                lines_per_record=8)
+        mergers = []
+        for i in range(n_shards):
+            # give any remaining threads to the first instances
+            shard_nproc = nproc // n_shards
+            if i < nproc % n_shards:
+                shard_nproc += 1
+            mergers.append(Merger(name="Merger_{}".format(i + 1),
+                                  nproc=max(1, shard_nproc)))
+        mixer = FastqMixer(num_inputs=n_shards,
+                           any_order=True)
+        for i, merger in enumerate(mergers):
+            connect(splitter["shard{}".format(i + 1)], merger.interleaved_fastq)
+            connect(merger.output, mixer["fastq{}".format(i + 1)])
+
+        self.add(splitter)
+        self.add(mergers)
+        self.add(mixer)
+        self.add(splitter.input, alias="interleaved_fastq")
+        self.add(mixer.mixed, alias="output")
+
+
 class BowtieIndexBuilder(Component):
     out_extension = ""
 
@@ -308,6 +450,11 @@ class BowtieIndexBuilder(Component):
         return cmd
 
 
+# bowtie2 thread scaling falls off past this point, so higher nproc values
+# are split across multiple aligner instances (see BowtieAlignerMixedInput)
+BOWTIE_MAX_THREADS = 16
+
+
 class BowtieAligner(Component):
     def __init__(self,
                  reorder=False,
@@ -316,8 +463,10 @@ class BowtieAligner(Component):
                  maxins=None,
                  max_search_depth=None,
                  max_reseed=None,
+                 unpaired=False,
                  **kwargs):
         self.reorder = reorder
+        self.unpaired = unpaired
         self.nproc = nproc
         self.disable_soft_clipping = disable_soft_clipping
         self.maxins = 800
@@ -337,9 +486,16 @@ class BowtieAligner(Component):
         super().__init__(**kwargs)
         self.add(InputNode(name="index",
                            parallel=False))
-        self.add(StdinNode(name="tab6",
-                           extension="tab6",
-                           parallel=True))
+        if self.unpaired:
+            # unpaired reads can be passed to bowtie2 as plain fastq,
+            # no need to convert to tab6
+            self.add(StdinNode(name="fastq",
+                               extension="fastq",
+                               parallel=True))
+        else:
+            self.add(StdinNode(name="tab6",
+                               extension="tab6",
+                               parallel=True))
         self.add(OutputNode(name="aligned",
                             extension="sam",
                             parallel=True))
@@ -386,11 +542,16 @@ class BowtieAligner(Component):
         if self.reorder:
             cmd += ["--reorder"] # output in same order as input for debugging purposes
 
-        cmd += ["--tab6", "-"]
-        #cmd += ["-U", "{fastq}"]
+        if self.unpaired:
+            cmd += ["-U", "-"]
+        else:
+            cmd += ["--tab6", "-"]
 
         cmd += ["-x", "{index}"]
-        cmd += ["<", "{tab6}"]
+        if self.unpaired:
+            cmd += ["<", "{fastq}"]
+        else:
+            cmd += ["<", "{tab6}"]
         cmd += ["-S", "{aligned}"]
         #cmd += [">", "{aligned}"]
         cmd = ' '.join(cmd)
@@ -436,16 +597,18 @@ class StarIndexBuilder(Component):
         # min(14, log2(GenomeLength)/2 - 1) to handle "short" reference
         # sequences (e.g. bacterial genomes or smaller), so the called script calculates
         # this value automatically.
-        # STAR seems to segfault if genomeSAindexNbases is too high, even by a small amount
+        # STAR seems to segfault if genomeSAindexNbases is too high, even by a small amount,
+        # so round down, using integer log2 (bit_length()-1) to avoid float rounding
         # The manual also recommends setting genomeChrBinNbits to
         # min(18, log2(GenomeLength/NumberOfReferences))
+        log2_length = self.total_target_length.bit_length() - 1
         if genomeSAindexNbase == 0:
-            self.genomeSAindexNbase = int(round(min(14, log2(self.total_target_length) / 2.0 - 1)))
+            self.genomeSAindexNbase = min(14, log2_length // 2 - 1)
         else:
             # allow setting directly (small target sequences may still segfault and require a
             # lower value (3 or 2))
             self.genomeSAindexNbase = genomeSAindexNbase
-        self.genomeChrBinNbits = int(min(18, log2(self.total_target_length)/self.num_targets))
+        self.genomeChrBinNbits = min(18, log2_length // self.num_targets)
 
     def cmd(self):
         cmd = ["STAR",
@@ -479,7 +642,7 @@ class StarAligner(Component):
         self.reorder = reorder
         self.nproc = nproc
         self.disable_soft_clipping = disable_soft_clipping
-        self.shared_index = shared_index # use shared-memory index (seems buggy)
+        self.shared_index = shared_index # attach to index preloaded by StarIndexLoader
         self.fixed_index = fixed_index # use index located at given path
         # Note: STAR does not natively support mixed paired/unpaired input or
         #       interleaved fastq
@@ -528,7 +691,10 @@ class StarAligner(Component):
         if self.reorder:
             cmd += ["--outSAMorder", "PairedKeepInputOrder"]
         if self.shared_index:
-            cmd += ["--genomeLoad", "LoadAndRemove"]
+            # index is loaded (and later removed) once for all aligners
+            # by StarIndexLoader and StarIndexUnloader. Concurrent
+            # LoadAndRemove from sibling aligners can deadlock.
+            cmd += ["--genomeLoad", "LoadAndKeep"]
         if self.fixed_index is not None:
             cmd += ["--genomeDir", self.fixed_index]
         else:
@@ -550,6 +716,54 @@ class StarAligner(Component):
         return open(os.path.join(self.logs.output_nodes[0].foldername, "Log.final.out"), "rU").read()
 
 
+class StarIndexLoader(Component):
+    '''
+    Load a STAR index into shared memory once, so that all STAR
+    aligners using it can attach to the same copy.
+    '''
+    def __init__(self,
+                 **kwargs):
+        super().__init__(**kwargs)
+        self.add(InputNode(name="index",
+                           isfolder=True,
+                           parallel=False))
+        self.add(OutputNode(name="logs",
+                            isfolder=True))
+        self.add(StdoutNode())
+        self.add(StderrNode())
+
+    def cmd(self):
+        cmd = ["STAR",
+               "--genomeLoad", "LoadAndExit",
+               "--genomeDir", "{index}",
+               "--outFileNamePrefix", "{logs}/"]
+        return cmd
+
+
+class StarIndexUnloader(Component):
+    '''
+    Remove a STAR index loaded by StarIndexLoader from shared memory.
+    Must be placed after all Samples using the index in the pipeline.
+    '''
+    def __init__(self,
+                 **kwargs):
+        super().__init__(**kwargs)
+        self.add(InputNode(name="index",
+                           isfolder=True,
+                           parallel=False))
+        self.add(OutputNode(name="logs",
+                            isfolder=True))
+        self.add(StdoutNode())
+        self.add(StderrNode())
+
+    def cmd(self):
+        cmd = ["STAR",
+               "--genomeLoad", "Remove",
+               "--genomeDir", "{index}",
+               "--outFileNamePrefix", "{logs}/"]
+        return cmd
+
+
 class StarAlignerMixedInput(Component):
     '''
     Wrapper for STAR aligner to support mixed paired/unpaired input
@@ -599,6 +813,17 @@ class BowtieAlignerMixedInput(Component):
     '''
     Wrapper for Bowtie2 aligner to support interleaved fastq input with
     mixed paired/unpaired.
+
+    bowtie2's --interleaved mode requires every record to have a mate,
+    so mixed input still goes through tab6. If the input is known to
+    contain only unpaired reads, the fastq is streamed to bowtie2
+    directly and the Tab6Interleaver stage is skipped.
+
+    If nproc is larger than BOWTIE_MAX_THREADS, reads are split across
+    multiple bowtie2 instances and their outputs recombined (unless
+    output order must be preserved, in which case a single instance
+    uses all nproc threads). Threads are divided as evenly as possible
+    between instances, so the total never exceeds nproc.
     '''
     def __init__(self,
                  reorder=False,
@@ -607,74 +832,261 @@ class BowtieAlignerMixedInput(Component):
                  maxins=None,
                  max_search_depth=None,
                  max_reseed=None,
+                 unpaired=False,
                  **kwargs):
         super().__init__(**kwargs)
-        tab6interleaver = Tab6Interleaver()
         aligner_kwargs = dict(reorder=reorder,
                               disable_soft_clipping=disable_soft_clipping,
                               nproc=nproc,
                               maxins=maxins,
                               max_reseed=max_reseed,
                               max_search_depth=max_search_depth)
-        aligner = BowtieAligner(name="BowtieAligner",
-                                **aligner_kwargs)
-        connect(tab6interleaver.tab6, aligner.tab6)
-        self.add([tab6interleaver,
-                  aligner])
-        self.add(tab6interleaver.fastq, alias="interleaved_fastq")
-        self.add(aligner.index, alias="index")
-        self.add(aligner.aligned, alias="aligned")
+        n_instances = 1
+        if nproc is not None and not reorder:
+            n_instances = int(ceil(nproc / BOWTIE_MAX_THREADS))
+
+        if n_instances == 1:
+            aligner = BowtieAligner(name="BowtieAligner",
+                                    unpaired=unpaired,
+                                    **aligner_kwargs)
+            if unpaired:
+                self.add(aligner)
+                self.add(aligner.fastq, alias="interleaved_fastq")
+            else:
+                tab6interleaver = Tab6Interleaver()
+                connect(tab6interleaver.tab6, aligner.tab6)
+                self.add([tab6interleaver,
+                          aligner])
+                self.add(tab6interleaver.fastq, alias="interleaved_fastq")
+            self.add(aligner.index, alias="index")
+            self.add(aligner.aligned, alias="aligned")
+            return
+
+        # (shared input node must be added before any internal components)
+        self.add(SharedInputNode(name="index"))
+        aligners = []
+        for i in range(n_instances):
+            # give any remaining threads to the first instances
+            aligner_kwargs["nproc"] = nproc // n_instances
+            if i < nproc % n_instances:
+                aligner_kwargs["nproc"] += 1
+            aligners.append(BowtieAligner(name="BowtieAligner_{}".format(i + 1),
+                                          unpaired=unpaired,
+                                          **aligner_kwargs))
+        if unpaired:
+            splitter = LineSplitter(num_outputs=n_instances,
+                                    lines_per_record=4)
+            self.add(splitter.input, alias="interleaved_fastq")
+        else:
+            tab6interleaver = Tab6Interleaver()
+            splitter = LineSplitter(num_outputs=n_instances,
+                                    lines_per_record=1)
+            connect(tab6interleaver.tab6, splitter.input)
+            self.add(tab6interleaver)
+            self.add(tab6interleaver.fastq, alias="interleaved_fastq")
+        sam_mixer = SamMixer(num_inputs=n_instances,
+                             any_order=True)
+        for i, aligner in enumerate(aligners):
+            if unpaired:
+                connect(splitter["shard{}".format(i + 1)], aligner.fastq)
+            else:
+                connect(splitter["shard{}".format(i + 1)], aligner.tab6)
+            connect(aligner.aligned, sam_mixer["sam{}".format(i + 1)])
+        connect(self.index, [aligner.index for aligner in aligners])
+
+        self.add(splitter)
+        self.add(aligners)
+        self.add(sam_mixer)
+        self.add(sam_mixer.mixed, alias="aligned")
 
 
 
 
+def _pop_options(kwargs, init_func):
+    """
+    Remove and return the entries of kwargs accepted by one of the
+    _init_*_options() functions below, leaving the rest for
+    Component.__init__() (which rejects unrecognized parameters).
+    """
+    names = list(inspect.signature(init_func).parameters)[1:]
+    return {name: kwargs.pop(name) for name in names if name in kwargs}
+
+
+def _init_parser_options(component,
+                         min_mapq=None,
+                         right_align_ambig_dels=None,
+                         right_align_ambig_ins=None,
+                         random_primer_len=None,
+                         min_mutation_separation=None,
+                         min_qual=None,
+                         mutation_type=None,
+                         variant_mode=None,
+                         maxins=None,
+                         amplicon=None,
+                         input_is_unpaired=None,
+                         max_primer_offset=None,
+                         require_forward_primer_mapped=None,
+                         require_reverse_primer_mapped=None,
+                         trim_primers=None,
+                         debug_out=None,
+                         reference=None):
+    """
+    Store mutation parsing options on a component and add its input
+    nodes. Shared by MutationParser and MutationParserCounter.
+    """
+    component.min_mapq = min_mapq
+    component.right_align_ambig_dels = right_align_ambig_dels
+    component.right_align_ambig_ins = right_align_ambig_ins
+    component.random_primer_len = random_primer_len
+    component.min_mutation_separation = min_mutation_separation
+    component.min_qual = min_qual
+    component.mutation_type = mutation_type
+    component.maxins = 800
+    component.input_is_unpaired = input_is_unpaired
+    if maxins is not None:
+        component.maxins = maxins # analogous to bowtie2's --maxins param
+    component.variant_mode = variant_mode
+
+    component.amplicon = amplicon
+    component.max_primer_offset = max_primer_offset
+    component.require_forward_primer_mapped = require_forward_primer_mapped
+    component.require_reverse_primer_mapped = require_reverse_primer_mapped
+    component.trim_primers = trim_primers
+
+    component.write_debug_out = debug_out
+
+    component.add(InputNode(name="input"))
+    if component.amplicon:
+        component.add(InputNode(name="primers"))
+    # target sequences, needed if aligner does not output MD tags
+    component.use_reference = reference
+    if component.use_reference:
+        component.add(InputNode(name="reference"))
+
+
+def _parser_args(component):
+    """
+    Return command-line arguments for the options stored by
+    _init_parser_options().
+    """
+    cmd = []
+    if component.min_mapq is not None:
+        cmd += ["-m", "{}".format(component.min_mapq)]
+    if component.right_align_ambig_dels is not None and component.right_align_ambig_dels:
+        cmd += ["--right_align_ambig_dels"]
+    if component.right_align_ambig_ins is not None and component.right_align_ambig_ins:
+        cmd += ["--right_align_ambig_ins"]
+    if component.random_primer_len is not None:
+        cmd += ["--exclude_3prime", str(component.random_primer_len+1)]
+    if component.min_mutation_separation is not None:
+        cmd += ["--max_internal_match", str(component.min_mutation_separation-1)]
+    if component.min_qual is not None:
+        cmd += ["--min_qual", str(component.min_qual)]
+    if component.mutation_type != '':
+        cmd += ["--use_only_mutation_type", "{mutation_type}"]
+    if component.maxins is not None and component.maxins:
+        cmd += ["--max_paired_fragment_length", str(component.maxins)]
+    if component.input_is_unpaired is not None and component.input_is_unpaired:
+        cmd += ["--input_is_unpaired"]
+    if component.variant_mode is not None and component.variant_mode:
+        cmd += ["--variant_mode"]
+    if component.amplicon:
+        cmd += ["--primers", "{primers}"]
+    if component.use_reference:
+        cmd += ["--reference", "{reference}"]
+    cmd += ["--max_primer_offset", str(component.max_primer_offset)]
+    if component.require_forward_primer_mapped:
+        cmd += ["--require_forward_primer_mapped"]
+    if component.require_reverse_primer_mapped:
+        cmd += ["--require_reverse_primer_mapped"]
+    if component.trim_primers:
+        cmd += ["--trim_primers"]
+    if component.write_debug_out:
+        cmd += ["--debug_out", "{debug_out}"]
+    return cmd
+
+
+def _init_counter_options(component,
+                          target_length=None,
+                          primer_pairs=None,
+                          variant_out=None,
+                          mutations_out=None,
+                          per_read_histograms=False,
+                          separate_ambig_counts=None):
+    """
+    Store mutation counting options on a component and add its
+    parameter and output nodes. Shared by MutationCounter and
+    MutationParserCounter.
+    """
+    component.per_read_histograms = per_read_histograms
+    component.separate_ambig_counts = separate_ambig_counts
+
+    # target_length is either an int parameter, or an OutputNode outputting 
+    # a file containing the target_length parameter (this is to allow
+    # this component to get updated sequence length after sequence correction)
+    if isinstance(target_length, int):
+        component.target_length = target_length
+    elif isinstance(target_length, OutputNode):
+        component.add(ParameterNode(name="target_length"))
+        connect_nodes(target_length, component.target_length)
+
+    # number of amplicon primer pairs
+    if primer_pairs is None or isinstance(primer_pairs, int):
+        component.primer_pairs = primer_pairs
+    if isinstance(primer_pairs, OutputNode):
+        component.add(ParameterNode(name="primer_pairs"))
+        connect_nodes(primer_pairs, component.primer_pairs)
+
+    # a little convoluted, since this component can produce
+    # variable numbers of outputs, and want to also either accept
+    # explicit filepath or bool indicating filepath should be generated
+    # automatically
+    if variant_out is not None and variant_out:
+        kw = {"name": "variants"}
+        if isinstance(variant_out, str):
+            kw["filename"] = variant_out
+        component.add(OutputNode(parallel=False,
+                                 **kw))
+    if mutations_out is not None and mutations_out:
+        kw = {"name": "mutations"}
+        if isinstance(mutations_out, str):
+            kw["filename"] = mutations_out
+        component.add(OutputNode(parallel=False,
+                                 **kw))
+
+
+def _counter_args(component):
+    """
+    Return command-line arguments for the options stored by
+    _init_counter_options().
+    """
+    cmd = []
+    node_names = {n.get_name() for n in component.output_nodes}
+    if "variants" in node_names:
+        cmd += ["--variant_out", "{variants}"]
+    if "mutations" in node_names:
+        cmd += ["-c", "{mutations}"]
+
+    if component.target_length is not None:
+        cmd += ["--length", "{target_length}"]
+    if component.primer_pairs is not None:
+        cmd += ["--n_primer_pairs", "{primer_pairs}"]
+    if component.per_read_histograms:
+        cmd += ["--hist"]
+    if component.separate_ambig_counts is not None and component.separate_ambig_counts:
+        cmd += ["--separate_ambig_counts"]
+    return cmd
+
+
 class MutationParser(Component):
     def __init__(self,
-                 min_mapq=None,
-                 right_align_ambig_dels=None,
-                 right_align_ambig_ins=None,
-                 random_primer_len=None,
-                 min_mutation_separation=None,
-                 min_qual=None,
-                 mutation_type=None,
-                 variant_mode=None,
-                 maxins=None,
-                 amplicon=None,
-                 input_is_unpaired=None,
-                max_primer_offset=None,
-                require_forward_primer_mapped=None,
-                require_reverse_primer_mapped=None,
-                trim_primers=None,
-                debug_out=None,
                  **kwargs):
+        parser_kwargs = _pop_options(kwargs, _init_parser_options)
         self.min_mapq = 35 # FIXME: clarify or remove this, since this gets used for
                            # sequence variant correction instead of the lower default
                            # value of 30 for mutation counting
         super().__init__(**kwargs)
-        self.min_mapq = min_mapq
-        self.right_align_ambig_dels = right_align_ambig_dels
-        self.right_align_ambig_ins = right_align_ambig_ins
-        self.random_primer_len = random_primer_len
-        self.min_mutation_separation = min_mutation_separation
-        self.min_qual = min_qual
-        self.mutation_type = mutation_type
-        self.maxins = 800
-        self.input_is_unpaired = input_is_unpaired
-        if maxins is not None:
-            self.maxins = maxins # analogous to bowtie2's --maxins param
-        self.variant_mode = variant_mode
-
-        self.amplicon = amplicon
-        self.max_primer_offset = max_primer_offset
-        self.require_forward_primer_mapped = require_forward_primer_mapped
-        self.require_reverse_primer_mapped = require_reverse_primer_mapped
-        self.trim_primers = trim_primers
-
-        self.write_debug_out = debug_out
-
-        self.add(InputNode(name="input"))
-        if self.amplicon:
-            self.add(InputNode(name="primers"))
+        _init_parser_options(self, **parser_kwargs)
         self.add(OutputNode(name="parsed_mutations",
                             extension="mut",
                             parallel=True))
@@ -688,88 +1100,50 @@ class MutationParser(Component):
                "-i", "{input}",
                "-o", "{parsed_mutations}",
                "-w"]
-        if self.min_mapq is not None:
-            cmd += ["-m", "{}".format(self.min_mapq)]
-        if self.right_align_ambig_dels is not None and self.right_align_ambig_dels:
-            cmd += ["--right_align_ambig_dels"]
-        if self.right_align_ambig_ins is not None and self.right_align_ambig_ins:
-            cmd += ["--right_align_ambig_ins"]
-        if self.random_primer_len is not None:
-            cmd += ["--exclude_3prime", str(self.random_primer_len+1)]
-        if self.min_mutation_separation is not None:
-            cmd += ["--max_internal_match", str(self.min_mutation_separation-1)]
-        if self.min_qual is not None:
-            cmd += ["--min_qual", str(self.min_qual)]
-        if self.mutation_type != '':
-            cmd += ["--use_only_mutation_type", "{mutation_type}"]
-        if self.maxins is not None and self.maxins:
-            cmd += ["--max_paired_fragment_length", str(self.maxins)]
-        if self.input_is_unpaired is not None and self.input_is_unpaired:
-            cmd += ["--input_is_unpaired"]
-        if self.variant_mode is not None and self.variant_mode:
-            cmd += ["--variant_mode"]
-        if self.amplicon:
-            cmd += ["--primers", "{primers}"]
-        cmd += ["--max_primer_offset", str(self.max_primer_offset)]
-        if self.require_forward_primer_mapped:
-            cmd += ["--require_forward_primer_mapped"]
-        if self.require_reverse_primer_mapped:
-            cmd += ["--require_reverse_primer_mapped"]
-        if self.trim_primers:
-            cmd += ["--trim_primers"]
-        if self.write_debug_out:
-            cmd += ["--debug_out", "{debug_out}"]
+        cmd += _parser_args(self)
         #cmd += ["--debug"] # FIXME: remove
         return cmd
 
 
-class MutationCounter(Component):
+class MutationParserCounter(Component):
+    """
+    Parse mutations from aligned reads and count them in a single process
+    (shapemapper_parse_and_count), instead of passing parsed
+    mutations from a MutationParser to a MutationCounter through a pipe.
+    Accepts the kwargs of both components.
+    """
     def __init__(self,
-                 target_length=None,
-                 primer_pairs=None,
-                 variant_out=None,
-                 mutations_out=None,
-                 per_read_histograms=False,
-                 separate_ambig_counts=None,
                  **kwargs):
+        parser_kwargs = _pop_options(kwargs, _init_parser_options)
+        counter_kwargs = _pop_options(kwargs, _init_counter_options)
         super().__init__(**kwargs)
-        self.per_read_histograms = per_read_histograms
-        self.separate_ambig_counts = separate_ambig_counts
-        self.add(InputNode(name="mut"))
+        _init_parser_options(self, **parser_kwargs)
+        _init_counter_options(self, **counter_kwargs)
+        if self.write_debug_out:
+            self.add(OutputNode(name="debug_out", parallel=True))
+        self.add(StdoutNode())
+        self.add(StderrNode())
+
+    def cmd(self):
+        cmd = ["shapemapper_parse_and_count",
+               "-i", "{input}",
+               "-w"]
+        cmd += _parser_args(self)
+        cmd += _counter_args(self)
+        return cmd
+
+    def after_run_message(self):
+        # just display the histogram tables if present
+        return _histogram_tables(self.read_stdout())
 
-        # target_length is either an int parameter, or an OutputNode outputting 
-        # a file containing the target_length parameter (this is to allow
-        # this component to get updated sequence length after sequence correction)
-        if isinstance(target_length, int):
-            self.target_length = target_length
-        elif isinstance(target_length, OutputNode):
-            self.add(ParameterNode(name="target_length"))
-            connect_nodes(target_length, self.target_length)
-
-        # number of amplicon primer pairs
-        if primer_pairs is None or isinstance(primer_pairs, int):
-            self.primer_pairs = primer_pairs
-        if isinstance(primer_pairs, OutputNode):
-            self.add(ParameterNode(name="primer_pairs"))
-            connect_nodes(primer_pairs, self.primer_pairs)
-
-        # a little convoluted, since this component can produce
-        # variable numbers of outputs, and want to also either accept
-        # explicit filepath or bool indicating filepath should be generated
-        # automatically
-        if variant_out is not None and variant_out:
-            kw = {"name": "variants"}
-            if isinstance(variant_out, str):
-                kw["filename"] = variant_out
-            self.add(OutputNode(parallel=False,
-                                **kw))
-        if mutations_out is not None and mutations_out:
-            kw = {"name": "mutations"}
-            if isinstance(mutations_out, str):
-                kw["filename"] = mutations_out
-            self.add(OutputNode(parallel=False,
-                                **kw))
 
+class MutationCounter(Component):
+    def __init__(self,
+                 **kwargs):
+        counter_kwargs = _pop_options(kwargs, _init_counter_options)
+        super().__init__(**kwargs)
+        self.add(InputNode(name="mut"))
+        _init_counter_options(self, **counter_kwargs)
         self.add(StdoutNode())
         self.add(StderrNode())
 
@@ -778,42 +1152,12 @@ class MutationCounter(Component):
         cmd = ["shapemapper_mutation_counter", "-i"]
         cmd += ["{mut}"]
         cmd += ["-w"]
-        node_names = [n.get_name() for n in self.output_nodes]
-        if "variants" in node_names:
-            cmd += ["-v", "{variants}"]
-        if "mutations" in node_names:
-            cmd += ["-c", "{mutations}"]
-
-        if self.target_length is not None:
-            cmd += ["--length", "{target_length}"]
-        if self.primer_pairs is not None:
-            cmd += ["--n_primer_pairs", "{primer_pairs}"]
-        if self.per_read_histograms:
-            cmd += ["--hist"]
-        if self.separate_ambig_counts is not None and self.separate_ambig_counts:
-            cmd += ["--separate_ambig_counts"]
+        cmd += _counter_args(self)
         return cmd
 
     def after_run_message(self):
-        lines = self.read_stdout().splitlines()
         # just display the histogram tables if present
-        i = 0
-        start_i = 0
-        found_table = False
-        for i in range(len(lines)):
-            if lines[i] == "Read lengths":
-                start_i = i
-                found_table = True
-                break
-        end_i = 0
-        if found_table:
-            for i in range(len(lines)-1,-1,-1):
-                if lines[i] == "--------------------":
-                    end_i = i
-                    break
-            return "\n".join(lines[start_i:end_i+1])
-        else:
-            return ""
+        return _histogram_tables(self.read_stdout())
 
 
 class ProgressMonitor(Component):
@@ -829,7 +1173,11 @@ class ProgressMonitor(Component):
         self.add(StderrNode())
 
     def cmd(self):
-        cmd = "pv -f -p -e -b"
+        # exec so that bash is replaced by pv instead of forking it (bash
+        # only skips the fork for single commands without redirections).
+        # Redirections are still opened by the child, since input and
+        # output are usually named pipes and would block if opened here.
+        cmd = "exec pv -f -p -e -b"
         term_width, term_height = shutil.get_terminal_size()
         cmd += " -w " + str(term_width - 6)  # leave some room for indents
         if self.expected_bytes is not None:
@@ -844,7 +1192,7 @@ class ProgressMonitor(Component):
         kwargs = {"shell": True,
                   "executable": "/bin/bash",
                   "stderr": subprocess.PIPE,
-                  "preexec_fn": os.setsid}
+                  "start_new_session": True}
         self.proc = sp.Popen(self.format_command(self.cmd()),
                              **kwargs)
 
@@ -865,11 +1213,7 @@ class CalcProfile(Component):
         super().__init__(**kwargs)
         self.add(InputNode(name="target",
                            parallel=False))
-        if target is not None:
-            if isinstance(target, Node):
-                connect(target, self.target)
-            elif isinstance(target, str):
-                self.target.set_file(target)
+        _attach_input(self.target, target)
         self.add(OutputNode(name="profile",
                             parallel=False))
 
@@ -889,7 +1233,7 @@ class CalcProfile(Component):
         if self.target_name is not None:
             cmd += ["--rna", '"{}"'.format(self.target_name)]
         cmd += ["--counts"]
-        cmd += ["{{{}}}".format(n.get_name()) for n in self.input_nodes
+        cmd += ["{" + n.get_name() + "}" for n in self.input_nodes
                 if n.get_name().startswith("counts")]
         cmd += ["--out", "{profile}"]
         if self.mindepth is not None:
@@ -916,23 +1260,18 @@ class NormProfile(Component):
         if profile is not None:
             self.add(InputNode(name="profile",
                                parallel=False))
-            if isinstance(profile, str):
-                self.profile.set_file(profile)
-            else:
-                connect(profile, self.profile)
+            _attach_input(self.profile, profile)
             self.add(OutputNode(name="normed",
                                 parallel=False,
                                 assoc_rna=target_name))
         elif profiles is not None:
-            for i in range(len(profiles)):
+            for i, prof in enumerate(profiles):
                 name = "profile_{}".format(i + 1)
                 outname = "normed_{}".format(i + 1)
-                self.add(InputNode(name=name,
-                                   parallel=False))
-                if isinstance(profiles[i], str):
-                    self.__getattr__(name).set_file(profiles[i])
-                else:
-                    connect(profiles[i], self.__getattr__(name))
+                node = InputNode(name=name,
+                                 parallel=False)
+                self.add(node)
+                _attach_input(node, prof)
                 assoc_rna = None
                 try:
                     assoc_rna = target_names[i]
@@ -957,15 +1296,10 @@ class NormProfile(Component):
                os.path.join(bin_dir, "normalize_profiles.py"),
                "--warn-on-error", # don't crash if not enough data to normalize
                "--tonorm"]
-        for node in self.input_nodes:
-            name = node.get_name()
-            cmd += ["{{{}}}".format(name)]
-        cmd += ["--normout"]
-        for node in self.output_nodes:
-            if isinstance(node, (StdoutNode, StderrNode)):
-                continue
-            name = node.get_name()
-            cmd += ["{{{}}}".format(name)]
+        cmd.extend("{" + node.get_name() + "}" for node in self.input_nodes)
+        cmd.append("--normout")
+        cmd.extend("{" + node.get_name() + "}" for node in self.output_nodes
+                   if not isinstance(node, (StdoutNode, StderrNode)))
         return cmd
 
 # FIXME: add --primers input for primers file if provided
@@ -1006,10 +1340,10 @@ class RenderFigures(Component):
                "--maxbg", str(self.maxbg)]
         if self.amplicon:
             cmd += ["--primers", "{primers}"]
-        node_names = [n.get_name() for n in self.output_nodes]
+        node_names = {n.get_name() for n in self.output_nodes}
         if "profiles_fig" in node_names:
             cmd.extend(["--plot", "{profiles_fig}"])
-        if "histograms_fig":
+        if "histograms_fig" in node_names:
             cmd.extend(["--hist", "{histograms_fig}"])
         if self.assoc_rna is not None:
             cmd.extend(["--title", '"RNA: {}"'.format(self.assoc_rna)])
@@ -1144,6 +1478,10 @@ class ProfileHandler(Component):
         connect(profilenode, renderer.profile)
         connect(profilenode, mapped_depth_renderer.profile)
 
+        # these only depend on the finished profile, so run them at the same time
+        for c in [tabtoshaper, renderer, mapped_depth_renderer]:
+            c.run_with_siblings = True
+
 
 class SequenceCorrector(Component):
     # FIXME: clarify class names (right now very similar names for nested components)
@@ -1207,23 +1545,20 @@ class SplitByTarget(Component):
         self.add(StdoutNode())
         self.add(StderrNode())
         self.target_names = target_names
-        for i in range(len(target_names)):
+        for i, target_name in enumerate(target_names):
             self.add(OutputNode(name="rna_{}".format(i + 1),
                                 extension="passthrough",
-                                assoc_rna=target_names[i]))
+                                assoc_rna=target_name))
             # TODO: store dict of output nodes indexed by target name? less fragile than int index
 
     def cmd(self):
-        cmd = [pyexe,
+        cmd = [stream_pyexe,
                os.path.join(bin_dir, "split_by_target.py")]
         cmd += ['-i', "{input}"]
-        cmd += ['-n']
-        for n in self.target_names:
-            cmd += ['"'+n+'"']
-        cmd += ['-o']
-        for i in range(len(self.target_names)):
-            node_name = "rna_{}".format(i + 1)
-            cmd += ["{{{}}}".format(node_name)]
+        cmd.append('-n')
+        cmd.extend('"' + n + '"' for n in self.target_names)
+        cmd.append('-o')
+        cmd.extend("{{rna_{}}}".format(i + 1) for i in range(len(self.target_names)))
         return cmd
 
 
@@ -1238,20 +1573,18 @@ class GetSequenceLengths(Component):
         self.add(StdoutNode())
         self.add(StderrNode())
         self.target_names = target_names
-        for i in range(len(target_names)):
+        for i, target_name in enumerate(target_names):
             self.add(OutputNode(name="L{}".format(i + 1),
                                 extension="",
-                                assoc_rna=target_names[i],
+                                assoc_rna=target_name,
                                 parallel=False))
 
     def cmd(self):
         cmd = [pyexe,
                os.path.join(bin_dir, "get_sequence_lengths.py")]
         cmd += ['--fa', "{fasta}"]
-        cmd += ['--out']
-        for i in range(len(self.target_names)):
-            node_name = "L{}".format(i + 1)
-            cmd += ["{{{}}}".format(node_name)]
+        cmd.append('--out')
+        cmd.extend("{{L{}}}".format(i + 1) for i in range(len(self.target_names)))
         return cmd
 
 
@@ -1269,21 +1602,21 @@ class PrimerLocator(Component):
         self.primer_files = primer_files
         self.primers_in_sequence = primers_in_sequence
         # FIXME: maybe move some of this boilerplate multinode input/output stuff to Component
-        for i in range(len(fastas)):
+        for i, fasta in enumerate(fastas):
             self.add(InputNode(name="fasta_{}".format(i+1),
-                               filename=fastas[i]))
-        for i in range(len(primer_files)):
+                               filename=fasta))
+        for i, primer_file in enumerate(primer_files):
             self.add(InputNode(name="primers_{}".format(i+1),
-                               filename=primer_files[i]))
-        for i in range(len(target_names)):
+                               filename=primer_file))
+        for i, target_name in enumerate(target_names):
             self.add(OutputNode(name="locs_{}".format(i+1),
                                 extension="txt",
-                                assoc_rna=target_names[i],
+                                assoc_rna=target_name,
                                 parallel=False))
             # will be linked to ParameterNode of MutationCounter
             self.add(OutputNode(name="n_pairs_{}".format(i+1),
                                 extension="txt",
-                                assoc_rna=target_names[i],
+                                assoc_rna=target_name,
                                 parallel=False))
         #self.add(StdoutNode())
         self.add(StderrNode())
@@ -1291,28 +1624,20 @@ class PrimerLocator(Component):
     def cmd(self):
         cmd = [pyexe,
                os.path.join(this_dir, "locate_primers.py")]
-        cmd += ["--fastas"]
-        for i in range(len(self.fastas)):
-            node_name = "fasta_{}".format(i + 1)
-            cmd += ["{{{}}}".format(node_name)]
+        n_targets = len(self.target_names)
+        cmd.append("--fastas")
+        cmd.extend("{{fasta_{}}}".format(i + 1) for i in range(len(self.fastas)))
         if len(self.primer_files) > 0:
-            cmd += ["--primer-files"]
-            for i in range(len(self.primer_files)):
-                node_name = "primers_{}".format(i+1)
-                cmd += ["{{{}}}".format(node_name)]
+            cmd.append("--primer-files")
+            cmd.extend("{{primers_{}}}".format(i + 1) for i in range(len(self.primer_files)))
         if self.primers_in_sequence:
-            cmd += ["--primers-in-sequence"]
-        cmd += ["--target-names"]
-        for n in self.target_names:
-            cmd += ['"' + n + '"']
-        cmd += ["--locations-out"]
-        for i in range(len(self.target_names)):
-            node_name = "locs_{}".format(i + 1)
-            cmd += ["{{{}}}".format(node_name)]
-        cmd += ["--n-pairs-out"]
-        for i in range(len(self.target_names)):
-            node_name = "n_pairs_{}".format(i + 1)
-            cmd += ["{{{}}}".format(node_name)]
+            cmd.append("--primers-in-sequence")
+        cmd.append("--target-names")
+        cmd.extend('"' + n + '"' for n in self.target_names)
+        cmd.append("--locations-out")
+        cmd.extend("{{locs_{}}}".format(i + 1) for i in range(n_targets))
+        cmd.append("--n-pairs-out")
+        cmd.extend("{{n_pairs_{}}}".format(i + 1) for i in range(n_targets))
         return cmd
 
 
@@ -1335,7 +1660,7 @@ class SplitToFile(Component):
                 out_node = node
         out_node_name = out_node.get_name()
         cmd = "tee {to_file} >"
-        cmd += "{{{}}}".format(out_node_name)
+        cmd += "{" + out_node_name + "}"
         cmd += " <{stdin}"
         return cmd
 
@@ -1366,14 +1691,17 @@ def split_to_file_wrapper(component, selected_out_names=None):
     for node in component.input_nodes:
         wrapper.add(node)
     split_nodes = []
+    pass_nodes = []
     for node in component.output_nodes:
         if selected_out_names is not None:
-            if node.get_name() in selected_out_names:
-                split_nodes.append(node)
-        elif node.parallel and node.get_name() not in ["stdout", "stderr"]:
+            split = node.get_name() in selected_out_names
+        else:
+            split = node.parallel and node.get_name() not in ["stdout", "stderr"]
+        if split:
             split_nodes.append(node)
         else:
-            wrapper.add(node)
+            pass_nodes.append(node)
+    wrapper.add(pass_nodes)
     for i, node in enumerate(split_nodes):
         comp = SplitToFile(name="SplitToFile{}".format(i+1))
         wrapper.add(comp)
@@ -1396,9 +1724,9 @@ def split_to_file_wrapper(component, selected_out_names=None):
     for c in wrapper.collect_components():
         c.assoc_rna = wrapper.assoc_rna
         c.assoc_sample = wrapper.assoc_sample
-    for n in wrapper.collect_component_nodes():
-        n.assoc_rna = wrapper.assoc_rna
-        n.assoc_sample = wrapper.assoc_sample
+        for n in c.get_component_nodes():
+            n.assoc_rna = wrapper.assoc_rna
+            n.assoc_sample = wrapper.assoc_sample
     return wrapper
 
 
@@ -1409,19 +1737,13 @@ class AlignPrep(Component):
                  total_target_length=None,
                  star_aligner=None,
                  genomeSAindexNbase=None,
+                 star_shared_index=None,
                  nproc=None,
                  **kwargs):
         require_explicit_kwargs(locals())
         if isinstance(target, list) and len(target)==1:
-            # allow init with list of 1 target by re-initializing with that target
-            self.__init__(target=target[0],
-                          num_targets=num_targets,
-                          total_target_length=total_target_length,
-                          star_aligner=star_aligner,
-                          nproc=nproc,
-                          genomeSAindexNbase=genomeSAindexNbase,
-                          **kwargs)
-            return
+            # allow init with list of 1 target
+            target = target[0]
         super().__init__(**kwargs)
 
         if star_aligner is not None and star_aligner:
@@ -1443,9 +1765,9 @@ class AlignPrep(Component):
             # if multiple target files, combine into single file before Bowtie index build
             fastacombine = Appender(inputs=target,
                                     add_extra_newline=True)
-            for i in range(len(fastacombine.input_nodes)):
+            for i, node in enumerate(fastacombine.input_nodes):
                 fastachecker = FastaFormatChecker(name="FastaFormatChecker_{}".format(i+1))
-                connect(fastacombine.input_nodes[i].input_node, fastachecker.fasta)
+                connect(node.input_node, fastachecker.fasta)
                 self.add(fastachecker)
             self.add(fastacombine)
             connect(fastacombine.appended, indexbuilder.target)
@@ -1454,6 +1776,13 @@ class AlignPrep(Component):
         self.add(indexbuilder.target)
         self.add(indexbuilder.index)
 
+        if star_aligner and star_shared_index:
+            # load index into shared memory before any aligners start
+            # (StarIndexUnloader must be added after them)
+            indexloader = StarIndexLoader()
+            connect(indexbuilder.index, indexloader.index)
+            self.add(indexloader)
+
 
 class Sample(Component):
     def __init__(self,
@@ -1516,6 +1845,15 @@ class Sample(Component):
                 fastq_list = False
                 U = U[0]
 
+        trimmer_params = {"min_qual": min_qual_to_trim,
+                          "window": window_to_trim,
+                          "min_length": min_length_to_trim,
+                          "nproc": nproc}
+        aligner_params = {"reorder": preserve_order,
+                          "assoc_rna": assoc_rna,
+                          "disable_soft_clipping": disable_soft_clipping,
+                          "nproc": nproc}
+
         aligner = None
         if U is not None:
             # unpaired reads
@@ -1523,36 +1861,29 @@ class Sample(Component):
                 # add component to concatenate input files into single streams
                 append = Appender(inputs=U)
                 progmonitor = ProgressMonitor()
-                qtrimmer = QualityTrimmer(min_qual=min_qual_to_trim,
-                                          window=window_to_trim,
-                                          min_length=min_length_to_trim)
+                qtrimmer = QualityTrimmer(**trimmer_params)
                 connect(append, progmonitor)
                 self.add([append,
                           progmonitor,
                           qtrimmer])
             else:
                 progmonitor = ProgressMonitor(input=U)
-                qtrimmer = QualityTrimmer(min_qual=min_qual_to_trim,
-                                          window=window_to_trim,
-                                          min_length=min_length_to_trim)
+                qtrimmer = QualityTrimmer(**trimmer_params)
                 self.add([progmonitor,
                           qtrimmer])
             connect(progmonitor, qtrimmer)
 
-            aligner_params = {"reorder": preserve_order,
-                              "assoc_rna": assoc_rna,
-                              "disable_soft_clipping": disable_soft_clipping,
-                              "nproc": nproc}
-
             if star_aligner is not None and star_aligner:
                 aligner = StarAligner(name="StarAligner",
                                       paired=False,
+                                      shared_index=star_shared_index,
                                       **aligner_params)
                 connect(qtrimmer.trimmed, aligner.fastq)
             else:
                 aligner = BowtieAlignerMixedInput(maxins=maxins,
                                                   max_search_depth=max_search_depth,
                                                   max_reseed=max_reseed,
+                                                  unpaired=True,
                                                   **aligner_params)
                 connect(qtrimmer.trimmed, aligner.interleaved_fastq)
             self.add(aligner)
@@ -1566,13 +1897,9 @@ class Sample(Component):
                 append2 = Appender(name="Appender2", inputs=R2)
                 progmonitor = ProgressMonitor()
                 qtrimmer1 = QualityTrimmer(name="QualityTrimmer1",
-                                           min_qual=min_qual_to_trim,
-                                           window=window_to_trim,
-                                           min_length=min_length_to_trim)
+                                           **trimmer_params)
                 qtrimmer2 = QualityTrimmer(name="QualityTrimmer2",
-                                           min_qual=min_qual_to_trim,
-                                           window=window_to_trim,
-                                           min_length=min_length_to_trim)
+                                           **trimmer_params)
                 connect(append1, progmonitor)
                 connect(progmonitor, qtrimmer1)
                 connect(append2, qtrimmer2)
@@ -1584,33 +1911,28 @@ class Sample(Component):
             else:
                 progmonitor = ProgressMonitor(input=R1)
                 qtrimmer1 = QualityTrimmer(name="QualityTrimmer1",
-                                           min_qual=min_qual_to_trim,
-                                           window=window_to_trim,
-                                           min_length=min_length_to_trim)
+                                           **trimmer_params)
                 connect(progmonitor, qtrimmer1)
                 qtrimmer2 = QualityTrimmer(name="QualityTrimmer2",
-                                           min_qual=min_qual_to_trim,
-                                           window=window_to_trim,
-                                           min_length=min_length_to_trim,
-                                           fastq=R2)
+                                           fastq=R2,
+                                           **trimmer_params)
                 self.add([progmonitor,
                           qtrimmer1,
                           qtrimmer2])
             
 
             interleaver = Interleaver()
-            merger = Merger(preserve_order=preserve_order)
+            if (not preserve_order and nproc is not None
+                    and nproc > BBMERGE_MAX_THREADS):
+                merger = ShardedMerger(nproc=nproc)
+            else:
+                merger = Merger(preserve_order=preserve_order)
             connect(qtrimmer1.trimmed, interleaver.R1)
             connect(qtrimmer2.trimmed, interleaver.R2)
             connect(interleaver, merger)
             self.add([interleaver])
             self.add([merger])
 
-            aligner_params = {"reorder":preserve_order,
-                              "assoc_rna":assoc_rna,
-                              "disable_soft_clipping":disable_soft_clipping,
-                              "nproc":nproc}
-
             if star_aligner is not None and star_aligner:
                 aligner = StarAlignerMixedInput(star_shared_index=star_shared_index,
                                                 **aligner_params)
@@ -1651,8 +1973,8 @@ class Sample(Component):
         # set assoc_sample for all children
         for c in self.collect_components():
             c.assoc_sample = assoc_sample
-        for n in self.collect_component_nodes():
-            n.assoc_sample = assoc_sample
+            for n in c.get_component_nodes():
+                n.assoc_sample = assoc_sample
 
 
 
@@ -1676,6 +1998,10 @@ class PostAlignment(Component):
         min_mutation_separation:
         min_qual_to_count:
         random_primer_len:
+        fuse_parser_counter: parse and count mutations in a single
+                             MutationParserCounter process per sample,
+                             instead of a MutationParser piped into a
+                             MutationCounter
     """
 
     def __init__(self,
@@ -1708,6 +2034,8 @@ class PostAlignment(Component):
                  render_must_span=None,
                  max_pages=None,
                  per_read_histograms=None,
+                 star_aligner=None,
+                 fuse_parser_counter=None,
                  **kwargs):
         require_explicit_kwargs(locals())
         assert isinstance(num_samples, int)
@@ -1722,27 +2050,45 @@ class PostAlignment(Component):
         if render_mutations:
             debug_out = render_mutations
 
+        parser_kwargs = dict(min_mapq=min_mapq,
+                             maxins=maxins,
+                             input_is_unpaired=input_is_unpaired,
+                             right_align_ambig_dels=right_align_ambig_dels,
+                             right_align_ambig_ins=right_align_ambig_ins,
+                             min_mutation_separation=min_mutation_separation,
+                             min_qual=min_qual_to_count,
+                             random_primer_len=random_primer_len,
+                             mutation_type=mutation_type_to_count,
+                             variant_mode=output_variant_counts,
+                             amplicon=amplicon,
+                             max_primer_offset=max_primer_offset,
+                             require_forward_primer_mapped=require_forward_primer_mapped,
+                             require_reverse_primer_mapped=require_reverse_primer_mapped,
+                             trim_primers=trim_primers,
+                             debug_out=debug_out,
+                             reference=star_aligner)
+        counter_kwargs = dict(target_length=target_length,
+                              primer_pairs=primer_pairs,
+                              variant_out=output_variant_counts,
+                              mutations_out=output_mutation_counts,
+                              per_read_histograms=per_read_histograms,
+                              separate_ambig_counts=separate_ambig_counts)
+
         for i in range(num_samples):
             sample = samples[i]
 
-            parser = MutationParser(name="MutationParser_" + sample,
-                                    min_mapq=min_mapq,
-                                    maxins=maxins,
-                                    input_is_unpaired=input_is_unpaired,
-                                    right_align_ambig_dels=right_align_ambig_dels,
-                                    right_align_ambig_ins=right_align_ambig_ins,
-                                    min_mutation_separation=min_mutation_separation,
-                                    min_qual=min_qual_to_count,
-                                    random_primer_len=random_primer_len,
-                                    mutation_type=mutation_type_to_count,
-                                    variant_mode=output_variant_counts,
-                                    amplicon=amplicon,
-                                    max_primer_offset=max_primer_offset,
-                                    require_forward_primer_mapped=require_forward_primer_mapped,
-                                    require_reverse_primer_mapped=require_reverse_primer_mapped,
-                                    trim_primers=trim_primers,
-                                    assoc_sample=sample,
-                                    debug_out=debug_out)
+            if fuse_parser_counter:
+                parser = MutationParserCounter(name="MutationParserCounter_" + sample,
+                                               assoc_sample=sample,
+                                               **parser_kwargs,
+                                               **counter_kwargs)
+                counter = parser
+            else:
+                parser = MutationParser(name="MutationParser_" + sample,
+                                        assoc_sample=sample,
+                                        **parser_kwargs)
+            if star_aligner:
+                connect(target, parser.reference)
 
             self.add(parser)
 
@@ -1760,17 +2106,12 @@ class PostAlignment(Component):
                 connect(parser.debug_out, renderer.input)
                 self.add(renderer)
 
-            counter = MutationCounter(name="MutationCounter_" + sample,
-                                      target_length=target_length,
-                                      primer_pairs=primer_pairs,
-                                      variant_out=output_variant_counts,
-                                      mutations_out=output_mutation_counts,
-                                      assoc_sample=sample,
-                                      per_read_histograms=per_read_histograms,
-                                      separate_ambig_counts=separate_ambig_counts)
-
-            connect_nodes(parser.parsed_mutations, counter.mut)
-            self.add(counter)
+            if not fuse_parser_counter:
+                counter = MutationCounter(name="MutationCounter_" + sample,
+                                          assoc_sample=sample,
+                                          **counter_kwargs)
+                connect_nodes(parser.parsed_mutations, counter.mut)
+                self.add(counter)
 
             counts.append(counter.mutations)
 
@@ -1787,8 +2128,8 @@ class PostAlignment(Component):
         # set assoc_rna property for all children
         for c in self.collect_components():
             c.assoc_rna = target_name
-        for n in self.collect_component_nodes():
-            n.assoc_rna = target_name
+            for n in c.get_component_nodes():
+                n.assoc_rna = target_name
 
 
 class CorrectSequence(Component):
@@ -1835,6 +2176,7 @@ class CorrectSequence(Component):
                          total_target_length=total_target_length,
                          star_aligner=star_aligner,
                          genomeSAindexNbase=genomeSAindexNbase,
+                         star_shared_index=star_shared_index,
                          nproc=nproc)
 
         sample = Sample(U=U,
@@ -1859,43 +2201,45 @@ class CorrectSequence(Component):
         connect(prep.index, sample.index)
         self.add(prep.target) # simplify access to main sequence input node
 
+        if star_aligner and star_shared_index:
+            unloader = StarIndexUnloader()
+            connect(prep.index, unloader.index)
+            self.add(unloader)
+
         # split aligned output by mapped RNA (if needed)
         if len(target_names)>1:
             splitter = SplitByTarget(target_names=target_names)
             connect(sample.aligned, splitter.input)
             self.add(splitter)
             corrected_nodes = []
-            for i in range(len(target_names)):
+            for i, target_name in enumerate(target_names):
                 mapped_node = splitter["rna_{}".format(i+1)]
-                parser = MutationParser(name="MutationParser_{}".format(i+1),
-                                        assoc_rna=target_names[i],
-                                        min_mapq=min_mapq,
-                                        min_qual=min_qual_to_count,
-                                        random_primer_len=random_primer_len,
-                                        maxins=maxins,
-                                        amplicon=amplicon,
-                                        max_primer_offset=max_primer_offset,
-                                        require_forward_primer_mapped=require_forward_primer_mapped,
-                                        require_reverse_primer_mapped=require_reverse_primer_mapped,
-                                        trim_primers=trim_primers,
-                                        )
-
-                counter = MutationCounter(name="MutationCounter_{}".format(i+1),
-                                          assoc_rna=target_names[i],
-                                          target_length=target_lengths[i],
-                                          variant_out=True,
-                                          mutations_out=False,
-                                          )
-                connect(splitter["rna_{}".format(i+1)], parser.input)
-                connect(parser, counter)
-                self.add([parser,
-                          counter])
+                counter = MutationParserCounter(name="MutationParserCounter_{}".format(i+1),
+                                                assoc_rna=target_name,
+                                                min_mapq=min_mapq,
+                                                min_qual=min_qual_to_count,
+                                                random_primer_len=random_primer_len,
+                                                maxins=maxins,
+                                                amplicon=amplicon,
+                                                max_primer_offset=max_primer_offset,
+                                                require_forward_primer_mapped=require_forward_primer_mapped,
+                                                require_reverse_primer_mapped=require_reverse_primer_mapped,
+                                                trim_primers=trim_primers,
+                                                reference=star_aligner,
+                                                target_length=target_lengths[i],
+                                                variant_out=True,
+                                                mutations_out=False,
+                                                )
+                if star_aligner:
+                    connect(prep.target.input_node, counter.reference)
+                connect(mapped_node, counter.input)
+                self.add(counter)
 
                 sequencefixer = SequenceCorrector(name="SequenceCorrector_{}".format(i+1),
-                                                  assoc_rna=target_names[i],
+                                                  assoc_rna=target_name,
                                                   mindepth=min_seq_depth,
                                                   minfreq=min_freq,
-                                                  target_name=target_names[i])  # FIXME: keep param names consistent across codebase
+                                                  target_name=target_name)  # FIXME: keep param names consistent across codebase
                 self.add(sequencefixer)
                 connect(prep.target.input_node, sequencefixer.target)
                 connect(counter.variants, sequencefixer.variants)
@@ -1907,23 +2251,23 @@ class CorrectSequence(Component):
             self.add(appender.appended, alias="corrected")
 
         else:
-            parser = MutationParser(min_mapq=min_mapq,
-                                    min_qual=min_qual_to_count,
-                                    random_primer_len=random_primer_len,
-                                    maxins=maxins,
-                                    amplicon=amplicon,
-                                    max_primer_offset=max_primer_offset,
-                                    require_forward_primer_mapped=require_forward_primer_mapped,
-                                    require_reverse_primer_mapped=require_reverse_primer_mapped,
-                                    trim_primers=trim_primers,
-                                    )
-            counter = MutationCounter(variant_out=True,
-                                      mutations_out=False,
-                                      target_length=target_lengths[0])
-            connect(sample.aligned, parser.input)
-            connect(parser, counter)
-            self.add([parser,
-                      counter])
+            counter = MutationParserCounter(min_mapq=min_mapq,
+                                            min_qual=min_qual_to_count,
+                                            random_primer_len=random_primer_len,
+                                            maxins=maxins,
+                                            amplicon=amplicon,
+                                            max_primer_offset=max_primer_offset,
+                                            require_forward_primer_mapped=require_forward_primer_mapped,
+                                            require_reverse_primer_mapped=require_reverse_primer_mapped,
+                                            trim_primers=trim_primers,
+                                            reference=star_aligner,
+                                            variant_out=True,
+                                            mutations_out=False,
+                                            target_length=target_lengths[0])
+            if star_aligner:
+                connect(prep.target.input_node, counter.reference)
+            connect(sample.aligned, counter.input)
+            self.add(counter)
 
             sequencefixer = SequenceCorrector(mindepth=min_seq_depth,
                                               minfreq=min_freq)  # FIXME: keep param names consistent across codebase
@@ -1950,7 +2294,7 @@ class Mangler(Component):
 
     def cmd(self):
         ext = self.input.get_extension()
-        if any([ext.endswith(x) for x in ["bam", "gz"]]):
+        if ext.endswith(("bam", "gz")):
             mangler = "mangle_binary.py"
         else:
             mangler = "mangle_text_fixed.py"
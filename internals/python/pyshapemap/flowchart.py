@@ -11,11 +11,23 @@ import pyshapemap.components as cmp
 
 def display_image(filename):
     cmd = ["gnome-open", filename]
-    sp.Popen(cmd, preexec_fn=os.setsid, stderr=sp.PIPE, stdout=sp.PIPE)
+    sp.Popen(cmd, start_new_session=True, stderr=sp.PIPE, stdout=sp.PIPE)
 
 
 def tab(s):
-    return '\n'.join(['\t' + line for line in s.splitlines()]) + '\n'
+    if len(s) == 0:
+        return '\n'
+    if s.endswith('\n'):
+        s = s[:-1]
+    return '\t' + s.replace('\n', '\n\t') + '\n'
+
+def quote(s):
+    """
+    Quote a DOT attribute value or ID unless it is a bare word.
+    """
+    if s.isalpha():
+        return s
+    return '"' + s + '"'
 
 def format_path(s,
                 path=None,
@@ -38,7 +50,7 @@ def format_path(s,
             s = s.replace(name_prefix, '. . . ')
     if replaced_path_name:
         s = "[DIR]/" + s
-    return "/\\n".join(s.split('/'))
+    return s.replace('/', "/\\n")
 
 def body_str(legend, subgraphs, edges):
     s = 'strict digraph {{\n\tsplines=false;outputorder=nodesfirst;rankdir=TB;\n{}\n{}\n{}\n}}'
@@ -127,45 +139,28 @@ def node_str(ID,
     s += 'ranksep={},'
     s += '];\n'
 
-    if not ID.isalpha():
-        ID = '"{}"'.format(ID)
-    if not color.isalpha():
-        color = '"{}"'.format(color)
-    if not fillcolor.isalpha():
-        fillcolor = '"{}"'.format(fillcolor)
-    if not penwidth.isalpha():
-        penwidth = '"{}"'.format(penwidth)
-    if not label.isalpha():
-        label = '"{}"'.format(label)
-    if not style.isalpha():
-        style = '"{}"'.format(style)
-    if not margin.isalpha():
-        margin = '"{}"'.format(margin)
-    if not nodesep.isalpha():
-        nodesep = '"{}"'.format(nodesep)
-    if not ranksep.isalpha():
-        ranksep = '"{}"'.format(ranksep)
-    s = s.format(ID, color, fillcolor, penwidth, fontsize, label, shape, style, margin, nodesep, ranksep)
+    s = s.format(quote(ID),
+                 quote(color),
+                 quote(fillcolor),
+                 quote(penwidth),
+                 fontsize,
+                 quote(label),
+                 shape,
+                 quote(style),
+                 quote(margin),
+                 quote(nodesep),
+                 quote(ranksep))
     return s
 
 
 def edge_str(ID1, ID2, style="", weight="", minlen="", color=""):
-    s = '{} -> {} {};\n'
-    k = ''
-    if not color.isalpha():
-        color = '"{}"'.format(color)
-    if not style.isalpha():
-        style = '"{}"'.format(style)
-    if not weight.isalpha():
-        weight = '"{}"'.format(weight)
-    if not minlen.isalpha():
-        minlen = '"{}"'.format(minlen)
-    k = '[color={}, style={}, weight={}, minlen={}]'.format(color, style, weight, minlen)
-    if not ID1.isalpha():
-        ID1 = '"{}"'.format(ID1)
-    if not ID2.isalpha():
-        ID2 = '"{}"'.format(ID2)
-    s = s.format(ID1, ID2, k)
+    s = '{} -> {} [color={}, style={}, weight={}, minlen={}];\n'
+    s = s.format(quote(ID1),
+                 quote(ID2),
+                 quote(color),
+                 quote(style),
+                 quote(weight),
+                 quote(minlen))
     return s
 
 
@@ -175,18 +170,16 @@ def pipeline_to_dot(pipeline,
 
     assert isinstance(pipeline, cmp.Component)
 
-    touched = []
+    # ids of visited components and nodes
+    touched = set()
 
     def traverse(o):
-        nonlocal touched
-
         if o is None:
             return "", ""
 
-        if o not in touched:
-            touched.append(o)
-        else:
+        if id(o) in touched:
             return "", ""
+        touched.add(id(o))
 
         if isinstance(o, cmp.Component):
             child_scope = ""
@@ -222,15 +215,14 @@ def pipeline_to_dot(pipeline,
                 child_scope += s
                 same_scope += p
             label = o.get_name()
-            try:
-                if o.assoc_sample is not None:
-                    label += "\\n({})".format(o.assoc_sample)
-                if o.assoc_rna is not None:
-                    label += "\\n({})".format(o.assoc_rna)
-                if o.run_order is not None:
-                    label += "\\n(run group {})".format(o.run_order)
-            except AttributeError:
-                pass
+            if o.assoc_sample is not None:
+                label += "\\n({})".format(o.assoc_sample)
+            if o.assoc_rna is not None:
+                label += "\\n({})".format(o.assoc_rna)
+            # run_order is only set once Pipeline.calc_run_order() has run
+            run_order = getattr(o, "run_order", None)
+            if run_order is not None:
+                label += "\\n(run group {})".format(run_order)
             if o.parent_component is None:
                 # TODO: add some additional run info to outermost pipeline
                 pass
@@ -347,17 +339,18 @@ def pipeline_to_dot(pipeline,
 
         # lengthen edges into certain components to help layout
         if isinstance(edge.to_node, cmp.ComponentNode):
-            if ( any(edge.to_node.parent_component.get_name().startswith(n) for n in ["StarAligner",
-                                                              "BowtieAligner",
-                                                              "CalcProfile"]) and
+            parent_name = edge.to_node.parent_component.get_name()
+            if ( parent_name.startswith(("StarAligner",
+                                         "BowtieAligner",
+                                         "CalcProfile")) and
                  "index" in edge.to_node.get_name() ):
                 if not isinstance(edge.from_node, cmp.SharedInputNode):
                     minlen = "20"
             if isinstance(edge.to_node, cmp.SharedInputNode):
                 minlen = "20"
-            if edge.to_node.parent_component.get_name().startswith("CalcProfile"):
+            if parent_name.startswith("CalcProfile"):
                 minlen = "5"
-            if edge.to_node.parent_component.get_name().startswith("RenderMutations"):
+            if parent_name.startswith("RenderMutations"):
                 minlen = "10"
 
         edges_str += edge_str(edge.from_node.id,
@@ -405,14 +398,12 @@ def draw_flowchart(pipeline,
 
     cmd = ["dot",
            "-T{}".format(ext[1:]),
-           '>',
-           "'" + filename + "'"]
-    proc = sp.Popen(' '.join(cmd),
-                    shell=True,
+           "-o", filename]
+    proc = sp.Popen(cmd,
                     stdin=sp.PIPE,
                     stdout=sp.PIPE,
                     stderr=sp.PIPE,
-                    preexec_fn=os.setsid)
+                    start_new_session=True)
     stdout, stderr = proc.communicate(input=bytes(dot, 'UTF-8'))
     stdout = stdout.decode()
     stderr = stderr.decode()
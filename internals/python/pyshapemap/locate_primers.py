@@ -4,11 +4,12 @@
 # --------------------------------------------------------------------- #
 
 import sys, os
-from copy import deepcopy
 from argparse import ArgumentParser
 from util import sanitize
 
 class Primer:
+    __slots__ = ["seq", "left", "right"]
+
     def __init__(self,
                  seq,
                  left,
@@ -18,21 +19,18 @@ class Primer:
         self.right = right
 
 
+class _ComplementTable(dict):
+    """
+    str.translate() table mapping any unrecognized character to N
+    """
+    def __missing__(self, key):
+        return 'N'
+
+_complement_table = _ComplementTable(str.maketrans("ATGCN", "TACGN"))
+
+
 def complement(seq):
-    d = {
-        "A": "T",
-        "T": "A",
-        "G": "C",
-        "C": "G",
-        "N": "N"
-    }
-    comp = ""
-    for c in seq:
-        if c in d:
-            comp += d[c]
-        else:
-            comp += 'N'
-    return comp
+    return seq.translate(_complement_table)
 
 
 def reverse_complement(seq):
@@ -58,7 +56,7 @@ def locate_primer_pairs(fastas,
     current_RNA = "__ALL_TARGETS__"
     if primer_filenames is not None:
         for filename in primer_filenames:
-            for line in open(filename, "rU"):
+            for line in open(filename, "r"):
                 if line[0] == '>':
                     current_RNA = sanitize(line[1:].rstrip())
                 else:
@@ -73,30 +71,28 @@ def locate_primer_pairs(fastas,
                     primers[current_RNA].append(pair)
 
     # raise an error if duplicated primer sequences present
-    for rna in primers:
-        cat_seqs = []
-        for p in primers[rna]:
-            fw = p[0]
-            rv = p[1]
-            cat_seqs.append(fw.seq+rv.seq)
-        if len(cat_seqs) > len(list(set(cat_seqs))):
+    for pairs in primers.values():
+        cat_seqs = {fw.seq + rv.seq for fw, rv in pairs}
+        if len(pairs) > len(cat_seqs):
             raise RuntimeError("Error: duplicated amplicon primer pair(s) present.")
 
     def iterate_fasta(filenames):
         for filename in filenames:
-            f = open(filename, "rU")
+            with open(filename, "r") as f:
+                data = f.read()
+            # split on header lines; the first chunk holds any sequence
+            # preceding the first header
+            records = ("\n" + data).split("\n>")
             name = None
-            seq = ""
-            for line in f:
-                if line[0] == '>':
-                    if len(seq) > 0:
-                        yield name, seq
-                    name = sanitize(line[1:].rstrip())
-                    seq = ''
+            for i, record in enumerate(records):
+                header, _, body = record.partition("\n")
+                if i > 0:
+                    name = sanitize(header.rstrip())
                 else:
-                    seq += ''.join(line.strip().split())
-            if len(seq) > 0:
-                yield name, seq
+                    body = record
+                seq = ''.join(body.split())
+                if len(seq) > 0:
+                    yield name, seq
 
     # identify primers from lowercase sequence on either end of each RNA
     if primers_in_sequence:
@@ -129,7 +125,8 @@ def locate_primer_pairs(fastas,
     if len(primers['__ALL_TARGETS__']) > 0:
         p = primers['__ALL_TARGETS__']
         for RNA in primers:
-            primers[RNA] = [(deepcopy(x[0]),deepcopy(x[1])) for x in p]
+            primers[RNA] = [(Primer(fw.seq, fw.left, fw.right),
+                             Primer(rv.seq, rv.left, rv.right)) for fw, rv in p]
     del primers['__ALL_TARGETS__']
 
     # locate primers by matching sequence
@@ -139,31 +136,23 @@ def locate_primer_pairs(fastas,
             if primers[name][n][0].left is None:
                 # locate forward primer (match sequence)
                 fp = primers[name][n][0].seq
-                try:
-                    left = seq.index(fp)
-                    primers[name][n][0].left = left
-                    primers[name][n][0].right = left + len(fp) - 1
-                    try:
-                        left2 = seq.index(fp, left+1)
-                        raise RuntimeError("Multiple locations match forward primer in RNA '{}'. Explicit location input is not yet implemented.".format(name))
-                    except ValueError:
-                        pass
-                except ValueError:
+                left = seq.find(fp)
+                if left < 0:
                     raise RuntimeError("Unable to locate forward primer in the sequence of RNA '{}'".format(name))
+                if seq.find(fp, left+1) >= 0:
+                    raise RuntimeError("Multiple locations match forward primer in RNA '{}'. Explicit location input is not yet implemented.".format(name))
+                primers[name][n][0].left = left
+                primers[name][n][0].right = left + len(fp) - 1
             if primers[name][n][1].left is None:
                 # locate reverse primer (match reverse complement)
                 rp = reverse_complement(primers[name][n][1].seq)
-                try:
-                    left = seq.index(rp)
-                    primers[name][n][1].left = left
-                    primers[name][n][1].right = left + len(rp) - 1
-                    try:
-                        left2 = seq.index(rp, left+1)
-                        raise RuntimeError("Multiple locations match reverse primer in RNA '{}'. Explicit location input is not yet implemented.".format(name))
-                    except ValueError:
-                        pass
-                except ValueError:
+                left = seq.find(rp)
+                if left < 0:
                     raise RuntimeError("Unable to locate reverse primer in the sequence of RNA '{}'".format(name))
+                if seq.find(rp, left+1) >= 0:
+                    raise RuntimeError("Multiple locations match reverse primer in RNA '{}'. Explicit location input is not yet implemented.".format(name))
+                primers[name][n][1].left = left
+                primers[name][n][1].right = left + len(rp) - 1
 
     # check for targets with no matching primers
     for RNA in primers:
@@ -23,13 +23,15 @@ class Node():
         kw = {"name": None,
               "input_node": None,
               "output_nodes": [],
-              "id": rand_id(),
+              "id": None,
               "assoc_rna": None,
               "assoc_sample": None}
         # Nodes that are not PipeNodes
         # can have multiple nodes connected
         # in the outgoing direction
         kw.update(kwargs)
+        if kw["id"] is None:
+            kw["id"] = rand_id()
         self.__dict__.update(kw)
 
     def __str__(self):
@@ -80,7 +82,7 @@ class FileNode(Node):
         """
         assert isinstance(self.filename, str)
         if not os.path.exists(self.filename):
-            folder, filename = os.path.split(self.filename)
+            folder = os.path.dirname(self.filename)
             if len(folder) > 0:
                 try:
                     os.makedirs(folder, exist_ok=True)
@@ -95,14 +97,20 @@ class FileNode(Node):
         repeated runs in the same directory)
 
         """
-        if os.path.exists(self.filename):
-            if stat.S_ISFIFO(os.stat(self.filename).st_mode):
-                os.remove(self.filename)
+        try:
+            mode = os.stat(self.filename).st_mode
+        except OSError:
+            return
+        if stat.S_ISFIFO(mode):
+            os.remove(self.filename)
 
     def remove_existing_file(self):
-        if os.path.exists(self.filename):
-            if stat.S_ISREG(os.stat(self.filename).st_mode):
-                os.remove(self.filename)
+        try:
+            mode = os.stat(self.filename).st_mode
+        except OSError:
+            return
+        if stat.S_ISREG(mode):
+            os.remove(self.filename)
 
 
 class FolderNode(Node):
@@ -131,8 +139,8 @@ class FolderNode(Node):
         assert isinstance(self.foldername, str)
         if not os.path.isdir(self.foldername):
             # make path up to but not including final path component if option set
-            if self.make_parent is not None and self.make_parent:
-                folder, filename = os.path.split(self.foldername)
+            if self.make_parent:
+                folder = os.path.dirname(self.foldername)
             else:
                 folder = self.foldername
             if len(folder) > 0:
@@ -140,13 +148,16 @@ class FolderNode(Node):
                     os.makedirs(folder, exist_ok=True)
                 except NotADirectoryError:
                     raise RuntimeError("File {} already exists. ".format(folder)+name_collision_msg)
-        elif self.error_on_existing is not None and self.error_on_existing:
+        elif self.error_on_existing:
             raise RuntimeError("Folder {} already exists. ".format(self.foldername)+name_collision_msg)
 
     def remove_existing_folder(self):
-        if os.path.exists(self.foldername):
-            if stat.S_ISDIR(os.stat(self.foldername).st_mode):
-                shutil.rmtree(self.foldername, ignore_errors=True)
+        try:
+            mode = os.stat(self.foldername).st_mode
+        except OSError:
+            return
+        if stat.S_ISDIR(mode):
+            shutil.rmtree(self.foldername, ignore_errors=True)
 
 
 class PipeNode(FileNode):
@@ -413,6 +424,9 @@ class Edge():
         else:
             return False
 
+    def __hash__(self):
+        return hash((id(self.from_node), id(self.to_node)))
+
     def __str__(self):
         return "({})->({})".format(self.from_node,
                                    self.to_node)
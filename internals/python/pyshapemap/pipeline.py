@@ -236,6 +236,14 @@ class Pipeline(Component):
             # collect components that can be run in parallel with
             # this one
             parallel_components = self.collect_parallel_components(starting_comp)
+            # independent components that only read finished files
+            # (e.g. figure rendering) can also be run alongside
+            if starting_comp.run_with_siblings:
+                for c in comps[1:]:
+                    if ( c.run_with_siblings and
+                         c.parent_component is starting_comp.parent_component ):
+                        parallel_components += [x for x in self.collect_parallel_components(c)
+                                                if x not in parallel_components]
             #print("Setting run_order to {} for components:".format(run_order))
             #for c in sorted(parallel_components, key=lambda x: x.pipeline_location):
             #    print(" {}".format(c.get_name()))
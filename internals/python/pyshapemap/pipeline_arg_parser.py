@@ -190,8 +190,9 @@ def parse_args(args):
     parser.add_argument('--genomeSAindexNbase', type=int, default=0)
     # 0 indicates this parameter should be calculated according to the STAR manual's recommendation
     parser.add_argument('--star-shared-index', action="store_true", default=False)
-    # using a shared-memory index for concurrent STAR aligner processes appears
-    # to occasionally deadlock
+    # the index is loaded into shared memory once before any STAR aligners start
+    # (concurrent loading from multiple aligners appeared to occasionally deadlock).
+    # Off by default, since an interrupted run leaves the index in shared memory.
     parser.add_argument('--rerun-on-star-segfault', action="store_true", default=False)
     #  if STAR segfaults, rerun with --genomeSAindexNbase=3
     parser.add_argument('--rerun-genomeSAindexNbase', type=int, default=3)
@@ -389,8 +390,8 @@ def parse_paired_input_folder(input_folder):
     R1 = []
     R2 = []
     file_list = [f for f in os.listdir(input_folder) if not os.path.isdir(f)]
-    exts = [".fastq", ".fq", ".fastq.gz"]
-    file_list = [f for f in file_list if any([f.endswith(ext) for ext in exts])]
+    exts = (".fastq", ".fq", ".fastq.gz")
+    file_list = [f for f in file_list if f.endswith(exts)]
     for f in file_list:
         # try to locate "R1" or "R2" in filename, separated from other fields
         # by underscores or periods
@@ -428,8 +429,8 @@ def parse_paired_input_folder(input_folder):
 def parse_unpaired_input_folder(input_folder):
     check_folder_exists(input_folder)
     file_list = [f for f in os.listdir(input_folder) if not os.path.isdir(f)]
-    exts = [".fastq", ".fq", ".fastq.gz"]
-    file_list = [f for f in file_list if any([f.endswith(ext) for ext in exts])]
+    exts = (".fastq", ".fq", ".fastq.gz")
+    file_list = [f for f in file_list if f.endswith(exts)]
     file_list.sort()
 
     if len(file_list)==0:
@@ -21,7 +21,8 @@ from pyshapemap.pipeline import Pipeline
 from pyshapemap.util import \
     require_explicit_kwargs, \
     read_fasta_names_lengths, \
-    sanitize
+    sanitize, \
+    shared_memory_limit
 from pyshapemap.flowchart import draw_flowchart
 
 def build_pipeline(fastq=None,
@@ -126,6 +127,27 @@ def build_pipeline(fastq=None,
         msg += " Consider using STAR with the --star-aligner option."
         print(msg)
 
+    # bowtie2 instances can't be split up if read order must be preserved
+    if (not star_aligner and preserve_order
+        and nproc is not None and nproc > BOWTIE_MAX_THREADS):
+        msg = "Warning: with --preserve-order, reads are aligned by a single"
+        msg += " bowtie2 instance, which may not make effective use of more"
+        msg += " than {} threads.".format(BOWTIE_MAX_THREADS)
+        print(msg)
+
+    # STAR's shared-memory index needs a System V segment large enough
+    # to hold the whole index (genome, suffix array, and prefix index).
+    # This is a generous upper bound.
+    if star_aligner and star_shared_index:
+        index_bytes = 32 * sum(target_lengths) + (1 << 28)
+        shm_limit = shared_memory_limit()
+        if shm_limit is None or shm_limit < index_bytes:
+            msg = "Warning: system shared memory limit (kernel.shmmax/shmall) is too"
+            msg += " small for a shared STAR index. Each STAR process will load"
+            msg += " its own copy of the index."
+            print(msg)
+            star_shared_index = False
+
     # warn if no random primer length specified
     # (will also repeat this warning at end of run)
     if max(target_lengths) > 800 and random_primer_len==0:
@@ -184,6 +206,7 @@ def build_pipeline(fastq=None,
                                   total_target_length=sum(target_lengths),
                                   star_aligner=star_aligner,
                                   genomeSAindexNbase=genomeSAindexNbase,
+                                  star_shared_index=star_shared_index,
                                   nproc=nproc)
         else:
             alignprep = AlignPrep(target=target,
@@ -191,6 +214,7 @@ def build_pipeline(fastq=None,
                                   total_target_length=sum(target_lengths),
                                   star_aligner=star_aligner,
                                   genomeSAindexNbase=genomeSAindexNbase,
+                                  star_shared_index=star_shared_index,
                                   nproc=nproc)
         pipeline.add(alignprep)
 
@@ -259,6 +283,12 @@ def build_pipeline(fastq=None,
             else:
                 mapped_nodes[sample] = [p.aligned]
 
+        if star_aligner and star_shared_index:
+            # free shared-memory index once all samples are aligned
+            unloader = StarIndexUnloader()
+            connect(alignprep.index, unloader.index)
+            pipeline.add(unloader)
+
         # allow MutationCounter components to adjust to dynamic changes in 
         # sequence lengths, and also to read the number of primer pairs
         # associated with each target RNA
@@ -310,6 +340,8 @@ def build_pipeline(fastq=None,
                               render_must_span=render_must_span,
                               max_pages=max_pages,
                               per_read_histograms=per_read_histograms,
+                              star_aligner=star_aligner,
+                              fuse_parser_counter=not output_parsed,
                               )
             profile_nodes.append(p.ProfileHandler.CalcProfile.profile)
             # connect aligned reads nodes to post-alignment inputs
@@ -317,7 +349,10 @@ def build_pipeline(fastq=None,
             try:
                 for sample in mapped_nodes:
                     from_node = mapped_nodes[sample][i]
-                    to_node = p["MutationParser_"+sample.capitalize()].input
+                    if output_parsed:
+                        to_node = p["MutationParser_"+sample.capitalize()].input
+                    else:
+                        to_node = p["MutationParserCounter_"+sample.capitalize()].input
                     connect(from_node, to_node)
             except AttributeError:
                 pass
@@ -599,7 +634,9 @@ def move_output_files(pipeline,
 
     # mutation/variant/depth counts
     if output_counted:
-        for comp in pipeline.collect_low_level_components(name="MutationCounter*"):
+        counter_comps = pipeline.collect_low_level_components(name="MutationCounter*")
+        counter_comps += pipeline.collect_low_level_components(name="MutationParserCounter*")
+        for comp in counter_comps:
             if "CorrectSequence" in comp.get_parent_names():
                 continue
             sample = comp.assoc_sample
@@ -217,3 +217,21 @@ def read_fasta_names_lengths(fastas):
 
 
 
+
+
+def shared_memory_limit():
+    """
+    Get the largest System V shared memory segment the kernel allows
+    (kernel.shmmax, further limited by kernel.shmall), in bytes. STAR's
+    shared-memory index mode uses these segments. Return None if the
+    limits can't be read (e.g. on non-linux systems).
+
+    """
+    try:
+        with open("/proc/sys/kernel/shmmax") as f:
+            shmmax = int(f.read().split()[0])
+        with open("/proc/sys/kernel/shmall") as f:
+            shmall = int(f.read().split()[0])
+    except (IOError, OSError, ValueError, IndexError):
+        return None
+    return min(shmmax, shmall * os.sysconf("SC_PAGE_SIZE"))
@@ -60,10 +60,18 @@ if [ $sourceonly == 1 ]; then
 ${DIRNAME}/internals/bin/shapemapper_read_trimmer \
 ${DIRNAME}/internals/bin/shapemapper_mutation_counter \
 ${DIRNAME}/internals/bin/shapemapper_mutation_parser \
+${DIRNAME}/internals/bin/shapemapper_parse_and_count \
+${DIRNAME}/internals/bin/shapemapper_splice_cat \
+${DIRNAME}/internals/bin/shapemapper_sam_mixer \
+${DIRNAME}/internals/bin/shapemapper_line_splitter \
 ${DIRNAME}/internals/bin/test_histogram \
 ${DIRNAME}/internals/bin/test_mutation_counter \
 ${DIRNAME}/internals/bin/test_mutation_parser \
-${DIRNAME}/internals/bin/test_read_trimmer"
+${DIRNAME}/internals/bin/test_mutation_parser_counter \
+${DIRNAME}/internals/bin/test_read_trimmer \
+${DIRNAME}/internals/bin/test_splice_cat \
+${DIRNAME}/internals/bin/test_sam_mixer \
+${DIRNAME}/internals/bin/test_line_splitter"
 fi
 
 tarball_name="shapemapper-${VERSION}.tar.gz"
@@ -45,8 +45,32 @@ if [[ $? != 0 ]]; then
     exit $?
 fi
 
+test_mutation_parser_counter "${BASE_DIR}"
+if [[ $? != 0 ]]; then
+    echo -e "${err}"
+    exit $?
+fi
+
 test_histogram
 if [[ $? != 0 ]]; then
     echo -e "${err}"
     exit $?
 fi
+
+test_splice_cat "${BASE_DIR}"
+if [[ $? != 0 ]]; then
+    echo -e "${err}"
+    exit $?
+fi
+
+test_sam_mixer "${BASE_DIR}"
+if [[ $? != 0 ]]; then
+    echo -e "${err}"
+    exit $?
+fi
+
+test_line_splitter "${BASE_DIR}"
+if [[ $? != 0 ]]; then
+    echo -e "${err}"
+    exit $?
+fi